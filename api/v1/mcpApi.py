@@ -1,6 +1,6 @@
 from fastapi import FastAPI, Query, HTTPException
-from api.v1.mcp_run import run_mcp, run_mcp_with_thread_safe
-from fastapi.responses import RedirectResponse
+from api.v1.mcp_run import run_mcp, run_mcp_with_thread_safe, run_mcp_stream
+from fastapi.responses import RedirectResponse, StreamingResponse
 import logging
 import traceback
 
@@ -36,6 +36,15 @@ def generate_text(prompt: str = Query(..., description="Prompt text")):
             detail=f"Error during processing: {str(e)}"
         )
 
+@app.post("/chat_stream")
+def generate_text_stream(prompt: str = Query(..., description="Prompt text")):
+    """
+    Chat endpoint streaming newline-delimited JSON events: the progress
+    of long-running tools, then the final response.
+    """
+    logger.info(f"Received prompt (stream): {prompt[:100]}...")
+    return StreamingResponse(run_mcp_stream(prompt), media_type="application/x-ndjson")
+
 @app.post("/chat_alternative")
 def generate_text_alt(prompt: str = Query(..., description="Prompt text")):
     """
@@ -1,5 +1,8 @@
 import os
 import sys
+import json
+import time
+import queue
 import asyncio
 from contextlib import AsyncExitStack
 import traceback
@@ -7,17 +10,23 @@ from dotenv import load_dotenv
 import threading
 from concurrent.futures import ThreadPoolExecutor
 import logging
+from typing import Optional, Iterator
 
-from pydantic_settings import CliApp
-from mcp_client import MCPClient
-from core.cli import CliApp
+from mcp_registry import load_server_configs, connect_servers
 from core.cli_chat import CliChat
 from core.openrouter import OpenRouterClient
+from core.deadline import Deadline
+from core.tools import ProgressHandler
 
 # Logging configuration for debug
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# End-to-end budget of an API request, overridable with REQUEST_DEADLINE_SECONDS
+DEFAULT_DEADLINE_SECONDS = 55.0
+# Extra time given to the worker thread to return the partial answer
+DEADLINE_GRACE_SECONDS = 5.0
+
 def init_env():
     load_dotenv()
     model = os.getenv("MODEL", "")
@@ -28,22 +37,33 @@ def init_env():
 
     return model, openrouter_api_key
 
+def _result_timeout(deadline: Deadline) -> Optional[float]:
+    """
+    Time to wait for the worker thread: the chat stops itself at the
+    deadline, the grace period covers returning the partial answer and cleanup
+    """
+    remaining = deadline.remaining()
+    return None if remaining is None else remaining + DEADLINE_GRACE_SECONDS
+
 # original async version
-async def run_mcp_async(prompt: str) -> str:
+async def run_mcp_async(
+    prompt: str,
+    deadline: Optional[Deadline] = None,
+    on_progress: Optional[ProgressHandler] = None
+) -> str:
     model, _ = init_env()
     openrouter_service = OpenRouterClient(model=model,
                                           api_key=_,
                                           default_timeout=120.0)
-    clients = {}
-
-    command, args = (
-        ("uv", ["run", "mcp_server.py"])
-    )
 
     async with AsyncExitStack() as stack:
         try:
-            hr_client = await stack.enter_async_context(
-                MCPClient(command=command, args=args, openrouter_client=openrouter_service)
+            # Servers live only for this request, so health pings are disabled
+            clients = await connect_servers(
+                load_server_configs(),
+                stack,
+                openrouter_client=openrouter_service,
+                ping_interval=0
             )
         except Exception as e:
             logger.error(f"Exception occurred: {e}")
@@ -56,14 +76,15 @@ async def run_mcp_async(prompt: str) -> str:
             
             return str(e)
 
-        clients["hr_client"] = hr_client
         chat = CliChat(
-            mcp_client=hr_client,
+            mcp_client=next(iter(clients.values()), None),
             clients=clients,
             openRouterService=openrouter_service,
+            on_progress=on_progress,
         )
 
-        response = await chat.run(prompt)
+        response = await chat.run(prompt, deadline=deadline)
+        logger.info(f"Chat finished with status: {chat.last_status}")
         
         return response
 
@@ -73,6 +94,8 @@ def run_mcp_in_new_thread(prompt: str) -> str:
     Runs MCP in a separate thread with a new asyncio loop.
     This avoids conflicts with the uvicorn/FastAPI loop.
     """
+    deadline = Deadline.from_env(default=DEFAULT_DEADLINE_SECONDS)
+
     def thread_target():
         # Force new asyncio loop on Windows
         if sys.platform == "win32":
@@ -83,7 +106,7 @@ def run_mcp_in_new_thread(prompt: str) -> str:
         asyncio.set_event_loop(new_loop)
         
         try:
-            return new_loop.run_until_complete(run_mcp_async(prompt))
+            return new_loop.run_until_complete(run_mcp_async(prompt, deadline))
         except Exception as e:
             logger.error(f"Error in thread: {e}")
             with open("error_log.txt", "w", encoding="utf-8") as f:
@@ -95,7 +118,7 @@ def run_mcp_in_new_thread(prompt: str) -> str:
 
     with ThreadPoolExecutor(max_workers=1) as executor:
         future = executor.submit(thread_target)
-        return future.result(timeout=60)
+        return future.result(timeout=_result_timeout(deadline))
 
 # SOLUTION 2: Async version for FastAPI with correct loop handling
 async def run_mcp_async_for_fastapi(prompt: str) -> str:
@@ -155,6 +178,8 @@ def run_mcp_with_thread_safe(prompt: str) -> str:
     Alternative that uses run_coroutine_threadsafe to run
     the coroutine in a thread with a dedicated loop.
     """
+    deadline = Deadline.from_env(default=DEFAULT_DEADLINE_SECONDS)
+
     def target():
         if sys.platform == "win32":
             asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
@@ -163,10 +188,57 @@ def run_mcp_with_thread_safe(prompt: str) -> str:
         asyncio.set_event_loop(loop)
         
         try:
-            return loop.run_until_complete(run_mcp_async(prompt))
+            return loop.run_until_complete(run_mcp_async(prompt, deadline))
         finally:
             loop.close()
     
     with ThreadPoolExecutor(max_workers=1) as executor:
         future = executor.submit(target)
-        return future.result(timeout=60)
\ No newline at end of file
+        return future.result(timeout=_result_timeout(deadline))
+
+# STREAMING VERSION: tool progress while the chat runs, then the response
+def run_mcp_stream(prompt: str) -> Iterator[str]:
+    """
+    Runs MCP in a separate thread like run_mcp and yields NDJSON events:
+    {"type": "progress", "tool": ..., "progress": ..., "total": ...} while
+    tools report progress, then {"type": "response", "response": ...} or
+    {"type": "error", "error": ...}.
+    """
+    deadline = Deadline.from_env(default=DEFAULT_DEADLINE_SECONDS)
+    events: "queue.Queue[Optional[dict]]" = queue.Queue()
+
+    def on_progress(event: dict):
+        events.put({"type": "progress", **event})
+
+    def target():
+        if sys.platform == "win32":
+            asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        try:
+            response = loop.run_until_complete(run_mcp_async(prompt, deadline, on_progress))
+            events.put({"type": "response", "response": response})
+        except Exception as e:
+            logger.error(f"Error in streaming thread: {e}")
+            events.put({"type": "error", "error": str(e)})
+        finally:
+            loop.close()
+            events.put(None)
+
+    threading.Thread(target=target, daemon=True).start()
+
+    timeout = _result_timeout(deadline)
+    expires_at = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        try:
+            event = events.get(
+                timeout=None if expires_at is None else max(0.0, expires_at - time.monotonic())
+            )
+        except queue.Empty:
+            yield json.dumps({"type": "error", "error": "Timed out waiting for the response"}) + "\n"
+            return
+        if event is None:
+            return
+        yield json.dumps(event) + "\n"
@@ -0,0 +1,95 @@
+"""
+Benchmark: data-access hot path of the MCP server tools on each storage
+backend, with the profile cache bypassed.
+
+Each backend is filled with the same synthetic candidates, then timed on
+the lookups behind generate_interview_questions (by email), the batch
+tool (by job) and list_candidates_for_job (keyset pages). SQLite uses a
+temporary file; Postgres is included only when named and writes to the
+table of DB_CANDIDATES_TABLE, which must not be the production view.
+
+Usage:
+    python benchmarks/bench_backends.py [count] [iterations] [backend ...]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dbBackends import MemoryBackend, SQLiteBackend, create_backend, synthetic_candidates
+
+PER_JOB = 50
+
+
+def make_backend(name: str, directory: str):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend(os.path.join(directory, "candidates.sqlite3"))
+    return create_backend(name)
+
+
+async def measure(label: str, func, iterations: int):
+    await func()  # warm-up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"  {label:<26}{statistics.median(timings):>9.3f}ms{p95:>9.3f}ms")
+
+
+async def bench(name: str, count: int, iterations: int, directory: str):
+    backend = make_backend(name, directory)
+    rng = random.Random(1)
+    jobs = max(1, count // PER_JOB)
+
+    def email():
+        return f"candidate{rng.randrange(count):07d}@example.com"
+
+    def job_id():
+        return f"job-{rng.randrange(jobs):06d}"
+
+    try:
+        start = time.perf_counter()
+        await backend.load(synthetic_candidates(count, PER_JOB))
+        print(f"{name}: loaded {count} candidates in {time.perf_counter() - start:.1f}s")
+        print(f"  {'query':<26}{'median':>11}{'p95':>11}")
+
+        await measure("user by email", lambda: backend.get_user_by_email(email()), iterations)
+        await measure("10 users by email", lambda: backend.get_users_by_emails([email() for _ in range(10)]), iterations)
+        await measure("users by job", lambda: backend.get_users_by_job(job_id()), iterations)
+        await measure("first page of a job", lambda: backend.get_candidates_page(job_id(), None, 20), iterations)
+
+        async def walk():
+            job, cursor = job_id(), None
+            while True:
+                page = await backend.get_candidates_page(job, cursor, 10)
+                if len(page) < 10:
+                    return
+                cursor = page[-1]["email"]
+        await measure("all pages of a job", walk, iterations)
+    finally:
+        await backend.close()
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    names = sys.argv[3:] or ["memory", "sqlite"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            await bench(name, count, iterations, directory)
+            print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Benchmark: latency of the candidate lookup by email.
+
+Compares the original access pattern (a new connection per query) with
+pooled connections, with and without server-side prepared statements.
+Needs the database configured in .env (DB_HOST, DB_NAME, ...).
+
+Usage:
+    python benchmarks/bench_db_queries.py [iterations] [email]
+"""
+import os
+import sys
+import time
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dbAccess
+from dbQuery import get_query_stats
+
+LOOKUP = "SELECT name, surname, semantic_profile, jobdescription FROM candidate_applications_view WHERE email = %s"
+
+
+def connection_per_query(email: str):
+    """The access pattern before the pool: connect, query, close"""
+    from psycopg2.extras import RealDictCursor
+
+    conn = dbAccess.get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(LOOKUP, (email,))
+            return cur.fetchone()
+    finally:
+        conn.close()
+
+
+def measure(label: str, func, iterations: int):
+    func()  # warm-up: opens the pool and prepares the statement
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<28}{statistics.median(timings):>9.2f}ms{p95:>9.2f}ms")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    email = sys.argv[2] if len(sys.argv) > 2 else None
+    if email is None:
+        row = dbAccess.execute_query("SELECT email FROM candidate_applications_view LIMIT 1")
+        if not row:
+            sys.exit("No candidates in candidate_applications_view")
+        email = row["email"]
+
+    print(f"{iterations} lookups of {email}")
+    print(f"{'mode':<28}{'median':>11}{'p95':>11}")
+    measure("connection per query", lambda: connection_per_query(email), iterations)
+    measure("pooled", lambda: dbAccess.execute_query(LOOKUP, (email,)), iterations)
+    measure("pooled + prepared", lambda: dbAccess.execute_query(LOOKUP, (email,), prepare=True), iterations)
+
+    print()
+    for statement, stats in get_query_stats().items():
+        print(f"{stats['calls']:>6} calls {stats['avg_ms']:>8.2f}ms avg  {statement[:70]}")
+
+
+if __name__ == "__main__":
+    main()
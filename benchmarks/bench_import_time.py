@@ -0,0 +1,86 @@
+"""
+Benchmark: import time of the entry points, measured with -X importtime.
+
+Each module is imported in a fresh interpreter several times and the
+median cumulative time is compared with its budget. Modules that must
+not be loaded by an entry point are reported as violations.
+
+Exits with status 1 when a budget is exceeded, so it can run in CI.
+
+Usage:
+    python benchmarks/bench_import_time.py [runs]
+"""
+import os
+import sys
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget in milliseconds of the cumulative import time of each entry point
+BUDGETS_MS = {
+    "api.v1.mcpApi": 900,
+    "main": 800,
+    "mcp_server": 800,
+}
+
+# Packages an entry point must not import
+FORBIDDEN = {
+    "api.v1.mcpApi": ("anthropic", "prompt_toolkit", "psycopg2"),
+    "main": ("anthropic", "psycopg2", "fastapi"),
+    "mcp_server": ("anthropic", "prompt_toolkit", "psycopg2", "fastapi"),
+}
+
+
+def import_profile(module: str) -> tuple[float, set[str]]:
+    """Returns the cumulative import time in ms and the imported top-level packages"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    total_us = 0
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        packages.add(name.split(".")[0])
+        if name == module:
+            total_us = int(cumulative)
+    return total_us / 1000, packages
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    failed = False
+
+    print(f"{'module':<18}{'median':>10}{'budget':>10}")
+    for module, budget in BUDGETS_MS.items():
+        timings = []
+        packages: set[str] = set()
+        for _ in range(runs):
+            elapsed, packages = import_profile(module)
+            timings.append(elapsed)
+        median = statistics.median(timings)
+
+        status = "ok" if median <= budget else "OVER BUDGET"
+        print(f"{module:<18}{median:>8.0f}ms{budget:>8}ms  {status}")
+        failed |= median > budget
+
+        loaded = sorted(set(FORBIDDEN.get(module, ())) & packages)
+        if loaded:
+            print(f"  imports {', '.join(loaded)}, which it does not need")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: CPU cost of building a chat request body with a large tool catalog.
+
+Compares the per-call conversion of the tools list with the pre-encoded
+ToolPayload spliced into the body.
+
+Usage:
+    python benchmarks/bench_tool_payload.py [num_tools] [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.openrouter import OpenRouterClient, ToolPayload
+
+
+def make_tools(num_tools: int) -> list[dict]:
+    """Synthetic tools with schemas of realistic size"""
+    tools = []
+    for i in range(num_tools):
+        tools.append({
+            "name": f"tool_{i}",
+            "description": f"Synthetic tool number {i} that performs a lookup on resource set {i % 7}",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    f"param_{j}": {
+                        "type": "string",
+                        "description": f"Parameter {j} of tool {i}"
+                    }
+                    for j in range(6)
+                },
+                "required": ["param_0"]
+            }
+        })
+    return tools
+
+
+def make_messages(num_turns: int = 6) -> list[dict]:
+    messages = []
+    for i in range(num_turns):
+        messages.append({"role": "user", "content": f"Question {i} about the candidate"})
+        messages.append({"role": "assistant", "content": f"Answer {i} " * 40})
+    return messages
+
+
+def bench(label: str, fn, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    per_call_us = (time.process_time() - start) / iterations * 1e6
+    print(f"{label:<28} {per_call_us:10.1f} us/call")
+    return per_call_us
+
+
+def main():
+    num_tools = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    client = OpenRouterClient(model="bench/model", api_key="bench")
+    tools = make_tools(num_tools)
+    messages = make_messages()
+    payload = ToolPayload.from_tools(tools, version="bench")
+
+    print(f"Tools: {num_tools}, iterations: {iterations}")
+    baseline = bench(
+        "convert + encode per call",
+        lambda: client._build_request_body(messages, tools=tools, max_tokens=4000),
+        iterations
+    )
+    spliced = bench(
+        "pre-encoded payload",
+        lambda: client._build_request_body(messages, tools=payload, max_tokens=4000),
+        iterations
+    )
+    print(f"Speedup: {baseline / spliced:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
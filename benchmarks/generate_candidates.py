@@ -0,0 +1,39 @@
+"""
+Fills a storage backend with synthetic candidate applications, for load
+tests of mcp_server.py without the production database.
+
+The backend is chosen as in the server (DB_BACKEND, DB_SQLITE_PATH,
+DB_CANDIDATES_TABLE). For Postgres, point DB_CANDIDATES_TABLE at a new
+table: the view of the application database cannot be written to.
+
+Usage:
+    DB_BACKEND=sqlite python benchmarks/generate_candidates.py [count] [candidates_per_job]
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dbBackends import create_backend, synthetic_candidates
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    per_job = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    backend = create_backend()
+    if backend.name == "memory":
+        sys.exit("The memory backend lives in the server process: set DB_MEMORY_CANDIDATES instead")
+
+    start = time.perf_counter()
+    try:
+        inserted = await backend.load(synthetic_candidates(count, per_job))
+    finally:
+        await backend.close()
+    print(f"{inserted} candidates loaded into {backend.name} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
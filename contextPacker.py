@@ -0,0 +1,155 @@
+"""
+Fits the candidate profile and the job description of a sampling prompt
+into a token budget.
+
+Both texts are split into sections (lines, and sentences of long lines),
+with whitespace normalised and duplicates removed. Profile sections are
+ranked by how many job-description keywords they share and kept greedily
+within PROMPT_PROFILE_TOKENS (default 1500); the job description keeps
+its first sections within PROMPT_JOB_TOKENS (default 800). Sections are
+emitted in their original order.
+
+Tokens are estimated as characters / 4, which is close enough for
+budgeting and needs no tokenizer.
+"""
+import os
+import re
+import math
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple
+
+CHARS_PER_TOKEN = 4
+
+# Words that carry no meaning for the keyword overlap (English and Italian)
+STOPWORDS = {
+    "and", "the", "for", "with", "you", "your", "our", "are", "will", "from", "that", "this",
+    "have", "has", "who", "all", "any", "can", "not", "but", "its", "into", "per", "una",
+    "uno", "del", "della", "delle", "dei", "degli", "con", "che", "nel", "nella", "sul",
+    "sulla", "alla", "alle", "come", "anche", "sono", "essere", "avere", "più", "tra",
+}
+
+_WORD = re.compile(r"[\w+#.]+", re.UNICODE)
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def keywords(text: str) -> Set[str]:
+    """Lowercase words of at least 3 characters, without stopwords"""
+    words = (word.strip(".").lower() for word in _WORD.findall(text))
+    return {word for word in words if len(word) >= 3 and word not in STOPWORDS}
+
+
+def split_sections(text: str, max_tokens: int) -> List[str]:
+    """
+    Non-empty lines with normalised whitespace, without duplicates.
+    Lines longer than max_tokens are split into sentences.
+    """
+    sections = []
+    seen = set()
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line:
+            continue
+        parts = _SENTENCE_END.split(line) if estimate_tokens(line) > max_tokens else [line]
+        for part in parts:
+            key = part.casefold()
+            if part and key not in seen:
+                seen.add(key)
+                sections.append(part)
+    return sections
+
+
+@dataclass
+class PackResult:
+    """A packed text with its size before and after packing"""
+    text: str
+    original_tokens: int
+    packed_tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.packed_tokens
+
+    @property
+    def ratio(self) -> float:
+        """Packed size over original size (1.0 = unchanged)"""
+        return self.packed_tokens / self.original_tokens if self.original_tokens else 1.0
+
+
+def pack(text: str, budget: int, ranking_keywords: Optional[Set[str]] = None) -> PackResult:
+    """
+    Fits text into budget tokens. With ranking_keywords, the sections
+    sharing most keywords are kept first, otherwise the first sections.
+    """
+    original_tokens = estimate_tokens(text)
+    sections = split_sections(text, budget)
+
+    order = list(range(len(sections)))
+    if ranking_keywords:
+        def score(index: int) -> float:
+            words = keywords(sections[index])
+            # Denser matches first, without favouring long sections too much
+            return len(words & ranking_keywords) / math.sqrt(len(words) or 1)
+        order.sort(key=score, reverse=True)
+
+    kept = set()
+    used = 0
+    for index in order:
+        # Sections are joined by a newline
+        cost = estimate_tokens(sections[index] + "\n")
+        if used + cost <= budget:
+            kept.add(index)
+            used += cost
+
+    if kept:
+        packed = "\n".join(section for index, section in enumerate(sections) if index in kept)
+    else:
+        # Not even one section fits: cut the best one
+        packed = sections[order[0]][:budget * CHARS_PER_TOKEN] if sections else ""
+    return PackResult(packed, original_tokens, estimate_tokens(packed))
+
+
+class ContextPacker:
+    """Packs candidate profiles and job descriptions, keeping totals of the savings"""
+
+    def __init__(self, profile_budget: int, job_budget: int):
+        self.profile_budget = profile_budget
+        self.job_budget = job_budget
+        self.calls = 0
+        self.original_tokens = 0
+        self.packed_tokens = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ContextPacker":
+        return cls(
+            profile_budget=int(os.getenv("PROMPT_PROFILE_TOKENS", "1500")),
+            job_budget=int(os.getenv("PROMPT_JOB_TOKENS", "800")),
+        )
+
+    def pack(self, profile: str, job_description: str) -> Tuple[PackResult, PackResult]:
+        """Returns the packed profile and job description"""
+        job = pack(job_description, self.job_budget)
+        packed_profile = pack(profile, self.profile_budget, keywords(job_description))
+        with self._lock:
+            self.calls += 1
+            self.original_tokens += packed_profile.original_tokens + job.original_tokens
+            self.packed_tokens += packed_profile.packed_tokens + job.packed_tokens
+        return packed_profile, job
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "original_tokens": self.original_tokens,
+                "packed_tokens": self.packed_tokens,
+                "saved_tokens": self.original_tokens - self.packed_tokens,
+                "ratio": self.packed_tokens / self.original_tokens if self.original_tokens else 1.0,
+            }
+
+
+context_packer = ContextPacker.from_env()
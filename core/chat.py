@@ -1,45 +1,210 @@
+import os
 import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from core.openrouter import OpenRouterClient, OpenRouterMessage
 from mcp_client import MCPClient
-from core.tools import ToolManager
-from anthropic.types import MessageParam
+from core.tools import ToolManager, FETCH_TOOL_NAME, ProgressHandler
+from core.tool_selector import ToolSelector, selection_text
+from core.deadline import Deadline, DeadlineExceeded
 from colorama import Fore, init
 
 init(autoreset=True)
 
+# Chat message in the OpenAI/OpenRouter format ({"role": ..., "content": ...})
+MessageParam = Dict[str, Any]
+
 
 class Chat:
-    def __init__(self, openRouter_service: OpenRouterClient, clients: dict[str, MCPClient]):
+    def __init__(
+        self,
+        openRouter_service: OpenRouterClient,
+        clients: dict[str, MCPClient],
+        tool_top_k: Optional[int] = None,
+        pinned_tools: Optional[List[str]] = None,
+        pipelined: Optional[bool] = None,
+        on_progress: Optional[ProgressHandler] = None,
+    ):
         self.openRouter_service: OpenRouterClient = openRouter_service
         self.clients: dict[str, MCPClient] = clients
         self.messages: list[MessageParam] = []
 
+        # Tool selection is disabled when top_k is 0
+        if tool_top_k is None:
+            tool_top_k = int(os.getenv("TOOL_SELECTOR_TOP_K", "0"))
+        if pinned_tools is None:
+            pinned_tools = [
+                name.strip() for name in os.getenv("TOOL_SELECTOR_PINNED", "").split(",")
+                if name.strip()
+            ]
+        self.tool_top_k: int = tool_top_k
+        self.pinned_tools: List[str] = pinned_tools + [FETCH_TOOL_NAME]
+        # Set once a tool result was truncated: the fetch tool is offered from then on
+        self.has_stored_results: bool = False
+
+        # In pipelined mode tools start while the completion is still streaming
+        if pipelined is None:
+            pipelined = os.getenv("CHAT_PIPELINED", "0") == "1"
+        self.pipelined: bool = pipelined
+
+        # Receives the progress notifications of running tools
+        self.on_progress: Optional[ProgressHandler] = on_progress
+
+        # Outcome of the last run: "ok", "deadline_exceeded", "error" or "max_iterations"
+        self.last_status: str = "ok"
+
     async def _process_query(self, query: str):
         self.messages.append({"role": "user", "content": query})
 
-    async def run(self, query: str) -> str:
+    async def _stream_completion(
+        self, tools, deadline: Optional[Deadline] = None
+    ) -> Tuple[OpenRouterMessage, Dict[str, asyncio.Task]]:
+        """
+        Streams the completion and dispatches each read-only tool call as
+        soon as its arguments are complete. Other calls wait for the final
+        response, since a call cancelled after starting may already have
+        had side effects. Returns the response and the running tasks keyed
+        by tool call ID.
+        """
+        dispatched: Dict[str, asyncio.Task] = {}
+
+        def on_tool_call(tool_call: Dict[str, Any]):
+            if not ToolManager.is_read_only(self.clients, tool_call["name"]):
+                return
+            print(f"{Fore.MAGENTA}Dispatching tool '{tool_call['name']}' while streaming")
+            dispatched[tool_call["id"]] = asyncio.create_task(
+                ToolManager.execute_tool_call(
+                    self.clients, tool_call, len(dispatched), deadline, self.on_progress
+                )
+            )
+
+        try:
+            request = self.openRouter_service.chat_stream(
+                messages=self.messages,
+                tools=tools,
+                max_tokens=4000,
+                temperature=0.4,
+                on_tool_call=on_tool_call,
+                deadline=deadline
+            )
+            response = await (deadline.run(request) if deadline else request)
+        except DeadlineExceeded:
+            for task in dispatched.values():
+                task.cancel()
+            raise
+        except Exception as e:
+            for task in dispatched.values():
+                task.cancel()
+            if dispatched:
+                raise
+            # Nothing started yet, so a buffered completion is safe to retry
+            print(f"{Fore.YELLOW}Streaming failed ({e}), falling back to buffered completion")
+            response = await self.openRouter_service.chat_with_retry(
+                messages=self.messages,
+                tools=tools,
+                max_tokens=4000,
+                temperature=0.4,
+                max_retries=2,
+                deadline=deadline
+            )
+
+        return response, dispatched
+
+    async def _gather_tool_results(
+        self,
+        tool_calls: List[Dict[str, Any]],
+        dispatched: Dict[str, asyncio.Task],
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
+        """Waits for dispatched calls and runs the remaining ones concurrently"""
+        tasks = []
+        for i, tool_call in enumerate(tool_calls):
+            task = dispatched.pop(tool_call["id"], None)
+            if task is None:
+                task = asyncio.create_task(
+                    ToolManager.execute_tool_call(self.clients, tool_call, i, deadline, self.on_progress)
+                )
+            tasks.append(task)
+
+        # Calls the final response no longer contains are not needed
+        for task in dispatched.values():
+            task.cancel()
+
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    def _deadline_answer(self, partial_text: str, error: Exception) -> str:
+        """Best answer available when the deadline expires"""
+        self.last_status = "deadline_exceeded"
+        notice = f"⚠️ {error}."
+        if partial_text.strip():
+            return f"{notice} Partial answer:\n\n{partial_text}"
+        return f"{notice} No answer could be completed in time, please try again."
+
+    async def run(self, query: str, deadline: Optional[Deadline] = None) -> str:
+        """
+        Runs the conversation loop for a query.
+        With a deadline, every LLM call, tool call and retry sleep gets only
+        the remaining time; when it expires in-flight work is cancelled and
+        the best partial answer is returned with last_status set to
+        "deadline_exceeded".
+        """
+        self.last_status = "ok"
         final_text_response = ""
+        # Last text produced by the model, returned if the deadline expires
+        partial_text = ""
         max_iterations = 5 
         iteration = 0
+        # Set once the model asks for a tool outside the selected subset
+        use_full_catalog = False
+        # Tool calls started while streaming, keyed by tool call ID
+        dispatched: Dict[str, asyncio.Task] = {}
 
-        await self._process_query(query)
+        try:
+            if deadline:
+                await deadline.run(self._process_query(query))
+            else:
+                await self._process_query(query)
+        except DeadlineExceeded as e:
+            print(f"{Fore.RED}ERROR: {e} while preparing the query")
+            return self._deadline_answer(partial_text, e)
 
         while iteration < max_iterations:
             iteration += 1
             print(f"{Fore.CYAN}Iteration {iteration}/{max_iterations}")
 
             try:
-                available_tools = await ToolManager.get_all_tools(self.clients)
-                print(f"{Fore.CYAN}Available tools: {[t['name'] for t in available_tools]}")
-
-                response = await self.openRouter_service.chat_with_retry(
-                    messages=self.messages,
-                    tools=available_tools,
-                    max_tokens=4000,
-                    temperature=0.4,
-                    max_retries=2
+                if deadline:
+                    deadline.check()
+
+                available_tools = await ToolManager.get_tool_payload(
+                    self.clients, include_fetch=self.has_stored_results
                 )
+                if self.tool_top_k > 0 and not use_full_catalog:
+                    available_tools = ToolSelector.for_payload(available_tools).select(
+                        selection_text(self.messages),
+                        top_k=self.tool_top_k,
+                        pinned=self.pinned_tools
+                    )
+                print(f"{Fore.CYAN}Available tools: {list(available_tools.names)}")
+
+                dispatched: Dict[str, asyncio.Task] = {}
+                if self.pipelined:
+                    response, dispatched = await self._stream_completion(
+                        available_tools, deadline
+                    )
+                else:
+                    response = await self.openRouter_service.chat_with_retry(
+                        messages=self.messages,
+                        tools=available_tools,
+                        max_tokens=4000,
+                        temperature=0.4,
+                        max_retries=2,
+                        deadline=deadline
+                    )
 
                 print(f"{Fore.RED}=== ITERATION {iteration} DEBUG ===")
                 print(f"{Fore.RED}Response received: {response is not None}")
@@ -51,6 +216,7 @@ class Chat:
                 text_response = self.openRouter_service.text_from_message(response)
                 if text_response.strip():
                     print(f"{Fore.LIGHTBLUE_EX}Assistant: {text_response}")
+                    partial_text = text_response
 
                 if response.stop_reason == "tool_use":
                     print(f"{Fore.MAGENTA}Tool use detected, executing tools...")
@@ -67,13 +233,28 @@ class Chat:
                                 "input": block.get("input", {})
                             })
 
+                    unknown_tools = [
+                        call["name"] for call in tool_calls
+                        if call["name"] not in available_tools.names
+                    ]
+                    if unknown_tools and not use_full_catalog:
+                        print(f"{Fore.YELLOW}Model asked for tools outside the selection: {unknown_tools}, sending the full set")
+                        use_full_catalog = True
+
                     if tool_calls:
 
-                        tool_results = await ToolManager.execute_tools_from_response(
-                            self.clients, tool_calls
-                        )
+                        if self.pipelined:
+                            tool_results = await self._gather_tool_results(
+                                tool_calls, dispatched, deadline
+                            )
+                        else:
+                            tool_results = await ToolManager.execute_tools_from_response(
+                                self.clients, tool_calls, deadline, self.on_progress
+                            )
 
                         print(f"{Fore.GREEN}Tools executed: {len(tool_results)} results")
+                        if any(ToolManager.result_store.holds_any(result["content"]) for result in tool_results):
+                            self.has_stored_results = True
 
                         self.openRouter_service.add_user_message(self.messages, tool_results)
                     else:
@@ -81,22 +262,44 @@ class Chat:
                         break
 
                 else:
+                    for task in dispatched.values():
+                        task.cancel()
                     final_text_response = text_response
                     break
 
+            except DeadlineExceeded as e:
+                for task in dispatched.values():
+                    task.cancel()
+
+                print(f"{Fore.RED}ERROR: {e} in iteration {iteration}")
+                final_text_response = self._deadline_answer(partial_text, e)
+                break
+
             except Exception as e:
+                for task in dispatched.values():
+                    task.cancel()
+
                 error_msg = f"Error in iteration {iteration}: {str(e)}"
                 print(f"{Fore.RED}ERROR: {error_msg}")
 
                 if iteration >= max_iterations:
+                    self.last_status = "error"
                     final_text_response = f"Sorry, I encountered an error: {error_msg}"
                     break
                 else:
                     print(f"{Fore.YELLOW}Retrying after error...")
-                    await asyncio.sleep(2)
+                    try:
+                        if deadline:
+                            await deadline.sleep(2)
+                        else:
+                            await asyncio.sleep(2)
+                    except DeadlineExceeded as e:
+                        final_text_response = self._deadline_answer(partial_text, e)
+                        break
                     continue
 
         if iteration >= max_iterations and not final_text_response:
+            self.last_status = "max_iterations"
             final_text_response = (
                 "Conversation reached maximum iterations. "
                 "Please try again with a simpler request."
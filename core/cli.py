@@ -1,3 +1,5 @@
+import os
+import asyncio
 from typing import List, Optional
 from prompt_toolkit import PromptSession
 from prompt_toolkit.completion import Completer, Completion
@@ -9,6 +11,7 @@ from prompt_toolkit.document import Document
 from prompt_toolkit.buffer import Buffer
 
 from core.cli_chat import CliChat
+from core.deadline import Deadline
 from colorama import Fore, init
 
 init(autoreset=True) 
@@ -186,8 +189,7 @@ class CliApp:
         )
 
     async def initialize(self):
-        await self.refresh_resources()
-        await self.refresh_prompts()
+        await asyncio.gather(self.refresh_resources(), self.refresh_prompts())
 
     async def refresh_resources(self):
         try:
@@ -215,7 +217,9 @@ class CliApp:
                 if not user_input.strip():
                     continue
 
-                response = await self.agent.run(user_input)
+                # End-to-end budget of the question, tool calls included (0 = no deadline)
+                seconds = float(os.getenv("CLI_DEADLINE_SECONDS", "600"))
+                response = await self.agent.run(user_input, Deadline(seconds or None))
                 print(Fore.LIGHTGREEN_EX + f"\nResponse:\n")
                 print(response)
 
@@ -1,9 +1,11 @@
-from typing import List, Tuple
+import os
+import asyncio
+from typing import List, Tuple, Optional, Dict, Any
 from mcp.types import Prompt, PromptMessage
-from anthropic.types import MessageParam
-from core.chat import Chat  # Use the updated version
+from core.chat import Chat, MessageParam  # Use the updated version
 from mcp_client import MCPClient
 from core.openrouter import OpenRouterClient
+from core.tools import ProgressHandler
 from colorama import Fore, init
 
 init(autoreset=True)
@@ -12,15 +14,23 @@ init(autoreset=True)
 class CliChat(Chat):
     def __init__(
         self,
-        mcp_client: MCPClient,
+        mcp_client: Optional[MCPClient],
         clients: dict[str, MCPClient],
         openRouterService: OpenRouterClient,
+        on_progress: Optional[ProgressHandler] = None,
     ):
-        super().__init__(openRouter_service=openRouterService, clients=clients)
-        self.mcp_client: MCPClient = mcp_client
+        super().__init__(openRouter_service=openRouterService, clients=clients, on_progress=on_progress)
+        # Source of resources and prompts, None when no MCP server is available
+        self.mcp_client: Optional[MCPClient] = mcp_client
+        # Resources by id, name and URI, rebuilt when the server's list changes
+        self._resource_index: Optional[Dict[str, dict]] = None
+        self._resource_index_version: Any = None
+        self._resource_load_limit = int(os.getenv("RESOURCE_LOAD_CONCURRENCY", "8"))
 
     async def list_prompts(self) -> list[Prompt]:
         """List available prompts from the document client"""
+        if self.mcp_client is None:
+            return []
         try:
             return await self.mcp_client.list_prompts()
         except Exception as e:
@@ -29,6 +39,8 @@ class CliChat(Chat):
         
     async def list_tools(self) -> list[str]:
         """List available tools from the document client"""
+        if self.mcp_client is None:
+            return []
         try:
             tools = await self.mcp_client.list_tools()
             return [tool.name for tool in tools]
@@ -38,6 +50,8 @@ class CliChat(Chat):
         
     async def list_resources(self) -> list[dict]:
         """List available resources"""
+        if self.mcp_client is None:
+            return []
         try:
             return await self.mcp_client.list_resources()
         except Exception as e:
@@ -46,20 +60,51 @@ class CliChat(Chat):
 
     async def get_prompt(self, command: str, doc_id: str) -> list[PromptMessage]:
         """Get a prompt with parameters"""
+        if self.mcp_client is None:
+            return []
         try:
             return await self.mcp_client.get_prompt(command, {"doc_id": doc_id})
         except Exception as e:
             print(f"{Fore.RED}Error getting prompt {command}: {e}")
             return []
 
+    async def _get_resource_index(self) -> Dict[str, dict]:
+        """Returns the resource index, listing resources only when the list changed"""
+        version = getattr(self.mcp_client, "resources_version", None)
+        if self._resource_index is None or version != self._resource_index_version:
+            index = {}
+            for res in await self.list_resources():
+                for key in (res.get("uri"), res.get("name"), res.get("id")):
+                    if key:
+                        index[str(key)] = res
+            self._resource_index = index
+            self._resource_index_version = version
+        return self._resource_index
+
+    @staticmethod
+    def _resource_type(resource: dict) -> str:
+        return resource.get("type") or resource.get("mimeType") or "unknown"
+
+    async def _load_resources(self, resources: List[Tuple[str, dict]]) -> List[Any]:
+        """Reads the given resources concurrently, at most RESOURCE_LOAD_CONCURRENCY at a time"""
+        semaphore = asyncio.Semaphore(self._resource_load_limit)
+
+        async def load(mention: str, resource: dict) -> Any:
+            async with semaphore:
+                try:
+                    return await self.mcp_client.read_resource(str(resource.get("uri", mention)))
+                except Exception as e:
+                    print(f"{Fore.YELLOW}Error loading resource {mention}: {e}")
+                    return ""
+
+        return await asyncio.gather(*(load(mention, resource) for mention, resource in resources))
+
     async def _extract_resources(self, query: str) -> str:
         """
         Extracts and loads the contents of resources mentioned with @ (not just documents)
         """
-        print(f"{Fore.CYAN}Extracting resources from query: {query}")
-
-        # Find all resource mentions (words starting with @)
-        mentions = [word[1:] for word in query.split() if word.startswith("@")]
+        # Find all resource mentions (words starting with @), without duplicates
+        mentions = list(dict.fromkeys(word[1:] for word in query.split() if word.startswith("@")))
 
         if not mentions:
             return ""
@@ -67,35 +112,19 @@ class CliChat(Chat):
         print(f"{Fore.CYAN}Found mentions: {mentions}")
 
         try:
-            resources_list = await self.list_resources()
-            # Create an id->resource map for fast lookup
-            resource_map = {res.get("id", ""): res for res in resources_list}
-            mentioned_resources: list[Tuple[str, str, str]] = []
-            missing_resources: list[str] = []
-
-            for m in mentions:
-                resource = resource_map.get(m)
-                if resource:
-                    resource_type = resource.get("type", "unknown")
-                    print(f"{Fore.GREEN}Loading resource: {m} (type: {resource_type})")
-                    # Try to read the resource content
-                    try:
-                        content = await self.mcp_client.read_resource(resource.get("uri", m))
-                    except Exception as e:
-                        print(f"{Fore.YELLOW}Error loading resource {m}: {e}")
-                        content = ""
-                    mentioned_resources.append((m, resource_type, content))
-                else:
-                    missing_resources.append(m)
-
+            resource_index = await self._get_resource_index()
+            missing_resources = [m for m in mentions if m not in resource_index]
             if missing_resources:
                 raise FileNotFoundError(missing_resources)
 
+            found = [(m, resource_index[m]) for m in mentions]
+            contents = await self._load_resources(found)
+
             resources = "".join(
-                f'\n<resource id="{res_id}" type="{res_type}">\n{content}\n</resource>\n'
-                for res_id, res_type, content in mentioned_resources
+                f'\n<resource id="{m}" type="{self._resource_type(resource)}">\n{content}\n</resource>\n'
+                for (m, resource), content in zip(found, contents)
             )
-            print(f"{Fore.GREEN}Loaded {len(mentioned_resources)} resources")
+            print(f"{Fore.GREEN}Loaded {len(found)} resources")
             return resources
 
         except Exception as e:
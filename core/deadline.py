@@ -0,0 +1,76 @@
+import os
+import time
+import asyncio
+from typing import Optional, Awaitable, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of time"""
+
+    def __init__(self, message: str = "Deadline exceeded"):
+        super().__init__(message)
+
+
+class Deadline:
+    """
+    End-to-end time budget of a request.
+    Every LLM call, tool call and retry sleep takes its timeout from the
+    remaining time, so nothing outlives the request.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self._expires_at = time.monotonic() + seconds if seconds is not None else None
+
+    @classmethod
+    def from_env(cls, default: Optional[float] = None) -> "Deadline":
+        """Creates a deadline from REQUEST_DEADLINE_SECONDS (unset or 0 = no deadline)"""
+        value = os.getenv("REQUEST_DEADLINE_SECONDS")
+        seconds = float(value) if value else default
+        return cls(seconds if seconds else None)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when there is no deadline"""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self):
+        """Raises DeadlineExceeded if no time is left"""
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline of {self.seconds}s exceeded")
+
+    def clamp(self, timeout: float) -> float:
+        """Returns the timeout reduced to the remaining time"""
+        self.check()
+        remaining = self.remaining()
+        return timeout if remaining is None else min(timeout, remaining)
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        """Awaits within the remaining time, cancelling the work when it expires"""
+        remaining = self.remaining()
+        if remaining is None:
+            return await awaitable
+        try:
+            self.check()
+            return await asyncio.wait_for(awaitable, timeout=remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"Deadline of {self.seconds}s exceeded")
+        finally:
+            # Close a coroutine that was never started
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+
+    async def sleep(self, seconds: float):
+        """Sleeps, or raises DeadlineExceeded if the sleep would outlast the deadline"""
+        remaining = self.remaining()
+        if remaining is not None and seconds >= remaining:
+            raise DeadlineExceeded(f"Deadline of {self.seconds}s exceeded")
+        await asyncio.sleep(seconds)
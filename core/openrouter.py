@@ -2,8 +2,9 @@ import os
 import httpx
 import json
 import asyncio
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Tuple, Callable
 from dataclasses import dataclass
+from core.deadline import Deadline, DeadlineExceeded
 
 
 @dataclass
@@ -22,6 +23,41 @@ class OpenRouterMessage:
                 self.content = [{"type": "text", "text": self.content[0]}]
 
 
+# Maps OpenRouter finish_reason values to the Claude format
+STOP_REASON_MAPPING = {
+    "stop": "end_turn",
+    "length": "max_tokens",
+    "tool_calls": "tool_use",
+    "function_call": "tool_use"
+}
+
+
+@dataclass(frozen=True)
+class ToolPayload:
+    """
+    Tools list converted to OpenRouter format and JSON-encoded once per
+    catalog version, so it can be spliced into every request body as is
+    """
+    version: str
+    names: Tuple[str, ...]
+    tools: Tuple[Dict[str, Any], ...]
+    encoded: str
+
+    @classmethod
+    def from_tools(cls, tools: List[Dict[str, Any]], version: str) -> "ToolPayload":
+        """Builds the payload from tools in Claude format"""
+        openrouter_tools = OpenRouterClient._convert_tools_to_openrouter_format(tools)
+        return cls(
+            version=version,
+            names=tuple(tool.get("name", "") for tool in tools),
+            tools=tuple(dict(tool) for tool in tools),
+            encoded=json.dumps(openrouter_tools)
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
 class OpenRouterClient:
     """
     OpenRouter client that maintains compatibility with the Claude interface
@@ -117,19 +153,22 @@ class OpenRouterClient:
         system: Optional[str] = None,
         temperature: float = 0.4,
         stop_sequences: List[str] = None,
-        tools: Optional[List[Dict]] = None,
+        tools: Optional[Union[List[Dict], ToolPayload]] = None,
         thinking: bool = False,
         thinking_budget: int = 400,
         max_tokens: int = 500,
         max_retries: int = 3,
-        base_delay: float = 2.0
+        base_delay: float = 2.0,
+        deadline: Optional[Deadline] = None
     ) -> OpenRouterMessage:
         """
-        Retry version of the chat method
+        Retry version of the chat method.
+        With a deadline, each attempt and backoff sleep is bounded by the
+        remaining time and DeadlineExceeded is raised when it runs out.
         """
         for attempt in range(max_retries):
             try:
-                return await self.chat(
+                request = self.chat(
                     messages=messages,
                     system=system,
                     temperature=temperature,
@@ -138,8 +177,14 @@ class OpenRouterClient:
                     thinking=thinking,
                     thinking_budget=thinking_budget,
                     max_tokens=max_tokens,
-                    timeout_override=self.default_timeout + (attempt * 30)  # Increase timeout on each retry
+                    timeout_override=self.default_timeout + (attempt * 30),  # Increase timeout on each retry
+                    deadline=deadline
                 )
+                if deadline:
+                    return await deadline.run(request)
+                return await request
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 error_msg = str(e).lower()
                 is_retriable = any(keyword in error_msg for keyword in ['timeout', 'connection', 'network'])
@@ -147,7 +192,10 @@ class OpenRouterClient:
                 if is_retriable and attempt < max_retries - 1:
                     wait_time = base_delay * (2 ** attempt)  # Exponential backoff
                     print(f"Timeout/Network error (attempt {attempt + 1}/{max_retries}), retrying in {wait_time}s...")
-                    await asyncio.sleep(wait_time)
+                    if deadline:
+                        await deadline.sleep(wait_time)
+                    else:
+                        await asyncio.sleep(wait_time)
                     continue
                 else:
                     # Re-raise the original exception if not retriable or retries are exhausted
@@ -159,11 +207,12 @@ class OpenRouterClient:
         system: Optional[str] = None,
         temperature: float = 0.4,
         stop_sequences: List[str] = None,
-        tools: Optional[List[Dict]] = None,
+        tools: Optional[Union[List[Dict], ToolPayload]] = None,
         thinking: bool = False,
         thinking_budget: int = 400,
         max_tokens: int = 500,
-        timeout_override: Optional[float] = None
+        timeout_override: Optional[float] = None,
+        deadline: Optional[Deadline] = None
     ) -> OpenRouterMessage:
         """
         Makes a chat request to OpenRouter
@@ -173,11 +222,13 @@ class OpenRouterClient:
             system: System message (optional)
             temperature: Generation temperature (0.0-2.0)
             stop_sequences: Stop sequences (not always supported)
-            tools: Available tools (converted to function calling if supported)
+            tools: Available tools (converted to function calling if supported),
+                or a pre-encoded ToolPayload
             thinking: Thinking flag (ignored, not supported by OpenRouter)
             thinking_budget: Thinking budget (ignored)
             max_tokens: Maximum number of tokens to generate
             timeout_override: Override the default timeout
+            deadline: Request deadline, the timeout never exceeds its remaining time
         
         Returns:
             OpenRouterMessage: Response message
@@ -185,33 +236,20 @@ class OpenRouterClient:
         timeout = timeout_override or self.default_timeout
         
         try:
-            # Convert messages to OpenRouter format
-            openrouter_messages = self._convert_messages_to_openrouter_format(messages)
-            
-            # Add system message if present
-            if system:
-                openrouter_messages.insert(0, {
-                    "role": "system",
-                    "content": system
-                })
-            
-            # Prepare payload for OpenRouter
-            payload = {
-                "model": self.model,
-                "messages": openrouter_messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-            }
-            
-            # Add stop sequences if supported
-            if stop_sequences:
-                payload["stop"] = stop_sequences
-            
-            # Add tools if supported (function calling)
+            body = self._build_request_body(
+                messages=messages,
+                system=system,
+                temperature=temperature,
+                stop_sequences=stop_sequences,
+                tools=tools,
+                max_tokens=max_tokens
+            )
+
+            # Increase timeout when tools are present
             if tools:
-                payload["tools"] = self._convert_tools_to_openrouter_format(tools)
-                # Increase timeout when tools are present
                 timeout = max(timeout, 150.0)
+            if deadline:
+                timeout = deadline.clamp(timeout)
             
             print(f"Making request with timeout: {timeout}s")
             
@@ -223,7 +261,7 @@ class OpenRouterClient:
                 response = await client.post(
                     f"{self.base_url}/chat/completions",
                     headers=self.headers,
-                    json=payload
+                    content=body
                 )
             
             response.raise_for_status()
@@ -239,14 +277,7 @@ class OpenRouterClient:
             finish_reason = choice.get("finish_reason", "stop")
             
             # Map finish_reason to Claude format
-            stop_reason_mapping = {
-                "stop": "end_turn",
-                "length": "max_tokens",
-                "tool_calls": "tool_use",
-                "function_call": "tool_use"
-            }
-            
-            stop_reason = stop_reason_mapping.get(finish_reason, finish_reason)
+            stop_reason = STOP_REASON_MAPPING.get(finish_reason, finish_reason)
             
             # Handle tool calls if present
             if "tool_calls" in choice.get("message", {}):
@@ -274,6 +305,8 @@ class OpenRouterClient:
                 stop_reason=stop_reason
             )
             
+        except DeadlineExceeded:
+            raise
         except httpx.TimeoutException as e:
             raise Exception(f"Request timeout after {timeout}s: {e}")
         except httpx.ConnectError as e:
@@ -290,7 +323,229 @@ class OpenRouterClient:
         except Exception as e:
             raise Exception(f"OpenRouter API error: {e}")
 
-    def _convert_tools_to_openrouter_format(self, tools: List[Dict]) -> List[Dict]:
+    async def chat_stream(
+        self,
+        messages: List[Dict],
+        system: Optional[str] = None,
+        temperature: float = 0.4,
+        stop_sequences: List[str] = None,
+        tools: Optional[Union[List[Dict], ToolPayload]] = None,
+        max_tokens: int = 500,
+        timeout_override: Optional[float] = None,
+        on_tool_call: Optional[Callable[[Dict[str, Any]], None]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> OpenRouterMessage:
+        """
+        Makes a streaming chat request to OpenRouter.
+
+        on_tool_call is invoked with {"id", "name", "input"} as soon as the
+        arguments of a tool call are complete and valid JSON, while the rest
+        of the response is still being generated. A call without arguments is
+        complete once the next call starts or the stream ends. The returned
+        message is the same as the one returned by chat.
+
+        Dispatched calls are not withdrawn if the final stop_reason is not
+        tool_use: on_tool_call should only start calls that are safe to run
+        speculatively, and the caller cancels those the response does not use.
+        """
+        timeout = timeout_override or self.default_timeout
+        if tools:
+            timeout = max(timeout, 150.0)
+        if deadline:
+            timeout = deadline.clamp(timeout)
+
+        text_parts: List[str] = []
+        calls: Dict[int, Dict[str, Any]] = {}
+        dispatched: set = set()
+        finish_reason = "stop"
+
+        def try_dispatch(index: int, closed: bool = False):
+            call = calls[index]
+            if on_tool_call is None or index in dispatched or not call["name"]:
+                return
+            raw = call["arguments"].strip()
+            if not raw:
+                # Tools without parameters may stream no arguments at all
+                if not closed:
+                    return
+                arguments = {}
+            else:
+                # A JSON object can only parse once its closing brace has arrived
+                if not raw.endswith("}"):
+                    return
+                try:
+                    arguments = json.loads(raw)
+                except json.JSONDecodeError:
+                    return
+                if not isinstance(arguments, dict):
+                    return
+            dispatched.add(index)
+            on_tool_call({"id": call["id"], "name": call["name"], "input": arguments})
+
+        try:
+            body = self._build_request_body(
+                messages=messages,
+                system=system,
+                temperature=temperature,
+                stop_sequences=stop_sequences,
+                tools=tools,
+                max_tokens=max_tokens,
+                stream=True
+            )
+
+            print(f"Making streaming request with timeout: {timeout}s")
+
+            async with httpx.AsyncClient(
+                verify=False,
+                timeout=httpx.Timeout(timeout, connect=30.0, read=timeout, write=30.0)
+            ) as client:
+                async with client.stream(
+                    "POST",
+                    f"{self.base_url}/chat/completions",
+                    headers=self.headers,
+                    content=body
+                ) as response:
+                    if response.is_error:
+                        await response.aread()
+                    response.raise_for_status()
+
+                    async for line in response.aiter_lines():
+                        # Skip SSE comments such as ": OPENROUTER PROCESSING"
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+
+                        chunk = json.loads(data)
+                        if "error" in chunk:
+                            raise Exception(f"Stream error: {chunk['error']}")
+
+                        choices = chunk.get("choices") or []
+                        if not choices:
+                            continue
+                        choice = choices[0]
+                        delta = choice.get("delta") or {}
+
+                        if delta.get("content"):
+                            text_parts.append(delta["content"])
+
+                        for tool_call in delta.get("tool_calls") or []:
+                            index = tool_call.get("index", len(calls))
+                            call = calls.setdefault(
+                                index, {"id": "", "name": "", "arguments": ""}
+                            )
+                            function = tool_call.get("function") or {}
+                            if tool_call.get("id"):
+                                call["id"] = tool_call["id"]
+                            if function.get("name"):
+                                call["name"] += function["name"]
+                            if function.get("arguments"):
+                                call["arguments"] += function["arguments"]
+                            if not call["id"]:
+                                call["id"] = f"tool_{index}"
+
+                            # Earlier calls are complete once a later one starts
+                            for previous in calls:
+                                if previous < index:
+                                    try_dispatch(previous, closed=True)
+                            try_dispatch(index)
+
+                        if choice.get("finish_reason"):
+                            finish_reason = choice["finish_reason"]
+
+            for index in sorted(calls):
+                try_dispatch(index, closed=True)
+
+            content = []
+            message_content = "".join(text_parts)
+            if message_content:
+                content.append({"type": "text", "text": message_content})
+
+            for index in sorted(calls):
+                call = calls[index]
+                content.append({
+                    "type": "tool_use",
+                    "id": call["id"],
+                    "name": call["name"],
+                    "input": json.loads(call["arguments"] or "{}")
+                })
+
+            if not content:
+                content.append({"type": "text", "text": ""})
+
+            stop_reason = STOP_REASON_MAPPING.get(finish_reason, finish_reason)
+            return OpenRouterMessage(content=content, stop_reason=stop_reason)
+
+        except DeadlineExceeded:
+            raise
+        except httpx.TimeoutException as e:
+            raise Exception(f"Request timeout after {timeout}s: {e}")
+        except httpx.ConnectError as e:
+            raise Exception(f"Connection error: {e}")
+        except httpx.HTTPStatusError as e:
+            error_text = ""
+            try:
+                error_text = e.response.text
+            except:
+                pass
+            raise Exception(f"HTTP error {e.response.status_code}: {error_text}")
+        except json.JSONDecodeError as e:
+            raise Exception(f"JSON decode error: {e}")
+        except Exception as e:
+            raise Exception(f"OpenRouter API error: {e}")
+
+    def _build_request_body(
+        self,
+        messages: List[Dict],
+        system: Optional[str] = None,
+        temperature: float = 0.4,
+        stop_sequences: List[str] = None,
+        tools: Optional[Union[List[Dict], ToolPayload]] = None,
+        max_tokens: int = 500,
+        stream: bool = False
+    ) -> bytes:
+        """
+        Builds the JSON body of a chat completion request.
+        A ToolPayload is spliced in pre-encoded instead of being converted again.
+        """
+        # Convert messages to OpenRouter format
+        openrouter_messages = self._convert_messages_to_openrouter_format(messages)
+        
+        # Add system message if present
+        if system:
+            openrouter_messages.insert(0, {
+                "role": "system",
+                "content": system
+            })
+        
+        # Prepare payload for OpenRouter
+        payload = {
+            "model": self.model,
+            "messages": openrouter_messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        
+        # Add stop sequences if supported
+        if stop_sequences:
+            payload["stop"] = stop_sequences
+
+        if stream:
+            payload["stream"] = True
+        
+        if isinstance(tools, ToolPayload) and tools:
+            encoded = json.dumps(payload)
+            return f'{encoded[:-1]}, "tools": {tools.encoded}}}'.encode("utf-8")
+
+        # Add tools if supported (function calling)
+        if tools:
+            payload["tools"] = self._convert_tools_to_openrouter_format(tools)
+
+        return json.dumps(payload).encode("utf-8")
+
+    @staticmethod
+    def _convert_tools_to_openrouter_format(tools: List[Dict]) -> List[Dict]:
         """Converts tools from Claude format to OpenRouter format"""
         openrouter_tools = []
         
@@ -0,0 +1,83 @@
+import os
+import json
+import time
+import hashlib
+import httpx
+from contextlib import contextmanager
+from typing import List, Tuple, Optional
+from colorama import Fore, init
+
+init(autoreset=True)
+
+CHECK_CACHE_PATH = os.path.join(".mcp_cache", "openrouter_check.json")
+
+
+def fast_start_enabled(argv: List[str]) -> bool:
+    """True with --fast on the command line or FAST_START=1"""
+    return "--fast" in argv or os.getenv("FAST_START", "").lower() in ("1", "true", "yes")
+
+
+class StartupTimer:
+    """Records the duration of each startup phase"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self):
+        total = time.perf_counter() - self.started_at
+        print(f"{Fore.CYAN}Startup time: {total:.2f}s")
+        for name, seconds in self.phases:
+            print(f"{Fore.CYAN}  {name:<24}{seconds:>7.2f}s")
+
+
+def _cache_key(api_key: str, model: str) -> str:
+    return hashlib.sha256(f"{api_key}\n{model}".encode("utf-8")).hexdigest()[:16]
+
+
+async def check_openrouter(client, ttl: Optional[float] = None, timeout: float = 5.0) -> bool:
+    """
+    Checks the OpenRouter key with GET /auth/key, which does not run a
+    completion. A successful check is cached on disk for
+    STARTUP_CHECK_TTL seconds (default 1 hour).
+    """
+    if ttl is None:
+        ttl = float(os.getenv("STARTUP_CHECK_TTL", "3600"))
+    key = _cache_key(client.api_key, client.model)
+
+    try:
+        with open(CHECK_CACHE_PATH, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("key") == key and time.time() - cached.get("checked_at", 0) < ttl:
+            print(f"{Fore.GREEN}✓ OpenRouter: key verified (cached)")
+            return True
+    except (OSError, ValueError):
+        pass
+
+    try:
+        async with httpx.AsyncClient(timeout=timeout) as http:
+            response = await http.get(
+                f"{client.base_url}/auth/key",
+                headers={"Authorization": f"Bearer {client.api_key}"}
+            )
+            response.raise_for_status()
+    except Exception as e:
+        print(f"{Fore.RED}✗ OpenRouter: key check failed - {str(e) or type(e).__name__}")
+        return False
+
+    print(f"{Fore.GREEN}✓ OpenRouter: key verified")
+    try:
+        os.makedirs(os.path.dirname(CHECK_CACHE_PATH), exist_ok=True)
+        with open(CHECK_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "checked_at": time.time()}, f)
+    except OSError:
+        pass
+    return True
@@ -0,0 +1,143 @@
+import re
+import math
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Dict, Any, Iterable, Tuple
+from core.openrouter import ToolPayload
+
+_STOPWORDS = {
+    "the", "and", "for", "with", "from", "that", "this", "into", "are", "was",
+    "you", "your", "can", "its", "all", "any", "use", "get", "set", "per",
+    "del", "della", "che", "con", "una", "uno", "gli", "le", "il",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text, snake_case and camelCase identifiers into lowercase terms"""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text or "")
+    return [
+        token for token in re.findall(r"[a-z0-9]+", text.lower())
+        if len(token) > 1 and token not in _STOPWORDS
+    ]
+
+
+def _tool_terms(tool: Dict[str, Any]) -> List[str]:
+    """Terms indexed for a tool: name, description and parameter names"""
+    schema = tool.get("input_schema") or {}
+    properties = schema.get("properties") or {}
+    parameter_text = " ".join(
+        f"{name} {spec.get('description', '') if isinstance(spec, dict) else ''}"
+        for name, spec in properties.items()
+    )
+    # The name is repeated to weight it over the free-text description
+    name = tool.get("name", "")
+    return tokenize(f"{name} {name} {tool.get('description', '')} {parameter_text}")
+
+
+class ToolSelector:
+    """
+    Ranks the tools of a catalog against the conversation with BM25 over
+    name, description and parameter names, and returns the top-k subset
+    as a pre-encoded payload
+    """
+
+    # Indexes keyed by payload version, shared by every chat session
+    _indexes: "OrderedDict[str, ToolSelector]" = OrderedDict()
+    _indexes_lock = threading.Lock()
+    _max_indexes = 8
+
+    def __init__(self, payload: ToolPayload, k1: float = 1.5, b: float = 0.75):
+        self.payload = payload
+        self.k1 = k1
+        self.b = b
+
+        self._documents = [Counter(_tool_terms(tool)) for tool in payload.tools]
+        self._lengths = [sum(doc.values()) for doc in self._documents]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+        document_frequency: Counter = Counter()
+        for doc in self._documents:
+            document_frequency.update(doc.keys())
+        total = len(self._documents)
+        self._idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+        self._subsets: Dict[Tuple[str, ...], ToolPayload] = {}
+
+    @classmethod
+    def for_payload(cls, payload: ToolPayload) -> "ToolSelector":
+        """Returns the index of a payload, building it once per catalog version"""
+        with cls._indexes_lock:
+            selector = cls._indexes.get(payload.version)
+            if selector is not None:
+                cls._indexes.move_to_end(payload.version)
+                return selector
+
+        selector = cls(payload)
+        with cls._indexes_lock:
+            cls._indexes[payload.version] = selector
+            while len(cls._indexes) > cls._max_indexes:
+                cls._indexes.popitem(last=False)
+        return selector
+
+    def rank(self, text: str) -> List[Tuple[str, float]]:
+        """Returns (tool name, score) pairs sorted by decreasing relevance"""
+        query_terms = set(tokenize(text))
+        scores = []
+        for name, doc, length in zip(self.payload.names, self._documents, self._lengths):
+            score = 0.0
+            for term in query_terms:
+                frequency = doc.get(term, 0)
+                if not frequency:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * length / (self._avg_length or 1.0))
+                score += self._idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append((name, score))
+
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores
+
+    def select(
+        self,
+        text: str,
+        top_k: int,
+        pinned: Iterable[str] = ()
+    ) -> ToolPayload:
+        """
+        Returns the payload restricted to the top_k matching tools plus the
+        pinned ones. The full payload is returned when nothing matches.
+        """
+        ranked = [name for name, score in self.rank(text) if score > 0][:top_k]
+        if not ranked:
+            return self.payload
+
+        selected = set(ranked) | set(pinned)
+        names = tuple(name for name in self.payload.names if name in selected)
+        if len(names) == len(self.payload.names):
+            return self.payload
+
+        subset = self._subsets.get(names)
+        if subset is None:
+            tools = [tool for tool in self.payload.tools if tool.get("name") in selected]
+            digest = hashlib.sha256("\n".join(names).encode("utf-8")).hexdigest()[:8]
+            subset = ToolPayload.from_tools(tools, version=f"{self.payload.version}:{digest}")
+            if len(self._subsets) >= 64:
+                self._subsets.clear()
+            self._subsets[names] = subset
+        return subset
+
+
+def selection_text(messages: List[Dict[str, Any]], max_messages: int = 3) -> str:
+    """Text of the current user turn and recent context used to rank tools"""
+    parts = []
+    for message in messages[-max_messages:]:
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = " ".join(
+                block.get("text", "") for block in content if isinstance(block, dict)
+            )
+        parts.append(str(content))
+    return "\n".join(parts)
@@ -1,12 +1,79 @@
+import os
+import re
 import json
+import uuid
+import hashlib
 import asyncio
-from typing import Optional, List, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Callable, Awaitable
 from mcp.types import Tool
 from mcp_client import MCPClient
+from core.openrouter import ToolPayload
+from core.deadline import Deadline
 from colorama import Fore, init
 
 init(autoreset=True)
 
+# Name of the local tool the model can call to page through truncated results
+FETCH_TOOL_NAME = "fetch_tool_result"
+
+# Default per-tool budget (characters) for a result sent back to the model
+DEFAULT_RESULT_BUDGET = int(os.getenv("TOOL_RESULT_MAX_CHARS", "6000"))
+
+# Characters of a tool result printed to the terminal
+RESULT_PREVIEW_CHARS = 500
+
+# Upper bound of a tool call that keeps reporting progress
+MAX_TOOL_SECONDS = float(os.getenv("TOOL_MAX_SECONDS", "600"))
+
+# Receives the progress events of running tool calls:
+# {"tool_use_id": str, "tool": str, "progress": float, "total": float | None}
+ProgressHandler = Callable[[Dict[str, Any]], None]
+
+
+def format_progress(progress: float, total: Optional[float]) -> str:
+    """Human readable progress, e.g. "3/10" or "12" when the total is unknown"""
+    if total:
+        return f"{progress:g}/{total:g}"
+    return f"{progress:g}"
+
+
+class ToolResultStore:
+    """
+    Keeps full tool payloads on the router side so that only a bounded
+    preview is fed back into the conversation
+    """
+
+    HANDLE_PATTERN = re.compile(r"\bres_[0-9a-f]{12}\b")
+
+    def __init__(self, max_entries: int = 64):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, content: str) -> str:
+        """Stores a payload and returns its handle"""
+        handle = f"res_{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._entries[handle] = content
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return handle
+
+    def get(self, handle: str) -> Optional[str]:
+        """Returns the stored payload, or None if it was evicted"""
+        with self._lock:
+            content = self._entries.get(handle)
+            if content is not None:
+                self._entries.move_to_end(handle)
+            return content
+
+    def holds_any(self, text: str) -> bool:
+        """Whether text refers to a payload that is still stored"""
+        with self._lock:
+            return any(handle in self._entries for handle in self.HANDLE_PATTERN.findall(text))
+
 
 class ToolManager:
     """
@@ -14,9 +81,37 @@ class ToolManager:
     and focuses on execution robustness
     """
 
+    result_store = ToolResultStore()
+
+    # Tool payloads keyed by the fingerprints of the connected tool lists,
+    # shared by every chat session of the process
+    _payloads: "OrderedDict[tuple, ToolPayload]" = OrderedDict()
+    _payloads_lock = threading.Lock()
+    _max_payloads = 16
+
     @classmethod
-    async def get_all_tools(cls, clients: Dict[str, MCPClient]) -> List[Dict[str, Any]]:
-        """Gets all tools from MCP clients"""
+    def get_fetch_tool(cls) -> Dict[str, Any]:
+        """Schema of the local tool used to page through truncated results"""
+        return {
+            "name": FETCH_TOOL_NAME,
+            "description": (
+                "Read more of a tool result that was truncated. "
+                "Use the handle and offset given in the truncation notice."
+            ),
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "handle": {"type": "string", "description": "Handle of the stored result"},
+                    "offset": {"type": "integer", "description": "Character offset to start reading from"},
+                    "length": {"type": "integer", "description": "Number of characters to read"}
+                },
+                "required": ["handle"]
+            }
+        }
+
+    @classmethod
+    async def get_all_tools(cls, clients: Dict[str, MCPClient], include_fetch: bool = False) -> List[Dict[str, Any]]:
+        """Gets all tools from MCP clients, plus the fetch tool with include_fetch"""
         tools = []
 
         for client_name, client in clients.items():
@@ -38,9 +133,51 @@ class ToolManager:
             except Exception as e:
                 print(f"{Fore.RED}Error getting tools from {client_name}: {e}")
 
+        if include_fetch:
+            tools.append(cls.get_fetch_tool())
+
         print(f"{Fore.CYAN}Total tools available: {len(tools)}")
         return tools
 
+    @classmethod
+    async def get_tool_payload(cls, clients: Dict[str, MCPClient], include_fetch: bool = False) -> ToolPayload:
+        """
+        Returns the tools of all clients as a pre-encoded payload.
+        It is rebuilt only when the tool list of a client changes.
+        The fetch tool is added with include_fetch, once a result was truncated.
+        """
+        key_parts = []
+        for client_name, client in clients.items():
+            try:
+                await asyncio.wait_for(client.list_tools(), timeout=10.0)
+            except Exception as e:
+                print(f"{Fore.RED}Error getting tools from {client_name}: {e}")
+            key_parts.append((client_name, client.tools_fingerprint))
+        key = (tuple(key_parts), include_fetch)
+
+        with cls._payloads_lock:
+            payload = cls._payloads.get(key)
+            if payload is not None:
+                cls._payloads.move_to_end(key)
+                return payload
+
+        # A client whose tools could not be listed is skipped, as in get_all_tools
+        tools = await cls.get_all_tools(
+            {name: client for name, client in clients.items() if client.tools_fingerprint},
+            include_fetch
+        )
+        version = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:16]
+        payload = ToolPayload.from_tools(tools, version=version)
+
+        # Do not pin a payload built while some client was unavailable
+        if all(fingerprint for _, fingerprint in key_parts):
+            with cls._payloads_lock:
+                cls._payloads[key] = payload
+                while len(cls._payloads) > cls._max_payloads:
+                    cls._payloads.popitem(last=False)
+
+        return payload
+
     @classmethod
     async def find_client_for_tool(cls, clients: Dict[str, MCPClient], tool_name: str) -> Optional[MCPClient]:
         """Finds the client that contains the specified tool"""
@@ -57,25 +194,51 @@ class ToolManager:
         print(f"{Fore.RED}Tool '{tool_name}' not found in any client")
         return None
 
+    @classmethod
+    def is_read_only(cls, clients: Dict[str, MCPClient], tool_name: str) -> bool:
+        """Whether the tool declares readOnlyHint, from the cached tool lists (no I/O)"""
+        if tool_name == FETCH_TOOL_NAME:
+            return True
+        for client in clients.values():
+            for tool in client.cached_tools or []:
+                if tool.name == tool_name:
+                    return bool(tool.annotations and tool.annotations.readOnlyHint)
+        return False
+
     @classmethod
     async def execute_single_tool(
         cls,
         client: MCPClient,
         tool_name: str,
         tool_input: Dict[str, Any],
-        timeout_seconds: float = 25.0
+        timeout_seconds: float = 25.0,
+        on_progress: Optional[Callable[[float, Optional[float]], None]] = None,
+        max_seconds: Optional[float] = None
     ) -> Dict[str, Any]:
         """
-        Executes a single tool and returns the result in a standard format
+        Executes a single tool and returns the result in a standard format.
+        timeout_seconds is the time allowed without progress notifications:
+        each notification restarts it, up to max_seconds in total.
         """
+        loop = asyncio.get_running_loop()
+        started = last_activity = loop.time()
         try:
             print(f"{Fore.CYAN}Executing tool '{tool_name}' with timeout {timeout_seconds}s")
             print(f"{Fore.CYAN}Input: {tool_input}")
 
+            async def progress_callback(progress: float, total: Optional[float]):
+                nonlocal last_activity
+                last_activity = loop.time()
+                print(f"{Fore.CYAN}Tool '{tool_name}' progress: {format_progress(progress, total)}")
+                if on_progress:
+                    on_progress(progress, total)
+
             # Execute the tool with timeout
-            result = await asyncio.wait_for(
-                client.call_tool(tool_name, tool_input),
-                timeout=timeout_seconds
+            result = await cls._wait_with_idle_timeout(
+                client.call_tool(tool_name, tool_input, progress_callback),
+                lambda: last_activity,
+                timeout_seconds,
+                max_seconds
             )
 
             # Process the result
@@ -106,8 +269,13 @@ class ToolManager:
 
             success = not is_error
 
+            content = cls.apply_result_budget(tool_name, content)
+
             print(f"{Fore.GREEN}Tool '{tool_name}' executed successfully")
-            print(f"{Fore.GREEN}Result: {content}")
+            preview = content[:RESULT_PREVIEW_CHARS]
+            if len(content) > RESULT_PREVIEW_CHARS:
+                preview += f"... ({len(content)} chars)"
+            print(f"{Fore.GREEN}Result: {preview}")
 
             return {
                 "success": success,
@@ -116,7 +284,10 @@ class ToolManager:
             }
 
         except asyncio.TimeoutError:
-            error_msg = f"Tool '{tool_name}' timed out after {timeout_seconds} seconds"
+            if max_seconds is not None and loop.time() - started >= max_seconds:
+                error_msg = f"Tool '{tool_name}' timed out after {max_seconds:g} seconds"
+            else:
+                error_msg = f"Tool '{tool_name}' timed out after {timeout_seconds} seconds without progress"
             print(f"{Fore.RED}ERROR: {error_msg}")
             return {
                 "success": False,
@@ -133,6 +304,37 @@ class ToolManager:
                 "error": error_msg
             }
 
+    @classmethod
+    async def _wait_with_idle_timeout(
+        cls,
+        call: Awaitable[Any],
+        last_activity: Callable[[], float],
+        idle_seconds: float,
+        max_seconds: Optional[float] = None
+    ) -> Any:
+        """
+        Awaits call until idle_seconds pass since last_activity() or
+        max_seconds since the start, then cancels it and raises TimeoutError
+        """
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(call)
+        started = loop.time()
+        try:
+            while True:
+                expires_at = last_activity() + idle_seconds
+                if max_seconds is not None:
+                    expires_at = min(expires_at, started + max_seconds)
+                remaining = expires_at - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                done, _ = await asyncio.wait({task}, timeout=remaining)
+                if done:
+                    return task.result()
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.wait({task})
+
     @classmethod
     def get_timeout_for_tool(cls, tool_name: str) -> float:
         """Returns an appropriate timeout based on the type of tool"""
@@ -153,42 +355,111 @@ class ToolManager:
             "search": 45.0,
             "analyze": 60.0,
             "generate_interview_questions": 60.0,
+            "generate_interview_questions_batch": 180.0,
         }
 
         return timeout_map.get(tool_name, 25.0)  # Default 25 seconds
 
     @classmethod
-    async def execute_tools_from_response(
-        cls,
-        clients: Dict[str, MCPClient],
-        tool_calls: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
-        """
-        Executes a list of tool calls and returns the results
+    def get_result_budget_for_tool(cls, tool_name: str) -> int:
+        """Returns the maximum number of characters of a result sent back to the model"""
+        budget_map = {
+            # Generated text is the actual answer, allow more of it
+            "generate_interview_questions": 12000,
+            "generate_interview_questions_batch": 24000,
+        }
 
-        Args:
-            clients: Dictionary of MCP clients
-            tool_calls: List of dicts with format {"id": str, "name": str, "input": dict}
+        return budget_map.get(tool_name, DEFAULT_RESULT_BUDGET)
 
-        Returns:
-            List of results in standardized format for OpenRouter
+    @classmethod
+    def apply_result_budget(cls, tool_name: str, content: str) -> str:
         """
-        results = []
+        Truncates a result to the tool budget keeping its head and tail.
+        The full payload is kept in the result store and can be read
+        with the fetch tool.
+        """
+        budget = cls.get_result_budget_for_tool(tool_name)
+        if len(content) <= budget:
+            return content
+
+        handle = cls.result_store.put(content)
+        head_size = budget * 2 // 3
+        tail_size = budget - head_size
+        notice = (
+            f"\n\n[... truncated {len(content) - budget} of {len(content)} characters. "
+            f"Full result stored as handle '{handle}'. "
+            f"Call {FETCH_TOOL_NAME}(handle='{handle}', offset={head_size}) to read more ...]\n\n"
+        )
+
+        print(f"{Fore.YELLOW}Result of '{tool_name}' truncated to {budget} chars (handle {handle})")
+        return content[:head_size] + notice + content[-tail_size:]
 
-        print(f"{Fore.MAGENTA}Executing {len(tool_calls)} tool(s)")
+    @classmethod
+    def fetch_stored_result(cls, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns a page of a stored result, in the execute_single_tool format"""
+        handle = str(tool_input.get("handle", ""))
+        content = cls.result_store.get(handle)
+        if content is None:
+            return {
+                "success": False,
+                "content": "",
+                "error": f"Unknown or expired result handle '{handle}'"
+            }
 
-        for i, tool_call in enumerate(tool_calls):
-            tool_id = tool_call.get("id", f"tool_{i}")
-            tool_name = tool_call.get("name", "unknown")
-            tool_input = tool_call.get("input", {})
+        try:
+            offset = max(0, int(tool_input.get("offset", 0)))
+            length = int(tool_input.get("length", DEFAULT_RESULT_BUDGET))
+        except (TypeError, ValueError):
+            return {
+                "success": False,
+                "content": "",
+                "error": "offset and length must be integers"
+            }
+
+        length = max(1, min(length, DEFAULT_RESULT_BUDGET))
+        end = min(offset + length, len(content))
+        page = content[offset:end]
+
+        if end < len(content):
+            page += f"\n\n[characters {offset}-{end} of {len(content)}; next offset={end}]"
+        else:
+            page += f"\n\n[characters {offset}-{end} of {len(content)}; end of result]"
 
-            print(f"{Fore.YELLOW}Tool {i+1}/{len(tool_calls)}: {tool_name} (ID: {tool_id})")
+        return {"success": True, "content": page, "error": None}
 
+    @classmethod
+    async def execute_tool_call(
+        cls,
+        clients: Dict[str, MCPClient],
+        tool_call: Dict[str, Any],
+        index: int = 0,
+        deadline: Optional[Deadline] = None,
+        on_progress: Optional[ProgressHandler] = None
+    ) -> Dict[str, Any]:
+        """
+        Executes a single tool call and returns its result in the format
+        required by OpenRouter
+
+        Args:
+            clients: Dictionary of MCP clients
+            tool_call: Dict with format {"id": str, "name": str, "input": dict}
+            index: Position of the call in the response, used for the default ID
+            deadline: Request deadline, the tool timeout never exceeds its remaining time
+            on_progress: Receives the progress events of the call
+        """
+        tool_id = tool_call.get("id", f"tool_{index}")
+        tool_name = tool_call.get("name", "unknown")
+        tool_input = tool_call.get("input", {})
+
+        # Paging through stored results is handled locally
+        if tool_name == FETCH_TOOL_NAME:
+            execution_result = cls.fetch_stored_result(tool_input)
+        else:
             # Find the appropriate client
             client = await cls.find_client_for_tool(clients, tool_name)
 
             if not client:
-                result = {
+                return {
                     "tool_use_id": tool_id,
                     "type": "tool_result",
                     "content": json.dumps({
@@ -197,27 +468,66 @@ class ToolManager:
                     }),
                     "is_error": True
                 }
-                results.append(result)
-                continue
 
             # Execute the tool
             timeout = cls.get_timeout_for_tool(tool_name)
+            max_seconds = MAX_TOOL_SECONDS
+            if deadline:
+                timeout = deadline.clamp(timeout)
+                max_seconds = deadline.clamp(max_seconds)
+
+            def forward_progress(progress: float, total: Optional[float]):
+                if on_progress:
+                    on_progress({
+                        "tool_use_id": tool_id,
+                        "tool": tool_name,
+                        "progress": progress,
+                        "total": total,
+                    })
+
             execution_result = await cls.execute_single_tool(
-                client, tool_name, tool_input, timeout
+                client, tool_name, tool_input, timeout, forward_progress, max_seconds
             )
 
-            # Convert to the format required by OpenRouter
-            result = {
-                "tool_use_id": tool_id,
-                "type": "tool_result",
-                "content": execution_result["content"] if execution_result["success"] else json.dumps({
-                    "error": execution_result["error"],
-                    "tool_name": tool_name
-                }),
-                "is_error": not execution_result["success"]
-            }
+        # Convert to the format required by OpenRouter
+        return {
+            "tool_use_id": tool_id,
+            "type": "tool_result",
+            "content": execution_result["content"] if execution_result["success"] else json.dumps({
+                "error": execution_result["error"],
+                "tool_name": tool_name
+            }),
+            "is_error": not execution_result["success"]
+        }
+
+    @classmethod
+    async def execute_tools_from_response(
+        cls,
+        clients: Dict[str, MCPClient],
+        tool_calls: List[Dict[str, Any]],
+        deadline: Optional[Deadline] = None,
+        on_progress: Optional[ProgressHandler] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Executes a list of tool calls and returns the results
+
+        Args:
+            clients: Dictionary of MCP clients
+            tool_calls: List of dicts with format {"id": str, "name": str, "input": dict}
+            deadline: Request deadline shared by all the calls
+            on_progress: Receives the progress events of the calls
+
+        Returns:
+            List of results in standardized format for OpenRouter
+        """
+        results = []
+
+        print(f"{Fore.MAGENTA}Executing {len(tool_calls)} tool(s)")
+
+        for i, tool_call in enumerate(tool_calls):
+            print(f"{Fore.YELLOW}Tool {i+1}/{len(tool_calls)}: {tool_call.get('name', 'unknown')} (ID: {tool_call.get('id', f'tool_{i}')})")
 
-            results.append(result)
+            results.append(await cls.execute_tool_call(clients, tool_call, i, deadline, on_progress))
 
             # Small pause between tools to avoid overload
             if i < len(tool_calls) - 1:
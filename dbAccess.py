@@ -1,7 +1,27 @@
 import os
+import time
+import uuid
+import logging
+import weakref
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from typing import Callable, Optional, Iterator
 from dotenv import load_dotenv
-import psycopg2
-from psycopg2.extras import RealDictCursor
+
+# Read once: connection settings do not change while the process runs
+load_dotenv()
+
+from dbCache import profile_cache, MISS
+from dbQuery import (
+    DatabaseUnavailableError,
+    QueryError,
+    query_metrics,
+    statement_name,
+    to_positional,
+)
+
+logger = logging.getLogger(__name__)
 
 class Candidate:
     id: str
@@ -14,77 +34,383 @@ class Candidate:
 def get_candidate_data(candidate_id: str):
     "take from db the cv_filename of the candidate then call the api to get the semantic profile of the cv"
     query = "SELECT name, surname FROM candidate_applications_view WHERE candidate_id = %s"
-    try:
-        result = execute_query(query, (candidate_id,))
-    except Exception as e:
-       print(f"Error fetching candidate skills data: {e}")
-       return {}
+    result = profile_cache.get("candidate_id", candidate_id)
+    if result is not MISS:
+        return result
+    result = execute_query(query, (candidate_id,), prepare=True)
+    profile_cache.put("candidate_id", candidate_id, result)
     return result
 
 def get_job_requirements(job_id: str):
     "take from db the job description"
     query = "SELECT jobdescription FROM candidate_applications_view WHERE job_id = %s"
-    try:
-        result = execute_query(query, (job_id,))
-    except Exception as e:
-       print(f"Error fetching job requirements: {e}")
-       return {}
+    result = profile_cache.get("job_id", job_id)
+    if result is not MISS:
+        return result
+    result = execute_query(query, (job_id,), prepare=True)
+    profile_cache.put("job_id", job_id, result)
     return result
 
 def get_user_data_by_email(email: str) -> dict:
     "get user data from db by email"
     query = "SELECT name, surname, semantic_profile, jobdescription FROM candidate_applications_view WHERE email = %s"
-    try:
-        result = execute_query(query, (email,))
-    except Exception as e:
-        print(f"Error fetching user data: {e}")
-        return {}
+    result = profile_cache.get("email", email)
+    if result is not MISS:
+        return result
+    result = execute_query(query, (email,), prepare=True)
+    profile_cache.put("email", email, result)
     return result
 
-def get_db_connection():
-    """
-    Restituisce una connessione al DB, automaticamente usando host corretto
-    a seconda che il codice giri in Docker o in locale.
-    """
-    load_dotenv()
+def _connection_params() -> dict:
     if os.getenv("DOCKER", "0") == "1":
-        print("Connecting to DB in Docker mode")
-        return psycopg2.connect(
-            dbname=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASS"),
-            host=os.getenv("DB_HOST_DOCKER"),
-            port=os.getenv("DB_PORT")
-        )
-    return psycopg2.connect(
+        host = os.getenv("DB_HOST_DOCKER")
+    else:
+        host = os.getenv("DB_HOST")
+    return dict(
         dbname=os.getenv("DB_NAME"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASS"),
-        host=os.getenv("DB_HOST"),
+        host=host,
         port=os.getenv("DB_PORT")
     )
 
-def execute_query(query: str, params: tuple = ()):
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+
+def get_db_connection():
+    """
+    Restituisce una connessione al DB, automaticamente usando host corretto
+    a seconda che il codice giri in Docker o in locale.
+    """
+    # psycopg2 is loaded on first use, not when the MCP server starts
+    import psycopg2
+
+    if os.getenv("DOCKER", "0") == "1":
+        logger.info("Connecting to DB in Docker mode")
+    return psycopg2.connect(**_connection_params())
+
+
+@dataclass
+class PoolStats:
+    """Counters of the connection pool"""
+    size: int = 0
+    in_use: int = 0
+    checkouts: int = 0
+    wait_time_total: float = 0.0
+    wait_time_max: float = 0.0
+    discarded: int = 0
+
+    @property
+    def wait_time_avg(self) -> float:
+        return self.wait_time_total / self.checkouts if self.checkouts else 0.0
+
+
+@dataclass
+class _ConnectionState:
+    """What the pool knows about one of its connections"""
+    last_used: Optional[float] = None
+    # Names of the statements prepared on the connection
+    prepared: set = field(default_factory=set)
+
+
+class ConnectionPool:
+    """
+    Process-wide psycopg2 connection pool.
+
+    Sized by DB_POOL_MIN/DB_POOL_MAX: DB_POOL_MIN connections are opened
+    upfront, more are opened on demand and then kept idle, up to
+    DB_POOL_MAX in total. Checkout waits up to DB_POOL_TIMEOUT seconds for
+    a free connection. Connections idle for more than
+    DB_POOL_VALIDATE_AFTER seconds are checked with SELECT 1 before use,
+    and broken connections are discarded instead of returned.
+    """
+
+    _instance: Optional["ConnectionPool"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float, validate_after: float,
+                 connect: Optional[Callable] = None):
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.validate_after = validate_after
+        self._connect = connect or get_db_connection
+        # Idle connections, the most recently returned last
+        self._idle: list = []
+        # Keyed by the connection itself, so the state goes away with it
+        self._state: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        # Every open connection is idle or holds a slot, so at most maxconn are open
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self.stats = PoolStats()
+        for _ in range(minconn):
+            self._idle.append(self._open())
+
+    @classmethod
+    def instance(cls) -> "ConnectionPool":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(
+                    minconn=int(os.getenv("DB_POOL_MIN", "1")),
+                    maxconn=int(os.getenv("DB_POOL_MAX", "10")),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+                    validate_after=float(os.getenv("DB_POOL_VALIDATE_AFTER", "30")),
+                )
+            return cls._instance
+
+    def _open(self):
+        conn = self._connect()
+        with self._lock:
+            self._state[conn] = _ConnectionState()
+            self.stats.size += 1
+        return conn
+
+    def _is_usable(self, conn) -> bool:
+        import psycopg2
+        from psycopg2 import extensions
+
+        if conn.closed or conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        with self._lock:
+            state = self._state.get(conn)
+        # New connections and recently used ones are not re-checked
+        if state is None or state.last_used is None or time.monotonic() - state.last_used < self.validate_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        with self._lock:
+            self._state.pop(conn, None)
+            self.stats.discarded += 1
+            self.stats.size -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def getconn(self):
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No database connection available after {self.timeout}s")
+        waited = time.perf_counter() - start
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    conn = self._open()
+                    break
+                if self._is_usable(conn):
+                    break
+                logger.warning("Discarding broken database connection")
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.stats.checkouts += 1
+            self.stats.in_use += 1
+            self.stats.wait_time_total += waited
+            self.stats.wait_time_max = max(self.stats.wait_time_max, waited)
+        return conn
+
+    def putconn(self, conn, broken: bool = False):
+        from psycopg2 import extensions
+
+        try:
+            if broken or conn.closed:
+                self._discard(conn)
+            else:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                with self._lock:
+                    self._state[conn].last_used = time.monotonic()
+                    self._idle.append(conn)
+        except Exception:
+            self._discard(conn)
+        finally:
+            with self._lock:
+                self.stats.in_use -= 1
+            self._slots.release()
+
+    def prepared_statements(self, conn) -> set:
+        """Statements prepared on a connection checked out by the caller"""
+        with self._lock:
+            return self._state[conn].prepared
+
+    @contextmanager
+    def connection(self):
+        """Checks out a connection, returning it (or discarding it if broken) on exit"""
+        import psycopg2
+
+        conn = self.getconn()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.putconn(conn, broken=broken)
+
+    def close(self):
+        """Closes the idle connections; checked out ones are closed when returned broken"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            for conn in idle:
+                self._state.pop(conn, None)
+            self.stats.size -= len(idle)
+        for conn in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def get_pool_stats() -> dict:
+    """Size, usage and wait-time metrics of the connection pool"""
+    if ConnectionPool._instance is None:
+        return asdict(PoolStats())
+    stats = ConnectionPool._instance.stats
+    return {**asdict(stats), "wait_time_avg": stats.wait_time_avg}
+
+
+def _execute(cur, prepared: set, query: str, params: tuple, prepare: bool):
+    """
+    Runs the query, through a server-side prepared statement when prepare
+    is set. A statement missing on the server (deallocated, or a pooler
+    switched backend) is prepared again and executed once more.
+    """
+    from psycopg2 import errors
+
+    if not prepare:
         cur.execute(query, params)
+        return
 
-        if query.strip().lower().startswith("select"):
-            result = cur.fetchone()
-        else:
-            conn.commit()
-            result = cur.rowcount
+    name = statement_name(query)
+    if name not in prepared:
+        cur.execute(f"PREPARE {name} AS {to_positional(query)}")
+        prepared.add(name)
+    try:
+        _execute_prepared(cur, name, params)
+    except errors.InvalidSqlStatementName:
+        # The failed EXECUTE aborted the transaction, which held only this statement
+        cur.connection.rollback()
+        # Only this statement is gone: the others are still prepared on the server
+        prepared.discard(name)
+        cur.execute(f"PREPARE {name} AS {to_positional(query)}")
+        prepared.add(name)
+        _execute_prepared(cur, name, params)
 
-        cur.close()
-        conn.close()
-        return result
-    except Exception as e:
-        print(f"Errore: {e}")
-        return None
 
-    
-    
+def _execute_prepared(cur, name: str, params: tuple):
+    if params:
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+    else:
+        cur.execute(f"EXECUTE {name}")
+
+
+def _reset_prepared(pool: "ConnectionPool", conn):
+    """Forgets the statements of a connection after a failed statement"""
+    import psycopg2
+
+    pool.prepared_statements(conn).clear()
+    try:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute("DEALLOCATE ALL")
+        conn.commit()
+    except psycopg2.Error:
+        pass
+
+
+def execute_query(query: str, params: tuple = (), fetch_all: bool = False, prepare: bool = False):
+    """
+    Runs a statement on a pooled connection and returns the first row of
+    a SELECT (all rows with fetch_all) or the row count otherwise.
+
+    With prepare, the statement is prepared once per connection, so
+    repeated lookups skip parsing and planning. Raises
+    DatabaseUnavailableError or QueryError.
+    """
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+
+    is_select = query.strip().lower().startswith("select")
+    # A read that fails on a broken connection is retried once on a fresh one
+    attempts = 2 if is_select else 1
+    for attempt in range(attempts):
+        try:
+            pool = ConnectionPool.instance()
+            with pool.connection() as conn:
+                start = time.perf_counter()
+                try:
+                    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                        _execute(cur, pool.prepared_statements(conn), query, params, prepare)
+                        if not is_select:
+                            result = rows = cur.rowcount
+                        elif fetch_all:
+                            result = cur.fetchall()
+                            rows = len(result)
+                        else:
+                            result = cur.fetchone()
+                            rows = 1 if result else 0
+                    conn.commit()
+                except psycopg2.DatabaseError as e:
+                    if prepare and not isinstance(e, psycopg2.OperationalError):
+                        _reset_prepared(pool, conn)
+                    raise
+                query_metrics.record(query, time.perf_counter() - start, rows)
+                return result
+        except (psycopg2.OperationalError, psycopg2.InterfaceError, TimeoutError) as e:
+            if attempt < attempts - 1:
+                logger.warning("Database connection lost, retrying: %s", e)
+                continue
+            raise DatabaseUnavailableError(str(e), query) from e
+        except psycopg2.Error as e:
+            raise QueryError(str(e), query) from e
+
+
+def iter_query(query: str, params: tuple = (), itersize: Optional[int] = None) -> Iterator[dict]:
+    """
+    Yields the rows of a SELECT through a named (server-side) cursor, so
+    the result set is never held in memory: rows are fetched itersize at
+    a time (DB_ITERSIZE, default 500). The pooled connection is held until
+    the generator is exhausted or closed.
+    """
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+
+    try:
+        pool = ConnectionPool.instance()
+        with pool.connection() as conn:
+            start = time.perf_counter()
+            rows = 0
+            try:
+                with conn.cursor(name=f"stream_{uuid.uuid4().hex[:12]}", cursor_factory=RealDictCursor) as cur:
+                    cur.itersize = itersize or int(os.getenv("DB_ITERSIZE", "500"))
+                    cur.execute(query, params)
+                    for row in cur:
+                        rows += 1
+                        yield row
+                conn.commit()
+            finally:
+                query_metrics.record(query, time.perf_counter() - start, rows)
+    except (psycopg2.OperationalError, psycopg2.InterfaceError, TimeoutError) as e:
+        raise DatabaseUnavailableError(str(e), query) from e
+    except psycopg2.Error as e:
+        raise QueryError(str(e), query) from e
+
+
+def iter_candidates_for_job(job_id: str, itersize: Optional[int] = None) -> Iterator[dict]:
+    "stream the candidates that applied to a job, ordered by email"
+    query = "SELECT email, name, surname FROM candidate_applications_view WHERE job_id = %s ORDER BY email"
+    return iter_query(query, (job_id,), itersize=itersize)
+
 
 # def updateDatabaseData():
 #     """this function connects to a api and updates the database"""
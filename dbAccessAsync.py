@@ -0,0 +1,304 @@
+"""
+Async counterpart of dbAccess, used by the MCP server tools so that a
+database round-trip does not block the server's event loop.
+
+Queries run on a psycopg 3 AsyncConnectionPool (pip install
+"psycopg[binary,pool]"). Without psycopg 3 the sync dbAccess functions
+run in a worker thread instead. Scripts keep using dbAccess directly.
+
+The candidate/job getters go through the storage backend selected by
+DB_BACKEND (see dbBackends); the Postgres backend runs its queries through
+execute_query and get_pool, defined below.
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+import itertools
+from contextlib import asynccontextmanager
+from typing import Optional, AsyncIterator
+import anyio
+import dbAccess
+from dbBackends import get_backend
+from dbCache import profile_cache, MISS
+from dbQuery import DatabaseUnavailableError, QueryError, query_metrics
+
+# Never print: on the stdio transport stdout is the JSON-RPC channel
+logger = logging.getLogger(__name__)
+
+# One pool per event loop: async connections cannot be shared across loops.
+# The pool's tasks keep their loop alive, so entries are removed explicitly
+# by close_pool (see pool_scope), or when the loop is found closed
+_pools: "dict[asyncio.AbstractEventLoop, object]" = {}
+_pool_locks: "dict[asyncio.AbstractEventLoop, asyncio.Lock]" = {}
+# Open pool_scope blocks of each loop
+_pool_users: "dict[asyncio.AbstractEventLoop, int]" = {}
+# Task receiving cache invalidations, started with the first pool
+_listener: Optional[asyncio.Task] = None
+
+
+def psycopg3_available() -> bool:
+    try:
+        import psycopg_pool  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+async def get_pool():
+    """Returns the connection pool of the running event loop, opening it on first use"""
+    from psycopg.conninfo import make_conninfo
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is not None:
+        return pool
+    _forget_closed_loops()
+
+    lock = _pool_locks.setdefault(loop, asyncio.Lock())
+    async with lock:
+        pool = _pools.get(loop)
+        if pool is None:
+            params = {key: value for key, value in dbAccess._connection_params().items() if value}
+            pool = AsyncConnectionPool(
+                make_conninfo(**params),
+                min_size=int(os.getenv("DB_POOL_MIN", "1")),
+                max_size=int(os.getenv("DB_POOL_MAX", "10")),
+                timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+                kwargs={"row_factory": dict_row},
+                check=AsyncConnectionPool.check_connection,
+                open=False,
+            )
+            await pool.open()
+            _pools[loop] = pool
+
+            channel = os.getenv("PROFILE_CACHE_NOTIFY_CHANNEL")
+            if channel and profile_cache.enabled and not _listener_running():
+                _start_listener(channel, make_conninfo(**params))
+    return pool
+
+
+def _forget_closed_loops():
+    """Drops the pools of loops that ended without close_pool"""
+    for loop in [loop for loop in _pools if loop.is_closed()]:
+        # Their connections are closed when garbage collected
+        del _pools[loop]
+    for registry in (_pool_locks, _pool_users):
+        for loop in [loop for loop in registry if loop.is_closed()]:
+            del registry[loop]
+
+
+def _listener_running() -> bool:
+    return _listener is not None and not _listener.done() and not _listener.get_loop().is_closed()
+
+
+def _start_listener(channel: str, conninfo: str):
+    global _listener
+    _listener = asyncio.create_task(_listen_for_invalidations(channel, conninfo))
+
+
+async def _listen_for_invalidations(channel: str, conninfo: str):
+    """LISTENs on channel and invalidates the profile cache, reconnecting on errors"""
+    import psycopg
+    from psycopg import sql
+
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+                # Changes made while not listening were missed
+                profile_cache.clear()
+                logger.info("Listening for profile changes on '%s'", channel)
+                async for notify in conn.notifies():
+                    profile_cache.handle_notification(notify.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Profile cache listener error: %s", e)
+        await asyncio.sleep(5)
+
+
+async def close_pool():
+    """Closes the pool (and the listener) of the running event loop"""
+    global _listener
+    loop = asyncio.get_running_loop()
+    if _listener is not None and _listener.get_loop() is loop:
+        _listener.cancel()
+        _listener = None
+    _pool_locks.pop(loop, None)
+    pool = _pools.pop(loop, None)
+    if pool is not None:
+        await pool.close()
+
+
+@asynccontextmanager
+async def pool_scope():
+    """
+    Closes the pool of the running loop when the last scope open on the
+    loop exits. The MCP server enters one per session, so the pool of an
+    in-process server (a loop per client) goes away with its client,
+    while the sessions of an HTTP server share one pool.
+    """
+    loop = asyncio.get_running_loop()
+    _pool_users[loop] = _pool_users.get(loop, 0) + 1
+    try:
+        yield
+    finally:
+        _pool_users[loop] -= 1
+        if not _pool_users[loop]:
+            del _pool_users[loop]
+            # The session may be exiting because it was cancelled
+            with anyio.CancelScope(shield=True):
+                await close_pool()
+
+
+async def execute_query(query: str, params: tuple = (), fetch_all: bool = False, prepare: bool = False):
+    """
+    Async execute_query: first row of a SELECT (all rows with fetch_all),
+    row count otherwise. With prepare, psycopg prepares the statement on
+    first use on each connection. Raises DatabaseUnavailableError or
+    QueryError.
+    """
+    if not psycopg3_available():
+        return await asyncio.to_thread(dbAccess.execute_query, query, params, fetch_all, prepare)
+
+    import psycopg
+
+    try:
+        pool = await get_pool()
+        async with pool.connection() as conn:
+            start = time.perf_counter()
+            async with conn.cursor() as cur:
+                await cur.execute(query, params, prepare=prepare or None)
+                if not query.strip().lower().startswith("select"):
+                    result = rows = cur.rowcount
+                elif fetch_all:
+                    result = await cur.fetchall()
+                    rows = len(result)
+                else:
+                    result = await cur.fetchone()
+                    rows = 1 if result else 0
+            query_metrics.record(query, time.perf_counter() - start, rows)
+            return result
+    except psycopg.OperationalError as e:
+        raise DatabaseUnavailableError(str(e), query) from e
+    except psycopg.Error as e:
+        raise QueryError(str(e), query) from e
+
+
+async def iter_query(query: str, params: tuple = (), itersize: Optional[int] = None) -> AsyncIterator[dict]:
+    """
+    Async iter_query: yields the rows of a SELECT through a server-side
+    cursor, itersize rows (DB_ITERSIZE, default 500) per round-trip.
+    Without psycopg 3 the sync iter_query is read in a worker thread,
+    itersize rows at a time.
+    """
+    if not psycopg3_available():
+        itersize = itersize or int(os.getenv("DB_ITERSIZE", "500"))
+        rows = dbAccess.iter_query(query, params, itersize)
+        try:
+            while batch := await asyncio.to_thread(lambda: list(itertools.islice(rows, itersize))):
+                for row in batch:
+                    yield row
+        finally:
+            # Releases the pooled connection when the caller stops early
+            await asyncio.to_thread(rows.close)
+        return
+
+    import psycopg
+
+    try:
+        pool = await get_pool()
+        async with pool.connection() as conn:
+            start = time.perf_counter()
+            count = 0
+            try:
+                async with conn.cursor(name=f"stream_{uuid.uuid4().hex[:12]}") as cur:
+                    cur.itersize = itersize or int(os.getenv("DB_ITERSIZE", "500"))
+                    await cur.execute(query, params)
+                    async for row in cur:
+                        count += 1
+                        yield row
+            finally:
+                query_metrics.record(query, time.perf_counter() - start, count)
+    except psycopg.OperationalError as e:
+        raise DatabaseUnavailableError(str(e), query) from e
+    except psycopg.Error as e:
+        raise QueryError(str(e), query) from e
+
+
+async def get_candidate_data(candidate_id: str) -> Optional[dict]:
+    "take from db the name and surname of the candidate"
+    result = profile_cache.get("candidate_id", candidate_id)
+    if result is not MISS:
+        return result
+    result = await get_backend().get_candidate(candidate_id)
+    profile_cache.put("candidate_id", candidate_id, result)
+    return result
+
+
+async def get_job_requirements(job_id: str) -> Optional[dict]:
+    "take from db the job description"
+    result = profile_cache.get("job_id", job_id)
+    if result is not MISS:
+        return result
+    result = await get_backend().get_job(job_id)
+    profile_cache.put("job_id", job_id, result)
+    return result
+
+
+async def get_user_data_by_email(email: str) -> Optional[dict]:
+    "get user data from db by email"
+    result = profile_cache.get("email", email)
+    if result is not MISS:
+        return result
+    result = await get_backend().get_user_by_email(email)
+    profile_cache.put("email", email, result)
+    return result
+
+
+def _cache_users(rows: list[dict]) -> dict[str, dict]:
+    """Rows of several candidates by email, stored in the cache one by one"""
+    users = {}
+    for row in rows:
+        # A candidate can have several applications: the first one is kept, as in the single lookup
+        email = row.get("email")
+        if email and email not in users:
+            users[email] = row
+            profile_cache.put("email", email, row)
+    return users
+
+
+async def get_users_data_by_emails(emails: list[str]) -> dict[str, dict]:
+    """
+    User data of several candidates by email, fetched in one query.
+    Candidates not found are missing from the result.
+    """
+    rows = {}
+    missing = []
+    for email in dict.fromkeys(emails):
+        cached = profile_cache.get("email", email)
+        if cached is MISS:
+            missing.append(email)
+        else:
+            rows[email] = cached
+
+    if missing:
+        rows.update(_cache_users(await get_backend().get_users_by_emails(missing)))
+    return rows
+
+
+async def get_users_data_by_job(job_id: str) -> dict[str, dict]:
+    """User data of all the candidates of a job, by email"""
+    return _cache_users(await get_backend().get_users_by_job(job_id))
+
+
+async def get_candidates_page(job_id: str, after_email: Optional[str] = None, limit: int = 50) -> list[dict]:
+    """
+    One page of the candidates of a job, ordered by email. Keyset
+    pagination: the next page starts after the last email of this one.
+    """
+    return await get_backend().get_candidates_page(job_id, after_email, limit)
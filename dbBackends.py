@@ -0,0 +1,402 @@
+"""
+Storage backends of the candidate/job queries used by the MCP server.
+
+DB_BACKEND selects the implementation:
+- "postgres" (default): the application database, through dbAccessAsync.
+  DB_CANDIDATES_TABLE names the table or view (candidate_applications_view).
+- "sqlite": a local file at DB_SQLITE_PATH (candidates.sqlite3), for load
+  tests on a laptop or in CI.
+- "memory": rows held in the process. DB_MEMORY_CANDIDATES=N fills it with
+  N synthetic candidates on first use.
+
+Every backend returns the rows of candidate_applications_view: one row per
+application with candidate_id, job_id, email, name, surname,
+semantic_profile and jobdescription.
+"""
+import os
+import re
+import time
+import random
+import asyncio
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional
+from dbQuery import DatabaseUnavailableError, QueryError, query_metrics
+
+COLUMNS = ("candidate_id", "job_id", "email", "name", "surname", "semantic_profile", "jobdescription")
+
+
+class StorageBackend(ABC):
+    """Queries of the candidate applications, implemented by every backend"""
+
+    name = "base"
+
+    @abstractmethod
+    async def get_candidate(self, candidate_id: str) -> Optional[dict]:
+        """name and surname of a candidate"""
+
+    @abstractmethod
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        """jobdescription of a job"""
+
+    @abstractmethod
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        """name, surname, semantic_profile and jobdescription of a candidate"""
+
+    @abstractmethod
+    async def get_users_by_emails(self, emails: List[str]) -> List[dict]:
+        """Rows (with email) of several candidates"""
+
+    @abstractmethod
+    async def get_users_by_job(self, job_id: str) -> List[dict]:
+        """Rows (with email) of the candidates of a job"""
+
+    @abstractmethod
+    async def get_candidates_page(self, job_id: str, after_email: Optional[str], limit: int) -> List[dict]:
+        """email, name and surname of the candidates of a job after after_email, ordered by email"""
+
+    @abstractmethod
+    async def load(self, rows: Iterable[dict], batch_size: int = 10000) -> int:
+        """Inserts application rows, returns how many were inserted"""
+
+    async def close(self):
+        pass
+
+
+class PostgresBackend(StorageBackend):
+    name = "postgres"
+
+    def __init__(self, table: str = "candidate_applications_view"):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?", table):
+            raise ValueError(f"Invalid table name: {table}")
+        self.table = table
+
+    async def get_candidate(self, candidate_id: str) -> Optional[dict]:
+        from dbAccessAsync import execute_query
+
+        query = f"SELECT name, surname FROM {self.table} WHERE candidate_id = %s"
+        return await execute_query(query, (candidate_id,), prepare=True)
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        from dbAccessAsync import execute_query
+
+        query = f"SELECT jobdescription FROM {self.table} WHERE job_id = %s"
+        return await execute_query(query, (job_id,), prepare=True)
+
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        from dbAccessAsync import execute_query
+
+        query = f"SELECT name, surname, semantic_profile, jobdescription FROM {self.table} WHERE email = %s"
+        return await execute_query(query, (email,), prepare=True)
+
+    async def get_users_by_emails(self, emails: List[str]) -> List[dict]:
+        from dbAccessAsync import execute_query
+
+        query = f"SELECT email, name, surname, semantic_profile, jobdescription FROM {self.table} WHERE email = ANY(%s)"
+        return await execute_query(query, (emails,), fetch_all=True, prepare=True)
+
+    async def get_users_by_job(self, job_id: str) -> List[dict]:
+        from dbAccessAsync import execute_query
+
+        query = f"SELECT email, name, surname, semantic_profile, jobdescription FROM {self.table} WHERE job_id = %s"
+        return await execute_query(query, (job_id,), fetch_all=True, prepare=True)
+
+    async def get_candidates_page(self, job_id: str, after_email: Optional[str], limit: int) -> List[dict]:
+        from dbAccessAsync import execute_query
+
+        # A keyset page is small and bounded: one round-trip, no server-side cursor
+        query = (
+            f"SELECT email, name, surname FROM {self.table} "
+            "WHERE job_id = %s AND email > %s ORDER BY email LIMIT %s"
+        )
+        return await execute_query(query, (job_id, after_email or "", limit), fetch_all=True, prepare=True)
+
+    async def load(self, rows: Iterable[dict], batch_size: int = 10000) -> int:
+        """COPYs the rows into the table, created if missing (needs psycopg 3)"""
+        from dbAccessAsync import get_pool, execute_query
+
+        await execute_query(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            + ", ".join(f"{column} TEXT" for column in COLUMNS) + ")"
+        )
+        pool = await get_pool()
+        count = 0
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                async with cur.copy(f"COPY {self.table} ({', '.join(COLUMNS)}) FROM STDIN") as copy:
+                    for row in rows:
+                        await copy.write_row([row[column] for column in COLUMNS])
+                        count += 1
+        for columns in ("email", "job_id, email", "candidate_id"):
+            index = f"{self.table.split('.')[-1]}_{columns.replace(', ', '_')}_idx"
+            await execute_query(f"CREATE INDEX IF NOT EXISTS {index} ON {self.table} ({columns})")
+        return count
+
+    async def close(self):
+        from dbAccessAsync import close_pool
+
+        await close_pool()
+
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        # sqlite3 connections belong to the thread that opened them
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+            except sqlite3.Error as e:
+                raise DatabaseUnavailableError(str(e)) from e
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS candidate_applications ("
+                + ", ".join(f"{column} TEXT" for column in COLUMNS) + ")"
+            )
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _query(self, query: str, params: tuple = (), fetch_all: bool = True):
+        conn = self._connect()
+        start = time.perf_counter()
+        try:
+            cur = conn.execute(query, params)
+            result = [dict(row) for row in cur.fetchall()] if fetch_all else cur.fetchone()
+        except sqlite3.Error as e:
+            raise QueryError(str(e), query) from e
+        if fetch_all:
+            rows = len(result)
+        else:
+            rows = 1 if result else 0
+            result = dict(result) if result else None
+        query_metrics.record(query, time.perf_counter() - start, rows)
+        return result
+
+    async def get_candidate(self, candidate_id: str) -> Optional[dict]:
+        query = "SELECT name, surname FROM candidate_applications WHERE candidate_id = ?"
+        return await asyncio.to_thread(self._query, query, (candidate_id,), False)
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        query = "SELECT jobdescription FROM candidate_applications WHERE job_id = ?"
+        return await asyncio.to_thread(self._query, query, (job_id,), False)
+
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        query = "SELECT name, surname, semantic_profile, jobdescription FROM candidate_applications WHERE email = ?"
+        return await asyncio.to_thread(self._query, query, (email,), False)
+
+    def _users_by_emails(self, emails: List[str]) -> List[dict]:
+        rows = []
+        # SQLite limits the number of bound parameters
+        for start in range(0, len(emails), 500):
+            chunk = emails[start:start + 500]
+            query = (
+                "SELECT email, name, surname, semantic_profile, jobdescription FROM candidate_applications "
+                f"WHERE email IN ({', '.join('?' * len(chunk))})"
+            )
+            rows.extend(self._query(query, tuple(chunk)))
+        return rows
+
+    async def get_users_by_emails(self, emails: List[str]) -> List[dict]:
+        return await asyncio.to_thread(self._users_by_emails, emails)
+
+    async def get_users_by_job(self, job_id: str) -> List[dict]:
+        query = "SELECT email, name, surname, semantic_profile, jobdescription FROM candidate_applications WHERE job_id = ?"
+        return await asyncio.to_thread(self._query, query, (job_id,))
+
+    async def get_candidates_page(self, job_id: str, after_email: Optional[str], limit: int) -> List[dict]:
+        query = (
+            "SELECT email, name, surname FROM candidate_applications "
+            "WHERE job_id = ? AND email > ? ORDER BY email LIMIT ?"
+        )
+        return await asyncio.to_thread(self._query, query, (job_id, after_email or "", limit))
+
+    def _load(self, rows: Iterable[dict], batch_size: int) -> int:
+        conn = self._connect()
+        insert = (
+            f"INSERT INTO candidate_applications ({', '.join(COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(COLUMNS))})"
+        )
+        count = 0
+        batch = []
+        with conn:
+            for row in rows:
+                batch.append(tuple(row[column] for column in COLUMNS))
+                if len(batch) >= batch_size:
+                    conn.executemany(insert, batch)
+                    count += len(batch)
+                    batch.clear()
+            conn.executemany(insert, batch)
+            count += len(batch)
+            # Indexes are built once after the bulk insert
+            conn.execute("CREATE INDEX IF NOT EXISTS candidate_applications_email_idx ON candidate_applications (email)")
+            conn.execute("CREATE INDEX IF NOT EXISTS candidate_applications_job_idx ON candidate_applications (job_id, email)")
+            conn.execute("CREATE INDEX IF NOT EXISTS candidate_applications_candidate_idx ON candidate_applications (candidate_id)")
+        return count
+
+    async def load(self, rows: Iterable[dict], batch_size: int = 10000) -> int:
+        return await asyncio.to_thread(self._load, rows, batch_size)
+
+    async def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class MemoryBackend(StorageBackend):
+    name = "memory"
+
+    def __init__(self, synthetic_count: int = 0):
+        self._synthetic_count = synthetic_count
+        self._synthetic_lock = threading.Lock()
+        self._by_email: Dict[str, dict] = {}
+        self._by_candidate: Dict[str, dict] = {}
+        self._by_job: Dict[str, List[dict]] = {}
+        # Emails of each job, sorted, for the keyset pages
+        self._job_emails: Dict[str, List[str]] = {}
+
+    async def _ensure_loaded(self):
+        if self._synthetic_count:
+            # A million candidates take seconds to build: not on the event loop
+            await asyncio.to_thread(self._load_synthetic)
+
+    def _load_synthetic(self):
+        with self._synthetic_lock:
+            if self._synthetic_count:
+                self._load(synthetic_candidates(self._synthetic_count))
+                # Reset once loaded, so that concurrent first requests wait for the rows
+                self._synthetic_count = 0
+
+    @staticmethod
+    def _pick(row: Optional[dict], columns: tuple) -> Optional[dict]:
+        return {column: row[column] for column in columns} if row else None
+
+    async def get_candidate(self, candidate_id: str) -> Optional[dict]:
+        await self._ensure_loaded()
+        return self._pick(self._by_candidate.get(candidate_id), ("name", "surname"))
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        await self._ensure_loaded()
+        rows = self._by_job.get(job_id)
+        return self._pick(rows[0] if rows else None, ("jobdescription",))
+
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        await self._ensure_loaded()
+        return self._pick(self._by_email.get(email), ("name", "surname", "semantic_profile", "jobdescription"))
+
+    async def get_users_by_emails(self, emails: List[str]) -> List[dict]:
+        await self._ensure_loaded()
+        columns = ("email", "name", "surname", "semantic_profile", "jobdescription")
+        return [self._pick(self._by_email[email], columns) for email in emails if email in self._by_email]
+
+    async def get_users_by_job(self, job_id: str) -> List[dict]:
+        await self._ensure_loaded()
+        columns = ("email", "name", "surname", "semantic_profile", "jobdescription")
+        return [self._pick(row, columns) for row in self._by_job.get(job_id, [])]
+
+    async def get_candidates_page(self, job_id: str, after_email: Optional[str], limit: int) -> List[dict]:
+        await self._ensure_loaded()
+        rows = self._by_job.get(job_id, [])
+        start = bisect_right(self._job_emails.get(job_id, []), after_email or "")
+        return [self._pick(row, ("email", "name", "surname")) for row in rows[start:start + limit]]
+
+    def _load(self, rows: Iterable[dict]) -> int:
+        count = 0
+        changed_jobs = set()
+        for row in rows:
+            row = {column: row[column] for column in COLUMNS}
+            # As with the SQL lookups, the first application of a candidate is returned
+            self._by_email.setdefault(row["email"], row)
+            self._by_candidate.setdefault(row["candidate_id"], row)
+            self._by_job.setdefault(row["job_id"], []).append(row)
+            changed_jobs.add(row["job_id"])
+            count += 1
+        for job_id in changed_jobs:
+            self._by_job[job_id].sort(key=lambda row: row["email"])
+            self._job_emails[job_id] = [row["email"] for row in self._by_job[job_id]]
+        return count
+
+    async def load(self, rows: Iterable[dict], batch_size: int = 10000) -> int:
+        await self._ensure_loaded()
+        return self._load(rows)
+
+
+FIRST_NAMES = ["Marco", "Giulia", "Luca", "Sara", "Andrea", "Chiara", "Paolo", "Elena", "John", "Anna", "David", "Maria"]
+SURNAMES = ["Rossi", "Bianchi", "Romano", "Colombo", "Ricci", "Greco", "Smith", "Brown", "Conti", "Gallo", "Costa", "Fontana"]
+SKILLS = [
+    "Python", "Java", "TypeScript", "Go", "SQL", "PostgreSQL", "Docker", "Kubernetes", "AWS", "Azure",
+    "React", "FastAPI", "Django", "Spring", "Terraform", "Kafka", "Spark", "machine learning", "NLP", "CI/CD",
+]
+ROLES = ["Backend developer", "Data engineer", "Frontend developer", "DevOps engineer", "Data scientist", "Full-stack developer"]
+
+
+def synthetic_candidates(count: int, candidates_per_job: int = 50, seed: int = 0) -> Iterator[dict]:
+    """
+    Yields count synthetic application rows, one per candidate, spread over
+    count / candidates_per_job jobs. The same seed gives the same rows.
+    """
+    rng = random.Random(seed)
+    jobs = max(1, count // candidates_per_job)
+    job_descriptions = {}
+    for i in range(count):
+        job_number = rng.randrange(jobs)
+        job_id = f"job-{job_number:06d}"
+        if job_id not in job_descriptions:
+            job_rng = random.Random(f"{seed}-{job_id}")
+            role = job_rng.choice(ROLES)
+            skills = job_rng.sample(SKILLS, 5)
+            job_descriptions[job_id] = (
+                f"{role}.\nRequired experience with {', '.join(skills[:3])}.\n"
+                f"Knowledge of {' and '.join(skills[3:])} is a plus."
+            )
+        skills = rng.sample(SKILLS, 6)
+        years = rng.randint(1, 15)
+        yield {
+            "candidate_id": f"cand-{i:07d}",
+            "job_id": job_id,
+            "email": f"candidate{i:07d}@example.com",
+            "name": rng.choice(FIRST_NAMES),
+            "surname": rng.choice(SURNAMES),
+            "semantic_profile": (
+                f"{rng.choice(ROLES)} with {years} years of experience.\n"
+                f"Worked with {', '.join(skills[:3])} on production systems.\n"
+                f"Familiar with {', '.join(skills[3:])}."
+            ),
+            "jobdescription": job_descriptions[job_id],
+        }
+
+
+def create_backend(name: Optional[str] = None) -> StorageBackend:
+    """Backend named by name or DB_BACKEND"""
+    name = (name or os.getenv("DB_BACKEND", "postgres")).lower()
+    if name == "memory":
+        return MemoryBackend(synthetic_count=int(os.getenv("DB_MEMORY_CANDIDATES", "0")))
+    if name == "sqlite":
+        return SQLiteBackend(os.getenv("DB_SQLITE_PATH", "candidates.sqlite3"))
+    if name == "postgres":
+        return PostgresBackend(os.getenv("DB_CANDIDATES_TABLE", "candidate_applications_view"))
+    raise ValueError(f"Unknown DB_BACKEND '{name}': use postgres, sqlite or memory")
+
+
+_backend: Optional[StorageBackend] = None
+
+
+def get_backend() -> StorageBackend:
+    """The process-wide backend selected by DB_BACKEND"""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
@@ -0,0 +1,122 @@
+"""
+Read-through cache of candidate and job rows, shared by dbAccess and
+dbAccessAsync.
+
+Entries expire after PROFILE_CACHE_TTL seconds (0 disables the cache)
+and at most PROFILE_CACHE_SIZE rows are kept. When
+PROFILE_CACHE_NOTIFY_CHANNEL is set, dbAccessAsync also LISTENs on that
+channel and drops entries as soon as the tables change. The payload is
+JSON with any of "email", "candidate_id" and "job_id", and an empty
+payload clears everything. For example:
+
+    CREATE OR REPLACE FUNCTION notify_profile_change() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('profile_changes', json_build_object('email', NEW.email)::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER candidate_profile_changed AFTER INSERT OR UPDATE ON candidates
+        FOR EACH ROW EXECUTE FUNCTION notify_profile_change();
+"""
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+# Sentinel for cache misses, since None is a valid cached row
+MISS = object()
+
+
+class ProfileCache:
+    """Thread-safe TTL and size-bounded cache keyed by (kind, value)"""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, kind: str, value: str) -> Any:
+        """Returns the cached row, or MISS"""
+        if not self.enabled:
+            return MISS
+        key = (kind, value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, kind: str, value: str, row: Any):
+        # Errors and missing rows are not cached
+        if not self.enabled or not row:
+            return
+        with self._lock:
+            self._entries[(kind, value)] = (time.monotonic() + self.ttl, row)
+            self._entries.move_to_end((kind, value))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, kind: str, value: Optional[str] = None):
+        """Drops one entry, or every entry of a kind when value is None"""
+        with self._lock:
+            if value is not None:
+                self._entries.pop((kind, value), None)
+                return
+            for key in [key for key in self._entries if key[0] == kind]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def handle_notification(self, payload: str):
+        """Applies a LISTEN/NOTIFY payload"""
+        try:
+            changes = json.loads(payload) if payload else {}
+        except ValueError:
+            changes = {}
+        if not isinstance(changes, dict) or not changes:
+            self.clear()
+            return
+
+        if "job_id" in changes:
+            self.invalidate("job_id", str(changes["job_id"]))
+            # Rows looked up by email embed the job description
+            self.invalidate("email")
+        if "candidate_id" in changes:
+            self.invalidate("candidate_id", str(changes["candidate_id"]))
+            self.invalidate("email")
+        if "email" in changes:
+            self.invalidate("email", str(changes["email"]))
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+profile_cache = ProfileCache(
+    ttl=float(os.getenv("PROFILE_CACHE_TTL", "300")),
+    max_size=int(os.getenv("PROFILE_CACHE_SIZE", "1024")),
+)
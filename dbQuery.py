@@ -0,0 +1,105 @@
+"""
+Instrumentation and errors shared by dbAccess and dbAccessAsync.
+
+Every statement is timed with its row count. Statements slower than
+DB_SLOW_QUERY_MS (default 200) are logged as warnings, and failures
+are raised as DatabaseError subclasses instead of being swallowed.
+"""
+import os
+import re
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseError(Exception):
+    """Base class of the data layer errors"""
+
+    def __init__(self, message: str, query: Optional[str] = None):
+        super().__init__(message)
+        self.query = query
+
+
+class DatabaseUnavailableError(DatabaseError):
+    """No connection to the database could be obtained or it was lost"""
+
+
+class QueryError(DatabaseError):
+    """The database rejected or failed to run a statement"""
+
+
+@dataclass
+class QueryStats:
+    """Counters of one statement"""
+    calls: int = 0
+    rows: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    slow: int = 0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class QueryMetrics:
+    """Per-statement timings of the process"""
+
+    def __init__(self, slow_query_ms: float):
+        self.slow_query_ms = slow_query_ms
+        self._stats: Dict[str, QueryStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, query: str, seconds: float, rows: int):
+        elapsed_ms = seconds * 1000
+        statement = normalize(query)
+        slow = self.slow_query_ms > 0 and elapsed_ms >= self.slow_query_ms
+        with self._lock:
+            stats = self._stats.setdefault(statement, QueryStats())
+            stats.calls += 1
+            stats.rows += rows
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.slow += slow
+        if slow:
+            logger.warning("slow query ms=%.1f rows=%d statement=%s", elapsed_ms, rows, statement[:200])
+        else:
+            logger.debug("query ms=%.1f rows=%d statement=%s", elapsed_ms, rows, statement[:200])
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                statement: {**asdict(stats), "avg_ms": stats.avg_ms}
+                for statement, stats in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def normalize(query: str) -> str:
+    return " ".join(query.split())
+
+
+def statement_name(query: str) -> str:
+    """Stable name of the server-side prepared statement of a query"""
+    return "q_" + hashlib.sha1(normalize(query).encode("utf-8")).hexdigest()[:16]
+
+
+def to_positional(query: str) -> str:
+    """Turns %s placeholders into the $1, $2... form used by PREPARE"""
+    counter = iter(range(1, query.count("%s") + 1))
+    return re.sub(r"%s", lambda _: f"${next(counter)}", query)
+
+
+query_metrics = QueryMetrics(slow_query_ms=float(os.getenv("DB_SLOW_QUERY_MS", "200")))
+
+
+def get_query_stats() -> Dict[str, dict]:
+    """Calls, rows and latency of every statement run by the process"""
+    return query_metrics.snapshot()
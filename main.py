@@ -7,17 +7,14 @@ import sys
 import os
 from dotenv import load_dotenv
 from typing import Dict
-from core.cli import CliApp  
+from contextlib import AsyncExitStack
+from core.cli import CliApp
 from core.cli_chat import CliChat
-from core.openrouter import OpenRouterClient
+from core.openrouter import OpenRouterClient, warmup_model
 from mcp_client import MCPClient
+from mcp_registry import load_server_configs, connect_servers
 from core.tools import ToolManager
-from contextlib import AsyncExitStack
-from mcp_client import MCPClient
-from core.cli_chat import CliChat
-from core.cli import CliApp
-from core.openrouter import OpenRouterClient
-from core.openrouter import warmup_model
+from core.startup import StartupTimer, check_openrouter, fast_start_enabled
 from colorama import Fore, init
 
 # Initialize colorama
@@ -50,6 +47,9 @@ async def test_system_health(clients: Dict[str, MCPClient], openrouter_client: O
 async def main():
     """Main entry point"""
     print(f"{Fore.LIGHTCYAN_EX}Starting MCP Router v3...")
+    # Fast start skips the LLM warmup and health completions
+    fast_start = fast_start_enabled(sys.argv[1:])
+    timer = StartupTimer()
     
     # Get OpenRouter API key
     api_key = os.getenv("OPENROUTER_API_KEY")
@@ -68,39 +68,58 @@ async def main():
         default_timeout=120.0
     )
     
-    await warmup_model(openrouter_client)
+    if not fast_start:
+        with timer.phase("model warmup"):
+            await warmup_model(openrouter_client)
     
     # Initialize MCP clients
     clients = {}
+    exit_stack = AsyncExitStack()
     
     try:
-        # MCP client
-        print(f"{Fore.CYAN}Initializing MCP client...")
-        hr_client = MCPClient(
-            command="uv",
-            args=["run", "mcp_server.py"],
-            openrouter_client=openrouter_client
-        )
-        await hr_client.connect()
-        clients["human_resources"] = hr_client
-        print(f"{Fore.GREEN}✓ Human Resources client connected")
+        # MCP clients from the mcpServers config, connected concurrently
+        print(f"{Fore.CYAN}Initializing MCP clients...")
+
+        async def connect_clients():
+            with timer.phase("MCP servers"):
+                return await connect_servers(
+                    load_server_configs(),
+                    exit_stack,
+                    openrouter_client=openrouter_client
+                )
+
+        async def check_key():
+            with timer.phase("OpenRouter key check"):
+                return await check_openrouter(openrouter_client)
+
+        if fast_start:
+            # Independent steps run concurrently
+            clients, _ = await asyncio.gather(connect_clients(), check_key())
+        else:
+            clients = await connect_clients()
+        # Resources and prompts come from the first server
+        primary_client = next(iter(clients.values()), None)
         
         # Test system health
-        if await test_system_health(clients, openrouter_client):
-            print(f"{Fore.GREEN}✓ System health check passed")
-        else:
-            print(f"{Fore.YELLOW}⚠ System health check had warnings")
+        if not fast_start:
+            with timer.phase("health check"):
+                if await test_system_health(clients, openrouter_client):
+                    print(f"{Fore.GREEN}✓ System health check passed")
+                else:
+                    print(f"{Fore.YELLOW}⚠ System health check had warnings")
         
         # Initialize CLI chat
         cli_chat = CliChat(
-            mcp_client=hr_client,
+            mcp_client=primary_client,
             clients=clients,
             openRouterService=openrouter_client
         )
         
         # Initialize and run CLI app
         cli_app = CliApp(cli_chat)
-        await cli_app.initialize()
+        with timer.phase("resources and prompts"):
+            await cli_app.initialize()
+        timer.report()
         
         print(f"{Fore.LIGHTGREEN_EX}✓ MCP Router initialized successfully")
         print(f"{Fore.LIGHTGREEN_EX}Available commands:")
@@ -120,11 +139,10 @@ async def main():
     finally:
         # Cleanup
         print(f"{Fore.CYAN}Cleaning up...")
-        for client in clients.values():
-            try:
-                await client.cleanup()
-            except Exception as e:
-                print(f"{Fore.YELLOW}Warning during cleanup: {e}")
+        try:
+            await exit_stack.aclose()
+        except Exception as e:
+            print(f"{Fore.YELLOW}Warning during cleanup: {e}")
         print(f"{Fore.GREEN}✓ Cleanup completed")
 
 if __name__ == "__main__":
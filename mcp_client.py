@@ -2,8 +2,12 @@ import sys
 import asyncio
 import warnings
 import logging
-from typing import Optional, Any
-from contextlib import AsyncExitStack
+import threading
+import importlib
+import importlib.util
+from typing import Optional, Any, Callable, Awaitable
+from contextlib import AsyncExitStack, asynccontextmanager
+import anyio
 from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
 from mcp.client.session import RequestContext
@@ -13,116 +17,329 @@ from mcp.types import (
     TextContent,
     Role
 )
+import os
 import json
+import time
+import hashlib
+import uuid
+from collections import OrderedDict
 from pydantic import AnyUrl
 from colorama import Fore, Style, init
 from core.openrouter import OpenRouterClient
+from mcp_sampling import SamplingExecutor
 
 init(autoreset=True)
 
+logger = logging.getLogger(__name__)
+
+# Supported transports: a child process over stdio, a shared server over HTTP,
+# or a trusted server object imported into this process
+TRANSPORTS = ("stdio", "streamable-http", "sse", "inprocess")
+
+# Receives (progress, total) of a running tool call
+ProgressCallback = Callable[[float, Optional[float]], Awaitable[None]]
+
+# Streamable-HTTP session IDs kept open for reuse by the next clients of the same URL,
+# at most MCP_HTTP_SESSION_POOL per URL: sessions beyond that are terminated
+_http_sessions: dict[str, list[str]] = {}
+_http_sessions_lock = threading.Lock()
+HTTP_SESSION_POOL_SIZE = int(os.getenv("MCP_HTTP_SESSION_POOL", "4"))
+
+
+def _load_server(spec: str):
+    """
+    Imports the server object named by "module:attribute" or "path.py:attribute"
+    (attribute defaults to "server") and returns its low-level Server
+    """
+    target, _, attribute = spec.partition(":")
+    # Servers configure logging when imported (FastMCP always does):
+    # the router's own logging setup is restored afterwards
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    try:
+        if target.endswith(".py"):
+            module_name = os.path.splitext(os.path.basename(target))[0].replace(".", "_")
+            module_spec = importlib.util.spec_from_file_location(module_name, target)
+            module = importlib.util.module_from_spec(module_spec)
+            module_spec.loader.exec_module(module)
+        else:
+            module = importlib.import_module(target)
+    finally:
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+    server = getattr(module, attribute or "server")
+    # FastMCP wraps the low-level server that speaks the protocol
+    return getattr(server, "_mcp_server", server)
+
+
+@asynccontextmanager
+async def _inprocess_transport(spec: str):
+    """
+    Runs the server on this event loop and connects it through in-memory
+    streams: no process spawn and no JSON framing over pipes
+    """
+    from mcp.shared.memory import create_client_server_memory_streams
+
+    server = _load_server(spec)
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            server_read, server_write = server_streams
+            tg.start_soon(
+                lambda: server.run(server_read, server_write, server.create_initialization_options())
+            )
+            try:
+                yield client_streams
+            finally:
+                tg.cancel_scope.cancel()
+
+
+class _ConcurrentSamplingSession(ClientSession):
+    """
+    ClientSession that answers sampling requests in their own tasks.
+    The SDK handles them inline in the receive loop, so concurrent
+    samplings of one server would otherwise run one at a time.
+    """
+
+    async def _received_request(self, responder) -> None:
+        if not isinstance(responder.request.root, types.CreateMessageRequest):
+            await super()._received_request(responder)
+            return
+
+        handle = super()._received_request
+
+        async def run():
+            try:
+                await handle(responder)
+            except Exception as e:
+                logger.warning("sampling request %s failed: %s", responder.request_id, e)
+
+        self._task_group.start_soon(run)
+
+
 class MCPClient:
     def __init__(
         self,
-        command: str,
-        args: list[str],
+        command: Optional[str] = None,
+        args: Optional[list[str]] = None,
         env: Optional[dict] = None,
-        openrouter_client: Optional[OpenRouterClient] = None
+        openrouter_client: Optional[OpenRouterClient] = None,
+        transport: str = "stdio",
+        url: Optional[str] = None,
+        headers: Optional[dict[str, str]] = None,
+        reuse_session: bool = True,
+        module: Optional[str] = None
     ):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown MCP transport '{transport}', expected one of {TRANSPORTS}")
+        if transport == "stdio" and not command:
+            raise ValueError("The stdio transport requires a command")
+        if transport == "inprocess" and not module:
+            raise ValueError("The inprocess transport requires a module, e.g. 'mcp_server:server'")
+        if transport in ("streamable-http", "sse") and not url:
+            raise ValueError(f"The {transport} transport requires a url")
+
         self._command = command
-        self._args = args
+        self._args = args or []
         self._env = env
+        self._transport = transport
+        self._url = url
+        self._module = module
+        self._headers = headers or {}
+        # Keep the Streamable-HTTP session on the server after cleanup and resume it on connect
+        self._reuse_session = reuse_session
+        self._get_session_id: Optional[Callable[[], Optional[str]]] = None
         self._session: Optional[ClientSession] = None
         self._openrouter_client = openrouter_client
+        self._sampling = SamplingExecutor.for_server(self.server_key)
+        self._sampling_tasks: set[asyncio.Task] = set()
+        self._calls_inflight = 0
+        # Progress callbacks of the running tool calls, by progress token
+        self._progress_callbacks: dict[str, ProgressCallback] = {}
+
+        # Tool list is cached until the server reports a change
+        self._tools: Optional[list[types.Tool]] = None
+        self._tools_fingerprint: Optional[str] = None
+        self.server_capabilities: Optional[types.ServerCapabilities] = None
+
+        # Parsed resource contents by URI, with their expiry time (None = until updated)
+        self._resources: "OrderedDict[str, tuple[Optional[float], Any]]" = OrderedDict()
+        self._subscribed: set[str] = set()
+        # Bumped on every update notification, so a read that overlaps one is not cached
+        self._resource_versions: dict[str, int] = {}
+        self._resource_ttl = float(os.getenv("RESOURCE_CACHE_TTL", "60"))
+        self._resource_cache_size = int(os.getenv("RESOURCE_CACHE_SIZE", "64"))
+        # Incremented when the server reports that its resource list changed
+        self.resources_version = 0
 
         self._exit_stack: AsyncExitStack = AsyncExitStack()
 
+    @property
+    def server_key(self) -> str:
+        """Identifies the server: its URL, its module spec or its command line"""
+        if self._transport in ("streamable-http", "sse"):
+            return self._url
+        if self._transport == "inprocess":
+            return f"inprocess:{self._module}"
+        return " ".join([self._command, *self._args])
+
     async def connect(self):
+        if self._transport == "streamable-http" and self._reuse_session:
+            with _http_sessions_lock:
+                pooled = _http_sessions.get(self._url)
+                session_id = pooled.pop() if pooled else None
+            if session_id:
+                try:
+                    # A rejected session ID is not reported by the transport,
+                    # so the resume attempt gets a short initialize timeout
+                    await self._connect(session_id, initialize_timeout=5.0)
+                    return
+                except Exception as e:
+                    # The server may have expired the session: start a new one
+                    print(f"{Fore.YELLOW}Could not resume MCP session {session_id[:8]}: {str(e) or type(e).__name__}")
+                    await self._exit_stack.aclose()
+                    self._exit_stack = AsyncExitStack()
+
+        await self._connect()
+
+    async def _connect(self, session_id: Optional[str] = None, initialize_timeout: float = 30.0):
+        read_stream, write_stream = await self._open_transport(session_id)
+        self._session = await self._exit_stack.enter_async_context(
+            _ConcurrentSamplingSession(
+                read_stream,
+                write_stream,
+                sampling_callback=self._sampling_callback,
+                message_handler=self._message_handler,
+            )
+        )
+        initialize_result = await asyncio.wait_for(
+            self._session.initialize(), timeout=initialize_timeout
+        )
+        self.server_capabilities = initialize_result.capabilities
+
+    async def _open_transport(self, session_id: Optional[str] = None):
+        """Opens the configured transport and returns its read and write streams"""
+        # HTTP transports are imported only when used
+        if self._transport == "streamable-http":
+            from mcp.client.streamable_http import streamablehttp_client, MCP_SESSION_ID
+
+            headers = dict(self._headers)
+            if session_id:
+                headers[MCP_SESSION_ID] = session_id
+            # One HTTP client with keep-alive connections serves the whole session
+            read_stream, write_stream, get_session_id = await self._exit_stack.enter_async_context(
+                streamablehttp_client(
+                    self._url,
+                    headers=headers,
+                    terminate_on_close=not self._reuse_session
+                )
+            )
+            self._get_session_id = lambda: get_session_id() or session_id
+            return read_stream, write_stream
+
+        if self._transport == "inprocess":
+            return await self._exit_stack.enter_async_context(
+                _inprocess_transport(self._module)
+            )
+
+        if self._transport == "sse":
+            from mcp.client.sse import sse_client
+
+            return await self._exit_stack.enter_async_context(
+                sse_client(self._url, headers=self._headers)
+            )
+
         server_params = StdioServerParameters(
             command=self._command,
             args=self._args,
             env=self._env,
         )
-        stdio_transport = await self._exit_stack.enter_async_context(
+        return await self._exit_stack.enter_async_context(
             stdio_client(server_params)
         )
-        stdio_read, stdio_write = stdio_transport
-        self._session = await self._exit_stack.enter_async_context(
-            ClientSession(stdio_read, stdio_write, sampling_callback=self._sampling_callback)
-        )
-        await self._session.initialize()
         
     async def _sampling_callback(
-        self, 
-        context: RequestContext, 
+        self,
+        context: RequestContext,
         params: CreateMessageRequestParams
-    ) -> CreateMessageResult:
+    ) -> CreateMessageResult | types.ErrorData:
         """
         Callback that handles sampling requests from the MCP server.
-        Uses OpenRouter to call the AI model.
+        Uses OpenRouter to call the AI model through the server's sampling
+        executor, and is cancelled when the tool call that caused it is.
         """
+        messages = [
+            {
+                "role": msg.role,
+                "content": msg.content.text if hasattr(msg.content, "text") else str(msg.content)
+            }
+            for msg in params.messages
+        ]
+        key = SamplingExecutor.request_key(messages, params, self._openrouter_client.model)
+
+        task = asyncio.create_task(
+            self._sampling.run(key, lambda: self._sample(messages, params))
+        )
+        self._sampling_tasks.add(task)
         try:
-            print(f"{Fore.YELLOW}🔄 Sampling request received...")
-            
-            # print("params", params)
-            messages = []
-            for msg in params.messages:
-                # msg is a SamplingMessage with attributes: role, content
-                role = msg.role  # 'user' or 'assistant'
-                
-                if hasattr(msg.content, 'text'):
-                    text = msg.content.text
-                else:
-                    text = str(msg.content)
-                
-                messages.append({
-                    "role": role,
-                    "content": text
-                })
-            
-            # print("\nextracted messages:", messages)
-            print("calling OpenRouter for sampling...")
-            response = await self._openrouter_client.chat(
-                messages=messages,
-                system=params.systemPrompt,
-                temperature=getattr(params, 'temperature', 0.7),
-                max_tokens=getattr(params, 'maxTokens', 1000)
-            )
-            
-            print("extracting text from response...")
-            
-            # Extracts the text from the response
-            response_text = self._openrouter_client.text_from_message(response)
-            
-            print("\nresponse text:", response_text)
-            
-            print(f"{Fore.GREEN}✅ Sampling completed")
-            
-            # Returns the result in MCP format
-            
-            msg_result = CreateMessageResult(
-                role="assistant",
-                model=self._openrouter_client.model,
-                content=TextContent(
-                    type="text",
-                    text=response_text
-                )
-            )
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            self._sampling_tasks.discard(task)
 
-            print(f"msg_result: {msg_result}")
+        if task.cancelled():
+            return types.ErrorData(code=types.INTERNAL_ERROR, message="Sampling cancelled by the client")
 
-            return msg_result
-            
+        try:
+            response_text = task.result()
         except Exception as e:
-            print(f"{Fore.RED}❌ Error during sampling: {e}")
-            return CreateMessageResult(
-                role="assistant",
-                model=self._openrouter_client.model,
-                content=TextContent(
-                    type="text",
-                    text=f"Error during generation: {str(e)}"
-                )
-            )
+            logger.warning("sampling failed request_id=%s error=%s", context.request_id, e)
+            # An error result, so that the server does not take it for generated text
+            return types.ErrorData(code=types.INTERNAL_ERROR, message=f"Error during generation: {str(e)}")
+
+        return CreateMessageResult(
+            role="assistant",
+            model=self._openrouter_client.model,
+            content=TextContent(type="text", text=response_text)
+        )
+
+    async def _sample(self, messages: list[dict], params: CreateMessageRequestParams) -> str:
+        response = await self._openrouter_client.chat(
+            messages=messages,
+            system=params.systemPrompt,
+            temperature=params.temperature if params.temperature is not None else 0.7,
+            stop_sequences=params.stopSequences,
+            max_tokens=params.maxTokens or 1000
+        )
+        return self._openrouter_client.text_from_message(response)
 
+    async def _message_handler(self, message) -> None:
+        """
+        Handles notifications from the MCP server that invalidate cached state
+        """
+        if not isinstance(message, types.ServerNotification):
+            return
+
+        if isinstance(message.root, types.ToolListChangedNotification):
+            print(f"{Fore.CYAN}Tool list changed, invalidating cache")
+            self._tools = None
+            self._tools_fingerprint = None
+        elif isinstance(message.root, types.ResourceUpdatedNotification):
+            uri = str(message.root.params.uri)
+            self._resources.pop(uri, None)
+            self._resource_versions[uri] = self._resource_versions.get(uri, 0) + 1
+        elif isinstance(message.root, types.ResourceListChangedNotification):
+            self.resources_version += 1
+        elif isinstance(message.root, types.ProgressNotification):
+            params = message.root.params
+            callback = self._progress_callbacks.get(str(params.progressToken))
+            if callback is not None:
+                try:
+                    await callback(params.progress, params.total)
+                except Exception as e:
+                    logger.debug("progress callback failed token=%s error=%s", params.progressToken, e)
 
     def session(self) -> ClientSession:
         if self._session is None:
@@ -132,13 +349,65 @@ class MCPClient:
         return self._session
 
     async def list_tools(self) -> list[types.Tool]:
-        result = await self.session().list_tools()
-        return result.tools
+        if self._tools is None:
+            result = await self.session().list_tools()
+            self._tools = result.tools
+            self._tools_fingerprint = hashlib.sha256(
+                json.dumps(
+                    [tool.model_dump(mode="json") for tool in result.tools],
+                    sort_keys=True
+                ).encode("utf-8")
+            ).hexdigest()
+        return self._tools
+
+    @property
+    def cached_tools(self) -> Optional[list[types.Tool]]:
+        """Tool list from the last list_tools call, None if not cached"""
+        return self._tools
+
+    @property
+    def tools_fingerprint(self) -> Optional[str]:
+        """Digest of the cached tool list, None until list_tools has run"""
+        return self._tools_fingerprint
 
     async def call_tool(
-        self, tool_name: str, tool_input
+        self, tool_name: str, tool_input, progress_callback: Optional[ProgressCallback] = None
     ) -> types.CallToolResult | None:
-        return await self.session().call_tool(tool_name, tool_input)
+        """
+        Calls a tool. With progress_callback, the call carries a progress
+        token and the callback receives the server's progress notifications.
+        """
+        self._calls_inflight += 1
+        token = None
+        try:
+            if progress_callback is None:
+                return await self.session().call_tool(tool_name, tool_input)
+
+            token = uuid.uuid4().hex
+            self._progress_callbacks[token] = progress_callback
+            return await self.session().send_request(
+                types.ClientRequest(
+                    types.CallToolRequest(
+                        method="tools/call",
+                        params=types.CallToolRequestParams(
+                            name=tool_name,
+                            arguments=tool_input,
+                            _meta=types.RequestParams.Meta(progressToken=token),
+                        ),
+                    )
+                ),
+                types.CallToolResult,
+            )
+        except asyncio.CancelledError:
+            # Sampling requests can only come from running tool calls
+            if self._calls_inflight == 1:
+                for task in list(self._sampling_tasks):
+                    task.cancel()
+            raise
+        finally:
+            self._calls_inflight -= 1
+            if token is not None:
+                self._progress_callbacks.pop(token, None)
 
     async def list_prompts(self) -> list[types.Prompt]:
         result = await self.session().list_prompts()
@@ -152,30 +421,105 @@ class MCPClient:
         result = await self.session().get_prompt(prompt_name, args)
         return result.messages
 
+    @property
+    def _can_subscribe(self) -> bool:
+        resources = self.server_capabilities.resources if self.server_capabilities else None
+        return bool(resources and resources.subscribe)
+
     async def read_resource(self, uri: str) -> Any:
+        """
+        Returns the parsed content of a resource: JSON when it parses,
+        otherwise the text. Contents are cached until the server reports
+        an update, or for RESOURCE_CACHE_TTL seconds when the server does
+        not support subscriptions.
+        """
+        entry = self._resources.get(uri)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._resources.move_to_end(uri)
+                return value
+            del self._resources[uri]
+
+        # Subscribe before reading, so no update between the two goes unreported
+        expires_at = time.monotonic() + self._resource_ttl
+        if self._can_subscribe:
+            try:
+                if uri not in self._subscribed:
+                    await self.session().subscribe_resource(AnyUrl(uri))
+                    self._subscribed.add(uri)
+                expires_at = None
+            except Exception as e:
+                logger.debug("resource subscribe failed uri=%s error=%s", uri, e)
+
+        version = self._resource_versions.get(uri, 0)
         result = await self.session().read_resource(AnyUrl(uri))
-        resource = result.contents[0]
-        print(Fore.CYAN + "\n Resource:", resource)
+        value = self._parse_resource(result.contents[0])
+
+        if self._resource_versions.get(uri, 0) != version:
+            # Updated while the read was in flight: the value may already be stale
+            logger.debug("resource updated during read, not caching uri=%s", uri)
+        elif self._resource_ttl > 0 or expires_at is None:
+            self._resources[uri] = (expires_at, value)
+            while len(self._resources) > self._resource_cache_size:
+                self._resources.popitem(last=False)
+        return value
 
-        if isinstance(resource, types.TextResourceContents):
+    @staticmethod
+    def _parse_resource(resource) -> Any:
+        if not isinstance(resource, types.TextResourceContents):
+            return None
+        try:
+            return json.loads(resource.text)
+        except json.JSONDecodeError:
             if resource.mimeType == "application/json":
-                print(Fore.CYAN + "\n JSON Resource:", json.loads(resource.text))
-                return json.loads(resource.text)
-            
-            try:
-                parsed = json.loads(resource.text)
-                print(Fore.CYAN + "\n Parsed as JSON (fallback):", parsed)
-                return parsed
-            except json.JSONDecodeError:
-                print(Fore.CYAN + "\n Text Resource:", resource.text)
-                return resource.text
+                print(f"{Fore.YELLOW}Resource {resource.uri} is not valid JSON, using the text")
+            return resource.text
+
+    async def _terminate_http_session(self, session_id: str):
+        """
+        Ends a Streamable-HTTP session on the server. The transport does not,
+        as it is opened with terminate_on_close=False to allow reuse.
+        """
+        import httpx
+        from mcp.client.streamable_http import MCP_SESSION_ID
 
+        try:
+            async with httpx.AsyncClient(timeout=5.0, follow_redirects=True) as client:
+                response = await client.delete(
+                    self._url, headers={**self._headers, MCP_SESSION_ID: session_id}
+                )
+            # 404: already gone, 405: the server does not support termination
+            if response.status_code not in (200, 202, 204, 404, 405):
+                logger.warning("http session terminate failed status=%s", response.status_code)
+        except Exception as e:
+            logger.warning("http session terminate failed error=%s", e)
 
     async def cleanup(self):
+        # Leave the HTTP session open on the server for the next client,
+        # terminating the oldest one when the pool of the URL is full
+        dropped = None
+        if self._session is not None and self._get_session_id and self._reuse_session:
+            session_id = self._get_session_id()
+            if session_id:
+                with _http_sessions_lock:
+                    pooled = _http_sessions.setdefault(self._url, [])
+                    pooled.append(session_id)
+                    if len(pooled) > HTTP_SESSION_POOL_SIZE:
+                        dropped = pooled.pop(0)
+        self._get_session_id = None
+
         self._session = None
-        
+        self._tools = None
+        self._tools_fingerprint = None
+        self._resources.clear()
+        self._subscribed.clear()
+
         # Close the exit stack that manages all context managers
         await self._exit_stack.aclose()
+
+        if dropped:
+            await self._terminate_http_session(dropped)
         
         # On Windows, wait for subprocesses to fully close
         if sys.platform == "win32":
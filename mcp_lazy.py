@@ -0,0 +1,267 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import asyncio
+from typing import Optional, Any, Callable, Awaitable, TypeVar
+from mcp import types
+from colorama import Fore, init
+from mcp_client import ProgressCallback
+from mcp_supervisor import SupervisedMCPClient
+
+init(autoreset=True)
+
+T = TypeVar("T")
+
+DEFAULT_SNAPSHOT_DIR = ".mcp_cache"
+
+
+def _child_pids(pid: int) -> set[int]:
+    """Direct children of a process (Linux only, empty elsewhere)"""
+    children = set()
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children", "r") as f:
+                children.update(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def _tree_rss_bytes(pid: int) -> int:
+    """Resident memory of a process and all its descendants"""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+        pending.extend(_child_pids(current))
+    return total
+
+
+class LazyMCPClient:
+    """
+    MCP client whose server process is started only when needed.
+
+    Tools, resources and prompts are served from a snapshot persisted on
+    disk, so listing them never spawns the server. The process starts on
+    the first call_tool, read_resource or get_prompt, and is stopped after
+    idle_timeout seconds without calls. Cold-start latency and the memory
+    released on idle shutdown are reported.
+
+    Exposes the same interface as MCPClient.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        idle_timeout: float = 300.0,
+        snapshot_dir: Optional[str] = None,
+        **client_options
+    ):
+        self.name = name
+        self.idle_timeout = idle_timeout
+        self._snapshot_path = os.path.join(
+            snapshot_dir or os.getenv("MCP_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR),
+            f"{name}.json"
+        )
+        # client_options are passed to SupervisedMCPClient
+        self._client_options = client_options
+
+        self._client: Optional[SupervisedMCPClient] = None
+        self._server_pids: set[int] = set()
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._idle_task: Optional[asyncio.Task] = None
+        self._inflight = 0
+        self._last_used = time.monotonic()
+
+        self._tools: Optional[list[types.Tool]] = None
+        self._resources: Optional[list[dict]] = None
+        self._prompts: Optional[list[types.Prompt]] = None
+        self._tools_fingerprint: Optional[str] = None
+
+        self.cold_starts = 0
+        self.last_cold_start_seconds: Optional[float] = None
+        self.last_released_bytes: Optional[int] = None
+
+    @property
+    def running(self) -> bool:
+        return self._client is not None
+
+    async def connect(self):
+        """Loads the snapshot; the server is started only if there is none"""
+        self._start_lock = asyncio.Lock()
+        if not self._load_snapshot():
+            print(f"{Fore.CYAN}No snapshot for '{self.name}', starting the server once to build it")
+            await self._ensure_started()
+        self._idle_task = asyncio.create_task(self._idle_watch())
+
+    def _load_snapshot(self) -> bool:
+        try:
+            with open(self._snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self._tools = [types.Tool.model_validate(tool) for tool in snapshot["tools"]]
+            self._resources = snapshot.get("resources", [])
+            self._prompts = [types.Prompt.model_validate(prompt) for prompt in snapshot.get("prompts", [])]
+            self._tools_fingerprint = snapshot["tools_fingerprint"]
+            return True
+        except (OSError, KeyError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"{Fore.YELLOW}Ignoring unreadable snapshot {self._snapshot_path}: {e}")
+            return False
+
+    async def _refresh_snapshot(self, client: SupervisedMCPClient):
+        """Reads the catalog from the running server and persists it if changed"""
+        tools = await client.list_tools()
+        try:
+            resources = await client.list_resources()
+        except Exception:
+            resources = []
+        try:
+            prompts = await client.list_prompts()
+        except Exception:
+            prompts = []
+
+        snapshot = {
+            "tools": [tool.model_dump(mode="json") for tool in tools],
+            "resources": json.loads(json.dumps(resources, default=str)),
+            "prompts": [prompt.model_dump(mode="json") for prompt in prompts],
+        }
+        fingerprint = hashlib.sha256(
+            json.dumps(snapshot["tools"], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+        self._tools = tools
+        self._resources = snapshot["resources"]
+        self._prompts = prompts
+        if fingerprint == self._tools_fingerprint:
+            return
+
+        self._tools_fingerprint = fingerprint
+        snapshot["tools_fingerprint"] = fingerprint
+        snapshot["saved_at"] = time.time()
+        os.makedirs(os.path.dirname(self._snapshot_path) or ".", exist_ok=True)
+        temp_path = f"{self._snapshot_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(temp_path, self._snapshot_path)
+        print(f"{Fore.CYAN}Saved catalog snapshot for '{self.name}'")
+
+    async def _ensure_started(self) -> SupervisedMCPClient:
+        async with self._start_lock:
+            if self._client is not None:
+                return self._client
+
+            start = time.perf_counter()
+            pids_before = _child_pids(os.getpid())
+            client = SupervisedMCPClient(**self._client_options)
+            await client.connect()
+            self._server_pids = _child_pids(os.getpid()) - pids_before
+            await self._refresh_snapshot(client)
+
+            self.cold_starts += 1
+            self.last_cold_start_seconds = time.perf_counter() - start
+            print(f"{Fore.CYAN}Cold start of '{self.name}' took {self.last_cold_start_seconds:.2f}s")
+            self._client = client
+            self._last_used = time.monotonic()
+            return client
+
+    async def _stop(self, reason: str):
+        client, self._client = self._client, None
+        if client is None:
+            return
+        released = sum(_tree_rss_bytes(pid) for pid in self._server_pids) if sys.platform.startswith("linux") else 0
+        self._server_pids = set()
+        await client.cleanup()
+        if released:
+            self.last_released_bytes = released
+            print(f"{Fore.CYAN}Stopped '{self.name}' ({reason}), released ~{released / 2**20:.0f} MB")
+        else:
+            print(f"{Fore.CYAN}Stopped '{self.name}' ({reason})")
+
+    async def _idle_watch(self):
+        interval = max(1.0, min(self.idle_timeout / 4, 30.0))
+        while True:
+            await asyncio.sleep(interval)
+            if (
+                self._client is not None
+                and self._inflight == 0
+                and time.monotonic() - self._last_used >= self.idle_timeout
+            ):
+                async with self._start_lock:
+                    if self._inflight == 0:
+                        await self._stop(f"idle for {self.idle_timeout:.0f}s")
+
+    async def _call(self, operation: Callable[[SupervisedMCPClient], Awaitable[T]]) -> T:
+        self._inflight += 1
+        try:
+            client = await self._ensure_started()
+            return await operation(client)
+        finally:
+            self._inflight -= 1
+            self._last_used = time.monotonic()
+
+    def session(self):
+        if self._client is None:
+            raise ConnectionError(f"MCP server '{self.name}' is not running")
+        return self._client.session()
+
+    @property
+    def cached_tools(self) -> Optional[list[types.Tool]]:
+        return self._tools
+
+    @property
+    def tools_fingerprint(self) -> Optional[str]:
+        return self._tools_fingerprint
+
+    @property
+    def resources_version(self):
+        """Changes when the snapshot is refreshed or the running server's resource list changes"""
+        return (self.cold_starts, self._client.resources_version if self._client else None)
+
+    async def list_tools(self) -> list[types.Tool]:
+        if self._tools is None:
+            await self._call(lambda client: client.list_tools())
+        return self._tools
+
+    async def list_resources(self) -> list[dict]:
+        if self._resources is None:
+            await self._call(lambda client: client.list_resources())
+        return self._resources
+
+    async def list_prompts(self) -> list[types.Prompt]:
+        if self._prompts is None:
+            await self._call(lambda client: client.list_prompts())
+        return self._prompts
+
+    async def call_tool(
+        self, tool_name: str, tool_input, progress_callback: Optional[ProgressCallback] = None
+    ) -> types.CallToolResult | None:
+        return await self._call(lambda client: client.call_tool(tool_name, tool_input, progress_callback))
+
+    async def read_resource(self, uri: str) -> Any:
+        return await self._call(lambda client: client.read_resource(uri))
+
+    async def get_prompt(self, prompt_name, args: dict[str, str]):
+        return await self._call(lambda client: client.get_prompt(prompt_name, args))
+
+    async def cleanup(self):
+        if self._idle_task is not None:
+            self._idle_task.cancel()
+            self._idle_task = None
+        await self._stop("shutdown")
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.cleanup()
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import asyncio
+from typing import Optional, Dict, Any
+from contextlib import AsyncExitStack
+from colorama import Fore, init
+from mcp_client import TRANSPORTS
+from mcp_supervisor import SupervisedMCPClient
+from mcp_lazy import LazyMCPClient
+
+init(autoreset=True)
+
+DEFAULT_CONFIG_PATH = "mcp_servers.json"
+
+# Used when no config file exists: the bundled interview server
+DEFAULT_SERVERS = {
+    "human_resources": {
+        "command": "uv",
+        "args": ["run", "mcp_server.py"],
+        "transport": "stdio"
+    }
+}
+
+
+def load_server_configs(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Loads the "mcpServers" section of the config file.
+
+    The path comes from MCP_SERVERS_CONFIG, defaulting to mcp_servers.json.
+    Each server has command/args/env for stdio, transport and url for
+    streamable-http and sse, or transport "inprocess" and a module such as
+    "mcp_server:server" for trusted servers run inside the router.
+    ${VAR} references in env, url and headers are expanded from the
+    environment. "lazy": true starts the server on the first call and
+    stops it after "idle_timeout" seconds.
+    """
+    path = path or os.getenv("MCP_SERVERS_CONFIG", DEFAULT_CONFIG_PATH)
+    if not os.path.exists(path):
+        print(f"{Fore.YELLOW}No MCP server config at {path}, using the default server")
+        return dict(DEFAULT_SERVERS)
+
+    with open(path, "r", encoding="utf-8") as f:
+        servers = json.load(f).get("mcpServers", {})
+
+    configs = {}
+    for name, config in servers.items():
+        if config.get("disabled"):
+            continue
+
+        transport = config.get("transport", "stdio")
+        if transport not in TRANSPORTS:
+            print(f"{Fore.RED}Skipping MCP server '{name}': unknown transport '{transport}'")
+            continue
+
+        config = dict(config)
+        config["transport"] = transport
+        if config.get("env"):
+            config["env"] = {key: os.path.expandvars(str(value)) for key, value in config["env"].items()}
+        if config.get("url"):
+            config["url"] = os.path.expandvars(config["url"])
+        if config.get("headers"):
+            config["headers"] = {key: os.path.expandvars(str(value)) for key, value in config["headers"].items()}
+        configs[name] = config
+
+    return configs
+
+
+def create_client(name: str, config: Dict[str, Any], openrouter_client=None, ping_interval: Optional[float] = None):
+    """Creates the client of a configured server"""
+    env = config.get("env")
+    if env is not None and config.get("transport", "stdio") == "stdio":
+        # The child process inherits the router environment plus the configured variables
+        env = {**os.environ, **env}
+
+    options = dict(
+        command=config.get("command"),
+        args=config.get("args", []),
+        env=env,
+        openrouter_client=openrouter_client,
+        ping_interval=config.get("ping_interval", ping_interval),
+        idempotent_tools=config.get("idempotent_tools", ()),
+        transport=config.get("transport", "stdio"),
+        url=config.get("url"),
+        headers=config.get("headers"),
+        module=config.get("module"),
+    )
+    if config.get("lazy"):
+        return LazyMCPClient(name, idle_timeout=float(config.get("idle_timeout", 300)), **options)
+    return SupervisedMCPClient(**options)
+
+
+async def connect_servers(
+    configs: Dict[str, Dict[str, Any]],
+    stack: AsyncExitStack,
+    openrouter_client=None,
+    ping_interval: Optional[float] = None,
+    timeout: float = 60.0
+) -> Dict[str, SupervisedMCPClient]:
+    """
+    Connects all servers concurrently, so startup takes as long as the
+    slowest server. A server that fails to start is reported and skipped.
+    Connected clients are closed when the exit stack closes.
+    """
+    clients = {
+        name: create_client(name, config, openrouter_client, ping_interval)
+        for name, config in configs.items()
+    }
+
+    async def connect(name: str, client: SupervisedMCPClient) -> float:
+        start = time.perf_counter()
+        await asyncio.wait_for(client.connect(), timeout=timeout)
+        return time.perf_counter() - start
+
+    print(f"{Fore.CYAN}Connecting to {len(clients)} MCP server(s)...")
+    results = await asyncio.gather(
+        *(connect(name, client) for name, client in clients.items()),
+        return_exceptions=True
+    )
+
+    connected = {}
+    for (name, client), result in zip(clients.items(), results):
+        if isinstance(result, BaseException):
+            print(f"{Fore.RED}✗ MCP server '{name}' failed to start: {str(result) or type(result).__name__}")
+            await client.cleanup()
+            continue
+        if isinstance(client, LazyMCPClient) and not client.running:
+            print(f"{Fore.GREEN}✓ MCP server '{name}' registered from snapshot, starts on first use")
+        else:
+            print(f"{Fore.GREEN}✓ MCP server '{name}' connected in {result:.2f}s")
+        stack.push_async_callback(client.cleanup)
+        connected[name] = client
+
+    if not connected:
+        print(f"{Fore.YELLOW}⚠ No MCP server available, tools are disabled")
+
+    return connected
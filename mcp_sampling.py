@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+import concurrent.futures
+from collections import OrderedDict, deque
+from typing import Optional, Dict, List, Awaitable, Callable, Tuple
+from mcp.types import CreateMessageRequestParams
+
+logger = logging.getLogger(__name__)
+
+
+class _Slots:
+    """
+    Semaphore usable from several event loops. Waiters are served first
+    come, first served: each waits on a future of its own loop, and a
+    released slot is handed to the first one with call_soon_threadsafe.
+    """
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # The slot was handed over while cancelling: pass it on
+            self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                try:
+                    waiter.get_loop().call_soon_threadsafe(self._wake, waiter)
+                    return
+                except RuntimeError:
+                    # Its loop is closed: nobody is waiting there any more
+                    continue
+            self._value += 1
+
+    def _wake(self, waiter: asyncio.Future):
+        if not waiter.done():
+            waiter.set_result(None)
+        # A cancelled waiter releases the slot itself (see acquire)
+
+
+class _OwnerCancelled(Exception):
+    """The request that the others were waiting for was cancelled"""
+
+
+class SamplingExecutor:
+    """
+    Runs the sampling requests of one MCP server with a concurrency limit.
+    Identical requests in flight at the same time share one call, and
+    completed ones can be kept in an optional TTL cache.
+
+    Executors are shared per server by every client in the process,
+    including clients running on other threads' event loops, so the
+    limit and the in-flight calls are shared across loops.
+    """
+
+    _executors: Dict[str, "SamplingExecutor"] = {}
+    _executors_lock = threading.Lock()
+
+    def __init__(
+        self,
+        server: str,
+        max_concurrency: int = 4,
+        cache_ttl: float = 0.0,
+        cache_size: int = 128
+    ):
+        self.server = server
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+
+        self._slots = _Slots(self.max_concurrency)
+        self._cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Result of each request in flight, by key
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        self.completed = 0
+        self.cache_hits = 0
+        self.shared = 0
+        self.cancelled = 0
+
+    @classmethod
+    def for_server(cls, server: str) -> "SamplingExecutor":
+        """
+        Returns the executor of a server, configured from
+        SAMPLING_MAX_CONCURRENCY and SAMPLING_CACHE_TTL (0 = no cache)
+        """
+        with cls._executors_lock:
+            executor = cls._executors.get(server)
+            if executor is None:
+                executor = cls(
+                    server,
+                    max_concurrency=int(os.getenv("SAMPLING_MAX_CONCURRENCY", "4")),
+                    cache_ttl=float(os.getenv("SAMPLING_CACHE_TTL", "0")),
+                )
+                cls._executors[server] = executor
+            return executor
+
+    @staticmethod
+    def request_key(messages: List[dict], params: CreateMessageRequestParams, model: str) -> str:
+        """Digest of everything that determines the completion"""
+        payload = {
+            "messages": messages,
+            "system": params.systemPrompt,
+            "temperature": params.temperature,
+            "max_tokens": params.maxTokens,
+            "stop": params.stopSequences,
+            "model": model,
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def _cached(self, key: str) -> Optional[str]:
+        if self.cache_ttl <= 0:
+            return None
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            expires_at, text = entry
+            if expires_at < time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return text
+
+    def _store(self, key: str, text: str):
+        if self.cache_ttl <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, text)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def run(self, key: str, sample: Callable[[], Awaitable[str]]) -> str:
+        """
+        Returns the cached completion for key, joins an identical request
+        in flight, or runs sample within the limit
+        """
+        while True:
+            text = self._cached(key)
+            if text is not None:
+                self.cache_hits += 1
+                logger.debug("sampling server=%s key=%s cached=true chars=%d", self.server, key, len(text))
+                return text
+
+            with self._inflight_lock:
+                inflight = self._inflight.get(key)
+                if inflight is None:
+                    inflight = self._inflight[key] = concurrent.futures.Future()
+                    break
+
+            try:
+                text = await self._join(inflight)
+            except _OwnerCancelled:
+                # Run it again, unless another waiter already did
+                continue
+            self.shared += 1
+            logger.debug("sampling server=%s key=%s shared=true chars=%d", self.server, key, len(text))
+            return text
+
+        try:
+            text = await self._sample(key, sample)
+        except asyncio.CancelledError:
+            inflight.set_exception(_OwnerCancelled())
+            raise
+        except Exception as e:
+            inflight.set_exception(e)
+            raise
+        else:
+            inflight.set_result(text)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+        return text
+
+    @staticmethod
+    async def _join(inflight: concurrent.futures.Future) -> str:
+        """
+        Waits for a request in flight, possibly on another loop. Cancelling
+        the wait does not cancel the request.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+
+        def settle(done: concurrent.futures.Future):
+            if waiter.done():
+                return
+            if done.exception() is not None:
+                waiter.set_exception(done.exception())
+            else:
+                waiter.set_result(done.result())
+
+        def on_done(done: concurrent.futures.Future):
+            try:
+                loop.call_soon_threadsafe(settle, done)
+            except RuntimeError:
+                # The waiting loop is closed
+                pass
+
+        inflight.add_done_callback(on_done)
+        return await waiter
+
+    async def _sample(self, key: str, sample: Callable[[], Awaitable[str]]) -> str:
+        queued_at = time.perf_counter()
+        await self._slots.acquire()
+        started_at = time.perf_counter()
+        try:
+            text = await sample()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            logger.debug("sampling server=%s key=%s cancelled=true", self.server, key)
+            raise
+        finally:
+            self._slots.release()
+
+        self.completed += 1
+        self._store(key, text)
+        logger.debug(
+            "sampling server=%s key=%s cached=false wait_ms=%.0f run_ms=%.0f chars=%d",
+            self.server, key,
+            (started_at - queued_at) * 1000,
+            (time.perf_counter() - started_at) * 1000,
+            len(text)
+        )
+        return text
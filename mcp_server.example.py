@@ -3,8 +3,6 @@ import logging
 from mcp.server.fastmcp import FastMCP
 from pydantic import Field
 
-# Configura logging per diagnostica
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 mcp = FastMCP("DocumentMCP", log_level="INFO")  # Cambiato da ERROR a INFO per più diagnostica
@@ -225,6 +223,8 @@ def server_status() -> str:
 
 
 if __name__ == "__main__":
+    # Configura logging per diagnostica (solo come processo: in-process il logging è del router)
+    logging.basicConfig(level=logging.INFO)
     logger.info("Starting DocumentMCP server...")
     logger.info(f"Available documents: {list(docs.keys())}")
     mcp.run(transport="stdio")
\ No newline at end of file
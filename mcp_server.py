@@ -1,4 +1,5 @@
 import asyncio
+import json
 import logging
 import os
 import sys
@@ -6,10 +7,17 @@ import anyio
 from colorama import Fore
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP, Context
-from mcp.types import SamplingMessage, TextContent
-from dbAccess import get_user_data_by_email
-from core.openrouter import OpenRouterClient
-from psycopg2.extras import RealDictRow
+from mcp.types import SamplingMessage, TextContent, ToolAnnotations
+from dbAccessAsync import (
+    pool_scope,
+    get_user_data_by_email,
+    get_users_data_by_emails,
+    get_users_data_by_job,
+    get_candidates_page,
+)
+from dbQuery import DatabaseError
+from questionCache import question_cache, question_key
+from contextPacker import context_packer
 
 # Configure logging for diagnostics
 # Configuro un logger che scrive su file (NON su stdout/stderr)
@@ -18,9 +26,27 @@ from psycopg2.extras import RealDictRow
 #     level=logging.DEBUG,
 #     format="%(asctime)s [%(levelname)s] %(message)s",
 # )
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-server = FastMCP("InterviewBot", log_level="INFO")
+
+
+def lifespan(app: FastMCP):
+    """Releases the database pool of the session's loop when the session ends"""
+    return pool_scope()
+
+
+server = FastMCP("InterviewBot", log_level="INFO", lifespan=lifespan)
+
+# Cached questions are keyed on the rendered prompt; bump this to regenerate
+# them when something outside the prompt changes (system prompt, max_tokens)
+PROMPT_VERSION = "2"
+
+# Returned when sampling gives an empty text, and never cached
+NO_TEXT_CONTENT = "No text content available"
+
+
+def sampling_timeout() -> float:
+    """Budget in seconds of one sampling request to the client"""
+    return float(os.getenv("SAMPLING_TIMEOUT", "120"))
 
 def safe_extract(result, key: str) -> str:
     """
@@ -45,34 +71,31 @@ def safe_extract(result, key: str) -> str:
             return first.strip()
     return "Data not available"
 
-@server.tool(
-    name="generate_interview_questions",
-    description="Generates personalized interview questions for a candidate and a job description",
-)
-async def generate_interview_questions(email: str, context: Context, num_questions: int = 5):
+def pack_candidate_context(row: dict) -> tuple[str, str]:
     """
-    Generates personalized interview questions
-    based on the candidate's skills and the job description.
+    Semantic profile and job description of a candidate row, packed into
+    the prompt token budget (see contextPacker)
     """
-    row = get_user_data_by_email(email)
-    
-    try:
-        print("\n === Getting data from db...\n")
-        semantic_profile = row['semantic_profile']
-        job_description = row['jobdescription']
-        name = row['name']
-        surname = row['surname']
-        skills_text = safe_extract(semantic_profile, "semantic_profile")
-        job_description = safe_extract(job_description, "jobdescription")
-    
-    except Exception as e:
-        print(f"Error extracting user data: {e}")
-        
-        return f"Error extracting user data: {e}"
-    
-    try:
+    profile, job = context_packer.pack(
+        safe_extract(row['semantic_profile'], "semantic_profile"),
+        safe_extract(row['jobdescription'], "jobdescription"),
+    )
+    logger.info(
+        "Packed prompt context: profile %d->%d tokens, job %d->%d tokens, ratio %.2f, saved %d",
+        profile.original_tokens, profile.packed_tokens,
+        job.original_tokens, job.packed_tokens,
+        (profile.packed_tokens + job.packed_tokens) / max(1, profile.original_tokens + job.original_tokens),
+        profile.saved_tokens + job.saved_tokens,
+    )
+    return profile.text, job.text
+
 
-        prompt = f"""
+def build_questions_prompt(row: dict, num_questions: int, skills_text: str, job_description: str) -> str:
+    """Prompt asking for the interview questions of one candidate row"""
+    name = row['name']
+    surname = row['surname']
+
+    return f"""
 You are an expert recruiter.
 Your task is to generate {num_questions} personalized interview questions for the following candidate.
 
@@ -96,7 +119,65 @@ Present the questions in a numbered list format.
 Each question must be personalized to the candidate’s profile and role, and include a short explanation of what it evaluates.
 """
 
-        result = await context.session.create_message(
+
+class ProgressHeartbeat:
+    """
+    Reports the progress of a tool, and keeps reporting every
+    TOOL_PROGRESS_INTERVAL seconds while nothing completes so that the
+    client does not time out a tool that is still working. Heartbeats stay
+    between the completed count and the next one, so progress keeps increasing.
+
+    Heartbeats stop after max_silence seconds (SAMPLING_TIMEOUT) without a
+    real advance: no step takes longer, so past that the tool is stuck and
+    the client's idle timeout must be allowed to fire.
+    """
+
+    def __init__(self, context: Context, total: float, interval: float | None = None,
+                 max_silence: float | None = None):
+        self.context = context
+        self.total = total
+        self.interval = interval or float(os.getenv("TOOL_PROGRESS_INTERVAL", "5"))
+        self.max_silence = max_silence or sampling_timeout()
+        self.completed = 0
+        self._beats = 0
+        self._task: asyncio.Task | None = None
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._beat())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    async def advance(self, completed: int):
+        self.completed = completed
+        self._beats = 0
+        await self._report(completed)
+
+    async def _beat(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if (self._beats + 1) * self.interval > self.max_silence:
+                # Silent until the next advance
+                continue
+            self._beats += 1
+            await self._report(self.completed + 1 - 0.5 ** self._beats)
+
+    async def _report(self, progress: float):
+        try:
+            await self.context.report_progress(progress, self.total)
+        except Exception as e:
+            logger.debug("Progress report failed: %s", e)
+
+
+async def sample_questions(context: Context, prompt: str) -> str:
+    """
+    Asks the client's model for the questions through MCP sampling,
+    waiting at most SAMPLING_TIMEOUT seconds
+    """
+    result = await asyncio.wait_for(
+        context.session.create_message(
             messages=[
                 SamplingMessage(
                     role="user", content=TextContent(type="text", text=prompt)
@@ -104,32 +185,170 @@ Each question must be personalized to the candidate’s profile and role, and in
             ],
             max_tokens=10000,
             system_prompt="You are a helpful research assistant.",
-        )
-        
-        print(f"\n{Fore.RED}Sampling result:", result.content)
-        
-        if result.content.type == "text":
-            if result.content.text:
-                return result.content.text
-            return "No text content available"
-        else:
-            raise ValueError("Sampling failed")
+        ),
+        timeout=sampling_timeout(),
+    )
+    logger.debug("Sampling result: %s", result.content)
 
+    if result.content.type == "text":
+        if result.content.text:
+            return result.content.text
+        return NO_TEXT_CONTENT
+    raise ValueError("Sampling failed")
+
+
+async def generate_questions(context: Context, row: dict, num_questions: int, force_refresh: bool = False) -> str:
+    """
+    Questions of one candidate row, from the question cache when the same
+    prompt was already sampled with the same model and prompt version.
+    force_refresh always samples again.
+    """
+    skills_text, job_description = pack_candidate_context(row)
+    prompt = build_questions_prompt(row, num_questions, skills_text, job_description)
+    key = question_key(prompt, os.getenv("MODEL", ""), PROMPT_VERSION)
+    if not force_refresh:
+        cached = await question_cache.get(key)
+        if cached is not None:
+            logger.info("Question cache hit: %s", question_cache.stats())
+            return cached
+
+    questions = await sample_questions(context, prompt)
+    if questions != NO_TEXT_CONTENT:
+        await question_cache.put(key, questions)
+    return questions
+
+
+@server.tool(
+    name="generate_interview_questions",
+    description="Generates personalized interview questions for a candidate and a job description",
+    annotations=ToolAnnotations(readOnlyHint=True),
+)
+async def generate_interview_questions(email: str, context: Context, num_questions: int = 5, force_refresh: bool = False):
+    """
+    Generates personalized interview questions
+    based on the candidate's skills and the job description.
+    Set force_refresh to regenerate questions already cached.
+    """
+    try:
+        row = await get_user_data_by_email(email)
+    except DatabaseError as e:
+        logger.error(f"Database error fetching {email}: {e}")
+        return f"Database error: {e}"
+    if not row:
+        return f"Candidate not found: {email}"
+
+    try:
+        async with ProgressHeartbeat(context, total=1) as progress:
+            questions = await generate_questions(context, row, num_questions, force_refresh)
+            await progress.advance(1)
+        return questions
+    except (KeyError, TypeError) as e:
+        logger.error(f"Error extracting user data: {e}")
+
+        return f"Error extracting user data: {e}"
     except Exception as e:
-        # logger.error(f"Error in generate_interview_questions: {e}")
-        print(f"Error during question generation: {str(e)}")
+        logger.error(f"Error during question generation: {str(e)}")
         return f"Error during question generation: {str(e)}"
 
+
+@server.tool(
+    name="generate_interview_questions_batch",
+    description=(
+        "Generates personalized interview questions for several candidates at once, "
+        "given a list of candidate emails or a job_id (all the candidates of the job)"
+    ),
+    annotations=ToolAnnotations(readOnlyHint=True),
+)
+async def generate_interview_questions_batch(
+    context: Context,
+    emails: list[str] | None = None,
+    job_id: str | None = None,
+    num_questions: int = 5,
+    force_refresh: bool = False,
+):
+    """
+    Generates the questions of many candidates: one query fetches all the
+    profiles, then the samplings run concurrently (at most
+    BATCH_SAMPLING_CONCURRENCY at a time). Progress is reported as each
+    candidate completes and the sections are returned in completion order.
+    Candidates with cached questions do not sample unless force_refresh.
+    """
+    if not emails and not job_id:
+        return "Provide a list of candidate emails or a job_id"
+
+    try:
+        if job_id:
+            rows = await get_users_data_by_job(job_id)
+        else:
+            rows = await get_users_data_by_emails(emails)
+    except DatabaseError as e:
+        logger.error(f"Database error fetching candidates: {e}")
+        return f"Database error: {e}"
+    missing = [email for email in (emails or []) if email not in rows]
+    if not rows:
+        return "No candidates found"
+
+    semaphore = asyncio.Semaphore(int(os.getenv("BATCH_SAMPLING_CONCURRENCY", "4")))
+
+    async def generate(email: str, row: dict) -> str:
+        title = f"## {row.get('name', '')} {row.get('surname', '')} ({email})"
+        try:
+            async with semaphore:
+                return f"{title}\n{await generate_questions(context, row, num_questions, force_refresh)}"
+        except Exception as e:
+            logger.error(f"Error generating questions for {email}: {e}")
+            return f"{title}\nError during question generation: {str(e)}"
+
+    total = len(rows)
+    sections = []
+    async with ProgressHeartbeat(context, total=total) as progress:
+        for completed, task in enumerate(
+            asyncio.as_completed([generate(email, row) for email, row in rows.items()]),
+            start=1
+        ):
+            sections.append(await task)
+            await progress.advance(completed)
+            await context.info(f"Questions ready for {completed}/{total} candidates")
+
+    if missing:
+        sections.append(f"Candidates not found: {', '.join(missing)}")
+    return "\n\n".join(sections)
+
+@server.tool(
+    name="list_candidates_for_job",
+    description=(
+        "Lists the candidates that applied to a job, one page at a time. "
+        "Pass the returned next_cursor to get the following page."
+    ),
+    annotations=ToolAnnotations(readOnlyHint=True),
+)
+async def list_candidates_for_job(job_id: str, cursor: str | None = None, page_size: int = 50):
+    """Returns a page of candidates (email, name, surname) and the cursor of the next one"""
+    page_size = max(1, min(page_size, 200))
+    try:
+        # One extra row tells whether another page exists
+        rows = await get_candidates_page(job_id, after_email=cursor, limit=page_size + 1)
+    except DatabaseError as e:
+        logger.error(f"Database error listing candidates of {job_id}: {e}")
+        return f"Database error: {e}"
+
+    candidates = rows[:page_size]
+    next_cursor = candidates[-1]["email"] if len(rows) > page_size else None
+    return json.dumps({"job_id": job_id, "candidates": candidates, "next_cursor": next_cursor})
+
+
 if __name__ == "__main__":
     
     try:
         # MCP usa stdio, quindi avvio direttamente in modalità stdio
+        # Only when run as a server: imported in-process, the router owns logging
+        logging.basicConfig(level=logging.INFO)
         load_dotenv()
         if os.getenv("DOCKER", "0") == "1":
-            print("Running in Docker mode")
+            logger.info("Running in Docker mode")
             anyio.run(server.run_stdio_async)
         else:
-            print("Running in local mode")
+            logger.info("Running in local mode")
             asyncio.run(server.run())
     except Exception as e:
         # Loggo l'errore su file, non su stdout
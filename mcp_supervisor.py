@@ -0,0 +1,301 @@
+import os
+import asyncio
+import random
+import anyio
+from typing import Optional, Any, Callable, Awaitable, Iterable, TypeVar
+from mcp import types
+from colorama import Fore, init
+from mcp_client import MCPClient, ProgressCallback
+
+init(autoreset=True)
+
+T = TypeVar("T")
+
+
+class ConnectionLostError(ConnectionError):
+    """Raised when the MCP server went away while a call was in flight"""
+
+
+class SupervisedMCPClient:
+    """
+    Keeps an MCPClient alive: pings the server periodically, restarts it
+    with exponential backoff when it exits or stops answering, and
+    re-initializes the session restoring the cached tool list.
+
+    Calls in flight when the connection drops are retried on the new
+    session if they are safe to repeat: listing and reading calls always,
+    tools only when marked idempotent (or read-only) by the server or
+    listed in idempotent_tools.
+
+    Exposes the same interface as MCPClient. A ping_interval of 0
+    disables health pings.
+    """
+
+    def __init__(
+        self,
+        command: Optional[str] = None,
+        args: Optional[list[str]] = None,
+        env: Optional[dict] = None,
+        openrouter_client=None,
+        ping_interval: Optional[float] = None,
+        ping_timeout: float = 5.0,
+        max_backoff: float = 30.0,
+        idempotent_tools: Iterable[str] = (),
+        client_factory: Optional[Callable[[], MCPClient]] = None,
+        **client_options
+    ):
+        # client_options (transport, url, headers...) are passed to MCPClient
+        self._client_factory = client_factory or (
+            lambda: MCPClient(
+                command=command,
+                args=args,
+                env=env,
+                openrouter_client=openrouter_client,
+                **client_options
+            )
+        )
+        if ping_interval is None:
+            ping_interval = float(os.getenv("MCP_PING_INTERVAL", "15"))
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.max_backoff = max_backoff
+        self.idempotent_tools = set(idempotent_tools)
+
+        self._client: Optional[MCPClient] = None
+        self._ready = asyncio.Event()
+        # Incremented on every new connection, notified through _state
+        self._generation = 0
+        self._state = asyncio.Condition()
+        self._restart = asyncio.Event()
+        self._closing = False
+        self._closed = asyncio.Event()
+        self._owner: Optional[asyncio.Task] = None
+        self._first_connect: Optional[asyncio.Future] = None
+        # Calls running on the current connection
+        self._inflight: set[asyncio.Task] = set()
+        self._tools_fingerprint: Optional[str] = None
+        self.restarts = 0
+
+    async def connect(self):
+        """Starts the supervisor and waits for the first connection"""
+        self._first_connect = asyncio.get_running_loop().create_future()
+        self._owner = asyncio.create_task(self._supervise())
+        await self._first_connect
+
+    async def _supervise(self):
+        """
+        Owns the MCPClient lifecycle. Connecting and cleaning up happen in
+        this task only, as required by the transport context managers.
+        """
+        attempt = 0
+        while not self._closing:
+            client = self._client_factory()
+            try:
+                await client.connect()
+                # Restore the cached capabilities on the new session
+                await asyncio.wait_for(client.list_tools(), timeout=10.0)
+            except Exception as e:
+                print(f"{Fore.RED}MCP server failed to start: {e}")
+                await self._safe_cleanup(client)
+                if not self._first_connect.done():
+                    self._first_connect.set_exception(e)
+                    return
+                attempt += 1
+                await self._backoff(attempt)
+                continue
+
+            if attempt or self.restarts:
+                print(f"{Fore.GREEN}✓ MCP server reconnected")
+            attempt = 0
+            self._client = client
+            self._tools_fingerprint = client.tools_fingerprint
+            self._restart.clear()
+            async with self._state:
+                self._generation += 1
+                self._ready.set()
+                self._state.notify_all()
+            if not self._first_connect.done():
+                self._first_connect.set_result(None)
+
+            await self._monitor(client)
+
+            self._ready.clear()
+            self._client = None
+            for task in list(self._inflight):
+                task.cancel()
+            await self._safe_cleanup(client)
+
+            if not self._closing:
+                self.restarts += 1
+                attempt += 1
+                print(f"{Fore.YELLOW}⚠ MCP server connection lost, restarting (#{self.restarts})")
+                await self._backoff(attempt)
+
+    async def _monitor(self, client: MCPClient):
+        """Returns when the server stops answering pings or a restart is requested"""
+        if self.ping_interval <= 0:
+            # Pings disabled: restart only on transport errors seen by calls
+            await self._restart.wait()
+            return
+
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._restart.wait(), timeout=self.ping_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await asyncio.wait_for(client.session().send_ping(), timeout=self.ping_timeout)
+            except Exception as e:
+                print(f"{Fore.YELLOW}MCP ping failed: {str(e) or type(e).__name__}")
+                return
+
+    async def _backoff(self, attempt: int):
+        delay = min(self.max_backoff, 0.5 * (2 ** attempt)) * random.uniform(0.8, 1.2)
+        print(f"{Fore.YELLOW}Retrying MCP connection in {delay:.1f}s...")
+        try:
+            await asyncio.wait_for(self._closed.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _safe_cleanup(self, client: MCPClient):
+        # Awaited directly: the transport must be closed by the task that opened it
+        try:
+            await client.cleanup()
+        except Exception as e:
+            print(f"{Fore.YELLOW}Warning during MCP cleanup: {str(e) or type(e).__name__}")
+
+    def _request_restart(self):
+        self._restart.set()
+
+    async def _wait_for_connection(self, after_generation: int):
+        """Waits for a connection newer than the given generation"""
+        async with self._state:
+            await self._state.wait_for(
+                lambda: self._closing or (
+                    self._ready.is_set() and self._generation > after_generation
+                )
+            )
+
+    def _is_idempotent(self, tool_name: str) -> bool:
+        if tool_name in self.idempotent_tools:
+            return True
+        tools = self._client.cached_tools if self._client else None
+        for tool in tools or []:
+            if tool.name == tool_name and tool.annotations:
+                return bool(tool.annotations.idempotentHint or tool.annotations.readOnlyHint)
+        return False
+
+    async def _call(
+        self,
+        operation: Callable[[MCPClient], Awaitable[T]],
+        retry: bool
+    ) -> T:
+        """
+        Runs an operation on the current client. If the connection drops
+        while it is running, it is repeated on the new one when retry is set.
+        """
+        attempts = 2 if retry else 1
+        generation = 0
+        for attempt in range(attempts):
+            await self._wait_for_connection(generation)
+            if self._closing:
+                raise ConnectionError("Client is closed")
+            generation = self._generation
+            client = self._client
+
+            inner = asyncio.create_task(operation(client))
+            self._inflight.add(inner)
+            try:
+                await asyncio.wait({inner})
+            except asyncio.CancelledError:
+                inner.cancel()
+                raise
+            finally:
+                self._inflight.discard(inner)
+
+            if not inner.cancelled():
+                try:
+                    return inner.result()
+                except (
+                    ConnectionError,
+                    EOFError,
+                    OSError,
+                    anyio.ClosedResourceError,
+                    anyio.BrokenResourceError,
+                    anyio.EndOfStream,
+                ) as e:
+                    # Transport errors mean the server is gone
+                    self._request_restart()
+                    error = e
+            else:
+                error = ConnectionLostError("MCP server connection lost during the call")
+
+            if attempt < attempts - 1:
+                print(f"{Fore.YELLOW}Retrying call after reconnect: {str(error) or type(error).__name__}")
+                continue
+            raise error if isinstance(error, ConnectionError) else ConnectionLostError(str(error))
+
+    def session(self):
+        if self._client is None:
+            raise ConnectionError("MCP server is not connected")
+        return self._client.session()
+
+    @property
+    def cached_tools(self) -> Optional[list[types.Tool]]:
+        return self._client.cached_tools if self._client else None
+
+    @property
+    def tools_fingerprint(self) -> Optional[str]:
+        if self._client is not None and self._client.tools_fingerprint:
+            self._tools_fingerprint = self._client.tools_fingerprint
+        return self._tools_fingerprint
+
+    @property
+    def resources_version(self) -> tuple[int, int]:
+        """Changes when the resource list changes or the server restarts"""
+        return (self._generation, self._client.resources_version if self._client else 0)
+
+    async def list_tools(self) -> list[types.Tool]:
+        return await self._call(lambda client: client.list_tools(), retry=True)
+
+    async def call_tool(
+        self, tool_name: str, tool_input, progress_callback: Optional[ProgressCallback] = None
+    ) -> types.CallToolResult | None:
+        return await self._call(
+            lambda client: client.call_tool(tool_name, tool_input, progress_callback),
+            retry=self._is_idempotent(tool_name)
+        )
+
+    async def list_prompts(self) -> list[types.Prompt]:
+        return await self._call(lambda client: client.list_prompts(), retry=True)
+
+    async def list_resources(self) -> list[dict]:
+        return await self._call(lambda client: client.list_resources(), retry=True)
+
+    async def get_prompt(self, prompt_name, args: dict[str, str]):
+        return await self._call(lambda client: client.get_prompt(prompt_name, args), retry=True)
+
+    async def read_resource(self, uri: str) -> Any:
+        return await self._call(lambda client: client.read_resource(uri), retry=True)
+
+    async def cleanup(self):
+        self._closing = True
+        self._closed.set()
+        self._restart.set()
+        async with self._state:
+            self._state.notify_all()
+        if self._owner is not None and not self._owner.done():
+            try:
+                await asyncio.wait_for(self._owner, timeout=10.0)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                print(f"{Fore.YELLOW}Warning: MCP supervisor did not stop in time")
+        self._owner = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.cleanup()
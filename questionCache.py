@@ -0,0 +1,172 @@
+"""
+Persistent cache of generated interview questions.
+
+Entries are keyed by a hash of everything that shapes the output: the
+full rendered prompt (candidate, profile, job description and number of
+questions), the model and the prompt version. They expire after QUESTION_CACHE_TTL
+seconds (default 7 days).
+
+QUESTION_CACHE_BACKEND selects where they are stored:
+- "sqlite" (default): a local file at QUESTION_CACHE_PATH
+- "postgres": the interview_question_cache table of the application database
+- "off": no caching
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Optional
+
+DEFAULT_SQLITE_PATH = os.path.join(".mcp_cache", "questions.sqlite3")
+
+logger = logging.getLogger(__name__)
+
+
+def question_key(prompt: str, model: str, prompt_version: str) -> str:
+    payload = json.dumps(
+        [prompt, model, prompt_version],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteQuestionStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            # sqlite creates the file but not its directory
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS interview_question_cache ("
+                "key TEXT PRIMARY KEY, questions TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._initialized = True
+        return conn
+
+    def _get(self, key: str, ttl: float) -> Optional[str]:
+        with self._lock, closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT questions FROM interview_question_cache WHERE key = ? AND created_at > ?",
+                (key, time.time() - ttl)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _put(self, key: str, questions: str):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO interview_question_cache (key, questions, created_at) VALUES (?, ?, ?)",
+                (key, questions, time.time())
+            )
+
+    async def get(self, key: str, ttl: float) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key, ttl)
+
+    async def put(self, key: str, questions: str):
+        await asyncio.to_thread(self._put, key, questions)
+
+
+class PostgresQuestionStore:
+    def __init__(self):
+        self._initialized = False
+
+    async def _ensure_table(self):
+        from dbAccessAsync import execute_query
+
+        if not self._initialized:
+            await execute_query(
+                "CREATE TABLE IF NOT EXISTS interview_question_cache ("
+                "key TEXT PRIMARY KEY, questions TEXT NOT NULL, created_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+            )
+            self._initialized = True
+
+    async def get(self, key: str, ttl: float) -> Optional[str]:
+        from dbAccessAsync import execute_query
+
+        await self._ensure_table()
+        row = await execute_query(
+            "SELECT questions FROM interview_question_cache "
+            "WHERE key = %s AND created_at > now() - make_interval(secs => %s)",
+            (key, ttl),
+            prepare=True
+        )
+        return row["questions"] if row else None
+
+    async def put(self, key: str, questions: str):
+        from dbAccessAsync import execute_query
+
+        await self._ensure_table()
+        await execute_query(
+            "INSERT INTO interview_question_cache (key, questions) VALUES (%s, %s) "
+            "ON CONFLICT (key) DO UPDATE SET questions = EXCLUDED.questions, created_at = now()",
+            (key, questions)
+        )
+
+
+class QuestionCache:
+    """Read-through store of generated questions with hit-rate counters"""
+
+    def __init__(self, store, ttl: float):
+        self.store = store
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "QuestionCache":
+        backend = os.getenv("QUESTION_CACHE_BACKEND", "sqlite").lower()
+        if backend == "off":
+            store = None
+        elif backend == "postgres":
+            store = PostgresQuestionStore()
+        else:
+            store = SQLiteQuestionStore(os.getenv("QUESTION_CACHE_PATH", DEFAULT_SQLITE_PATH))
+        return cls(store, ttl=float(os.getenv("QUESTION_CACHE_TTL", str(7 * 24 * 3600))))
+
+    async def get(self, key: str) -> Optional[str]:
+        if self.store is None:
+            return None
+        try:
+            questions = await self.store.get(key, self.ttl)
+        except Exception as e:
+            # The cache never fails a generation
+            self.errors += 1
+            logger.warning("Question cache read failed: %s", e)
+            return None
+        if questions is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return questions
+
+    async def put(self, key: str, questions: str):
+        if self.store is None:
+            return
+        try:
+            await self.store.put(key, questions)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Question cache write failed: %s", e)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+question_cache = QuestionCache.from_env()
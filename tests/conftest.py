@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    # The MCP client and the data layer run on asyncio
+    return "asyncio"
@@ -0,0 +1,44 @@
+import pytest
+
+import dbAccess
+import dbAccessAsync
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def sync_rows(monkeypatch):
+    """Rows produced by the sync iter_query, and whether it was closed"""
+    state = {"produced": 0, "closed": False}
+
+    def iter_query(query, params=(), itersize=None):
+        try:
+            for i in range(100):
+                state["produced"] += 1
+                yield {"n": i}
+        finally:
+            state["closed"] = True
+
+    monkeypatch.setattr(dbAccessAsync, "psycopg3_available", lambda: False)
+    monkeypatch.setattr(dbAccess, "iter_query", iter_query)
+    return state
+
+
+async def test_fallback_streams_itersize_rows_at_a_time(sync_rows):
+    rows = dbAccessAsync.iter_query("SELECT n FROM t", itersize=10)
+
+    assert await rows.__anext__() == {"n": 0}
+    assert sync_rows["produced"] == 10
+    assert [row["n"] async for row in rows] == list(range(1, 100))
+    assert sync_rows["closed"]
+
+
+async def test_fallback_releases_the_query_when_stopped_early(sync_rows):
+    rows = dbAccessAsync.iter_query("SELECT n FROM t", itersize=10)
+    async for row in rows:
+        if row["n"] == 15:
+            break
+    await rows.aclose()
+
+    assert sync_rows["produced"] == 20
+    assert sync_rows["closed"]
@@ -0,0 +1,73 @@
+import asyncio
+
+import psycopg_pool
+import pytest
+
+import dbAccessAsync
+from mcp_client import MCPClient
+
+
+class FakeAsyncPool:
+    """Stands in for AsyncConnectionPool: no database needed"""
+    instances = []
+
+    def __init__(self, conninfo, **kwargs):
+        self.closed = True
+        FakeAsyncPool.instances.append(self)
+
+    @staticmethod
+    async def check_connection(conn):
+        pass
+
+    async def open(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_pool(monkeypatch):
+    FakeAsyncPool.instances = []
+    monkeypatch.setattr(psycopg_pool, "AsyncConnectionPool", FakeAsyncPool)
+    monkeypatch.delenv("PROFILE_CACHE_NOTIFY_CHANNEL", raising=False)
+    monkeypatch.setattr(dbAccessAsync, "_pools", {})
+    monkeypatch.setattr(dbAccessAsync, "_pool_locks", {})
+    monkeypatch.setattr(dbAccessAsync, "_pool_users", {})
+
+
+def test_inprocess_clients_close_the_pool_of_their_loop():
+    async def use_server():
+        async with MCPClient(transport="inprocess", module="mcp_server:server"):
+            # The in-process server shares the client's loop
+            await dbAccessAsync.get_pool()
+            assert len(dbAccessAsync._pools) == 1
+
+    for _ in range(2):
+        asyncio.run(use_server())
+
+    assert len(FakeAsyncPool.instances) == 2
+    assert all(pool.closed for pool in FakeAsyncPool.instances)
+    assert dbAccessAsync._pools == {}
+    assert dbAccessAsync._pool_users == {}
+
+
+def test_sessions_of_one_loop_share_the_pool_until_the_last_one_ends():
+    async def sessions():
+        async with dbAccessAsync.pool_scope():
+            async with dbAccessAsync.pool_scope():
+                pool = await dbAccessAsync.get_pool()
+            assert not pool.closed
+            assert await dbAccessAsync.get_pool() is pool
+        assert pool.closed
+
+    asyncio.run(sessions())
+    assert dbAccessAsync._pools == {}
+
+
+def test_pools_of_closed_loops_are_forgotten():
+    asyncio.run(dbAccessAsync.get_pool())
+    asyncio.run(dbAccessAsync.get_pool())
+
+    assert len(FakeAsyncPool.instances) == 2
+    assert len(dbAccessAsync._pools) == 1
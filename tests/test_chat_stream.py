@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from mcp import types
+
+import core.openrouter
+from core.chat import Chat
+from core.openrouter import OpenRouterClient
+from core.tools import FETCH_TOOL_NAME, ToolManager
+
+pytestmark = pytest.mark.anyio
+
+
+def sse(*chunks) -> str:
+    return "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+
+
+def tool_delta(index, name=None, arguments=None, call_id=None):
+    function = {}
+    if name:
+        function["name"] = name
+    if arguments:
+        function["arguments"] = arguments
+    call = {"index": index, "function": function}
+    if call_id:
+        call["id"] = call_id
+    return {"choices": [{"delta": {"tool_calls": [call]}}]}
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    """Serves the given SSE body to every streaming request"""
+    body = {}
+    real_client = httpx.AsyncClient
+
+    def client(**kwargs):
+        return real_client(transport=httpx.MockTransport(lambda request: httpx.Response(200, text=body["text"])))
+
+    monkeypatch.setattr(core.openrouter.httpx, "AsyncClient", client)
+    return body
+
+
+async def test_calls_without_arguments_are_dispatched_once_closed(stream):
+    dispatched = []
+    stream["text"] = sse(
+        tool_delta(0, "list_jobs", call_id="a"),
+        tool_delta(1, "get_job", '{"job_id": ', call_id="b"),
+        tool_delta(1, arguments='"J01"}'),
+        tool_delta(2, "list_candidates", call_id="c"),
+        {"choices": [{"delta": {}, "finish_reason": "tool_calls"}]},
+    )
+
+    def on_tool_call(call):
+        dispatched.append((call["id"], call["input"]))
+
+    client = OpenRouterClient("test-model", api_key="test")
+    response = await client.chat_stream([{"role": "user", "content": "hi"}], on_tool_call=on_tool_call)
+
+    assert dispatched == [("a", {}), ("b", {"job_id": "J01"}), ("c", {})]
+    assert response.stop_reason == "tool_use"
+
+
+class CachedToolsClient:
+    def __init__(self, tools):
+        self.cached_tools = tools
+
+
+def test_only_read_only_tools_are_read_only():
+    clients = {"server": CachedToolsClient([
+        types.Tool(name="lookup", inputSchema={}, annotations=types.ToolAnnotations(readOnlyHint=True)),
+        types.Tool(name="send_email", inputSchema={}),
+    ])}
+
+    assert ToolManager.is_read_only(clients, "lookup")
+    assert ToolManager.is_read_only(clients, FETCH_TOOL_NAME)
+    assert not ToolManager.is_read_only(clients, "send_email")
+    assert not ToolManager.is_read_only(clients, "unknown")
+
+
+async def test_chat_dispatches_only_read_only_tools_while_streaming(stream, monkeypatch):
+    started = []
+
+    async def execute_tool_call(clients, tool_call, *args):
+        started.append(tool_call["name"])
+        return {}
+
+    monkeypatch.setattr(ToolManager, "execute_tool_call", execute_tool_call)
+    stream["text"] = sse(
+        tool_delta(0, "lookup", '{}', call_id="a"),
+        tool_delta(1, "send_email", '{"to": "x"}', call_id="b"),
+        {"choices": [{"delta": {"content": "Done"}, "finish_reason": "stop"}]},
+    )
+    clients = {"server": CachedToolsClient([
+        types.Tool(name="lookup", inputSchema={}, annotations=types.ToolAnnotations(readOnlyHint=True)),
+        types.Tool(name="send_email", inputSchema={}),
+    ])}
+    chat = Chat(OpenRouterClient("test-model", api_key="test"), clients)
+    chat.messages = [{"role": "user", "content": "hi"}]
+
+    _, dispatched = await chat._stream_completion(tools=None)
+
+    await asyncio.gather(*dispatched.values())
+    assert list(dispatched) == ["a"]
+    assert started == ["lookup"]
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+from psycopg2 import extensions
+
+from dbAccess import ConnectionPool
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for the pool"""
+
+    def __init__(self):
+        self.closed = 0
+
+    def get_transaction_status(self):
+        return extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def make_pool(opened):
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    def make(minconn=1, maxconn=3, timeout=1.0):
+        return ConnectionPool(minconn, maxconn, timeout, validate_after=30, connect=connect)
+    return make
+
+
+def test_connections_above_minconn_are_kept_idle(make_pool, opened):
+    pool = make_pool(minconn=1, maxconn=3)
+    conns = [pool.getconn() for _ in range(3)]
+    for conn in conns:
+        pool.putconn(conn)
+
+    assert not any(conn.closed for conn in opened)
+    again = [pool.getconn() for _ in range(3)]
+    assert set(map(id, again)) == set(map(id, conns))
+    assert len(opened) == 3
+    assert pool.stats.size == 3
+    assert pool.stats.in_use == 3
+
+
+def test_broken_connection_is_discarded_with_its_state(make_pool, opened):
+    pool = make_pool(minconn=1, maxconn=2)
+    conn = pool.getconn()
+    pool.prepared_statements(conn).add("stmt_a")
+    pool.putconn(conn, broken=True)
+
+    assert conn.closed
+    assert pool.stats.discarded == 1
+    assert pool.stats.size == 0
+    fresh = pool.getconn()
+    assert fresh is not conn
+    assert pool.prepared_statements(fresh) == set()
+
+
+def test_prepared_statements_are_tracked_per_connection(make_pool):
+    pool = make_pool(minconn=2, maxconn=2)
+    first, second = pool.getconn(), pool.getconn()
+    pool.prepared_statements(first).add("stmt_a")
+
+    assert pool.prepared_statements(second) == set()
+    pool.putconn(first)
+    assert pool.prepared_statements(pool.getconn()) == {"stmt_a"}
+
+
+def test_checkout_waits_for_a_returned_connection(make_pool):
+    pool = make_pool(minconn=0, maxconn=1, timeout=0.05)
+    conn = pool.getconn()
+    with pytest.raises(TimeoutError):
+        pool.getconn()
+
+    threading.Timer(0.01, pool.putconn, (conn,)).start()
+    pool.timeout = 1.0
+    assert pool.getconn() is conn
+
+
+def test_close_closes_idle_connections(make_pool, opened):
+    pool = make_pool(minconn=2, maxconn=2)
+    pool.close()
+
+    assert all(conn.closed for conn in opened)
+    assert pool.stats.size == 0
@@ -0,0 +1,57 @@
+import pytest
+
+import mcp_server
+from questionCache import QuestionCache, SQLiteQuestionStore
+
+pytestmark = pytest.mark.anyio
+
+PROFILE = {"semantic_profile": "Python developer, 5 years of Django", "jobdescription": "Backend engineer"}
+
+
+@pytest.fixture
+def sampled(monkeypatch, tmp_path):
+    """Prompts sent to sampling; the answers come from `answers` or echo the prompt"""
+    prompts = []
+    answers = []
+
+    async def sample_questions(context, prompt):
+        prompts.append(prompt)
+        return answers.pop(0) if answers else f"questions for: {prompt}"
+
+    monkeypatch.setattr(mcp_server, "sample_questions", sample_questions)
+    monkeypatch.setattr(
+        mcp_server, "question_cache",
+        QuestionCache(SQLiteQuestionStore(str(tmp_path / "questions.sqlite3")), ttl=60)
+    )
+    return prompts, answers
+
+
+async def test_candidates_with_the_same_profile_do_not_share_questions(sampled):
+    prompts, _ = sampled
+    mario = await mcp_server.generate_questions(None, {**PROFILE, "name": "Mario", "surname": "Rossi"}, 5)
+    anna = await mcp_server.generate_questions(None, {**PROFILE, "name": "Anna", "surname": "Bianchi"}, 5)
+
+    assert len(prompts) == 2
+    assert "Mario Rossi" in mario
+    assert "Anna Bianchi" in anna
+
+
+async def test_cached_questions_are_reused(sampled):
+    prompts, _ = sampled
+    row = {**PROFILE, "name": "Mario", "surname": "Rossi"}
+    first = await mcp_server.generate_questions(None, row, 5)
+
+    assert await mcp_server.generate_questions(None, row, 5) == first
+    assert len(prompts) == 1
+    await mcp_server.generate_questions(None, row, 5, force_refresh=True)
+    assert len(prompts) == 2
+
+
+async def test_empty_sampling_result_is_not_cached(sampled):
+    prompts, answers = sampled
+    answers.append(mcp_server.NO_TEXT_CONTENT)
+    row = {**PROFILE, "name": "Mario", "surname": "Rossi"}
+
+    assert await mcp_server.generate_questions(None, row, 5) == mcp_server.NO_TEXT_CONTENT
+    assert "Mario Rossi" in await mcp_server.generate_questions(None, row, 5)
+    assert len(prompts) == 2
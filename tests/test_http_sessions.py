@@ -0,0 +1,118 @@
+"""Reuse and termination of Streamable-HTTP sessions, against a local FastMCP server"""
+import socket
+import threading
+import time
+
+import anyio
+import httpx
+import pytest
+import uvicorn
+from mcp.client.streamable_http import MCP_SESSION_ID
+from mcp.server.fastmcp import FastMCP
+
+import mcp_client
+from mcp_client import MCPClient
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = FastMCP("sessions")
+
+    @server.tool()
+    def echo(text: str) -> str:
+        return text
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    uvicorn_server = uvicorn.Server(
+        uvicorn.Config(server.streamable_http_app(), host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=uvicorn_server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not uvicorn_server.started:
+        assert time.monotonic() < deadline, "HTTP server did not start"
+        time.sleep(0.05)
+
+    yield f"http://127.0.0.1:{port}/mcp"
+
+    uvicorn_server.should_exit = True
+    thread.join(timeout=10)
+
+
+@pytest.fixture(autouse=True)
+def empty_session_pool(monkeypatch):
+    monkeypatch.setattr(mcp_client, "_http_sessions", {})
+    monkeypatch.setattr(mcp_client, "HTTP_SESSION_POOL_SIZE", 2)
+
+
+def is_alive(url: str, session_id: str) -> bool:
+    """
+    Opens the session's event stream and reads only the status: a
+    terminated session answers 404
+    """
+    with httpx.stream(
+        "GET",
+        url,
+        headers={MCP_SESSION_ID: session_id, "Accept": "text/event-stream"},
+        timeout=5,
+        follow_redirects=True,
+    ) as response:
+        return response.status_code != 404
+
+
+async def connect(url: str) -> MCPClient:
+    client = MCPClient(transport="streamable-http", url=url)
+    await client.connect()
+    return client
+
+
+async def test_session_is_resumed_by_the_next_client(server_url):
+    first = await connect(server_url)
+    session_id = first._get_session_id()
+    await first.cleanup()
+    assert mcp_client._http_sessions[server_url] == [session_id]
+
+    second = await connect(server_url)
+    assert second._get_session_id() == session_id
+    result = await second.call_tool("echo", {"text": "hi"})
+    assert result.content[0].text == "hi"
+    await second.cleanup()
+
+
+async def test_sessions_beyond_the_pool_are_terminated(server_url):
+    # Concurrent clients of one URL, e.g. parallel API requests, each in its own task
+    session_ids = []
+    all_connected = anyio.Event()
+
+    async def run_client():
+        client = await connect(server_url)
+        session_ids.append(client._get_session_id())
+        if len(session_ids) == 4:
+            all_connected.set()
+        await all_connected.wait()
+        await client.cleanup()
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(4):
+            tg.start_soon(run_client)
+
+    assert len(set(session_ids)) == 4
+    pooled = mcp_client._http_sessions[server_url]
+    assert len(pooled) == 2
+    for session_id in session_ids:
+        assert is_alive(server_url, session_id) == (session_id in pooled)
+
+
+async def test_pool_size_zero_terminates_every_session(server_url, monkeypatch):
+    monkeypatch.setattr(mcp_client, "HTTP_SESSION_POOL_SIZE", 0)
+    client = await connect(server_url)
+    session_id = client._get_session_id()
+    await client.cleanup()
+
+    assert mcp_client._http_sessions[server_url] == []
+    assert not is_alive(server_url, session_id)
@@ -0,0 +1,21 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_loading_a_server_in_process_keeps_the_router_logging():
+    # A fresh interpreter: other tests have already imported mcp_server
+    script = (
+        "import logging\n"
+        "from mcp_client import _load_server\n"
+        "_load_server('mcp_server:server')\n"
+        "root = logging.getLogger()\n"
+        "print(len(root.handlers), root.level)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.split() == ["0", str(30)]
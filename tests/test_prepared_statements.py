@@ -0,0 +1,77 @@
+import pytest
+from psycopg2 import errors
+
+from dbAccess import _execute
+from dbQuery import statement_name
+
+QUERY = "SELECT name FROM candidate_applications_view WHERE email = %s"
+OTHER = "SELECT jobdescription FROM candidate_applications_view WHERE job_id = %s"
+
+
+class FakeConnection:
+    def __init__(self):
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeCursor:
+    """Records statements; the server forgets prepared ones when told to"""
+
+    def __init__(self):
+        self.connection = FakeConnection()
+        self.statements = []
+        self.server_prepared = set()
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        word, name = sql.split()[:2]
+        if word == "PREPARE":
+            if name in self.server_prepared:
+                raise errors.DuplicatePreparedStatement(f"prepared statement \"{name}\" already exists")
+            self.server_prepared.add(name)
+        elif word == "EXECUTE" and name not in self.server_prepared:
+            raise errors.InvalidSqlStatementName(f"prepared statement \"{name}\" does not exist")
+
+
+def test_statement_is_prepared_once():
+    cur, prepared = FakeCursor(), set()
+    _execute(cur, prepared, QUERY, ("a@example.com",), prepare=True)
+    _execute(cur, prepared, QUERY, ("b@example.com",), prepare=True)
+
+    assert [sql.split()[0] for sql in cur.statements] == ["PREPARE", "EXECUTE", "EXECUTE"]
+    assert prepared == {statement_name(QUERY)}
+
+
+def test_statement_missing_on_the_server_is_prepared_again():
+    cur, prepared = FakeCursor(), set()
+    _execute(cur, prepared, QUERY, ("a@example.com",), prepare=True)
+    cur.server_prepared.clear()
+    _execute(cur, prepared, QUERY, ("a@example.com",), prepare=True)
+
+    assert [sql.split()[0] for sql in cur.statements] == ["PREPARE", "EXECUTE", "EXECUTE", "PREPARE", "EXECUTE"]
+    assert cur.connection.rollbacks == 1
+
+
+def test_other_statements_survive_the_retry():
+    cur, prepared = FakeCursor(), set()
+    _execute(cur, prepared, QUERY, ("a@example.com",), prepare=True)
+    _execute(cur, prepared, OTHER, ("J01",), prepare=True)
+    cur.server_prepared.discard(statement_name(QUERY))
+
+    _execute(cur, prepared, QUERY, ("a@example.com",), prepare=True)
+    _execute(cur, prepared, OTHER, ("J01",), prepare=True)
+
+    assert prepared == {statement_name(QUERY), statement_name(OTHER)}
+    assert [sql.split()[0] for sql in cur.statements[-3:]] == ["PREPARE", "EXECUTE", "EXECUTE"]
+
+
+def test_retry_happens_only_once():
+    class ForgetfulCursor(FakeCursor):
+        def execute(self, sql, params=None):
+            super().execute(sql, params)
+            self.server_prepared.clear()
+
+    with pytest.raises(errors.InvalidSqlStatementName):
+        _execute(ForgetfulCursor(), set(), QUERY, ("a@example.com",), prepare=True)
@@ -0,0 +1,102 @@
+import pytest
+
+import dbCache
+from dbCache import MISS, ProfileCache
+
+ROW = {"name": "Mario", "surname": "Rossi"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(dbCache.time, "monotonic", clock)
+    return clock
+
+
+def filled_cache() -> ProfileCache:
+    cache = ProfileCache(ttl=60, max_size=10)
+    cache.put("email", "a@example.com", ROW)
+    cache.put("email", "b@example.com", ROW)
+    cache.put("candidate_id", "C01", ROW)
+    cache.put("job_id", "J01", ROW)
+    return cache
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ProfileCache(ttl=60, max_size=10)
+    cache.put("email", "a@example.com", ROW)
+
+    clock.now += 59
+    assert cache.get("email", "a@example.com") == ROW
+    clock.now += 2
+    assert cache.get("email", "a@example.com") is MISS
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ProfileCache(ttl=60, max_size=2)
+    cache.put("email", "a@example.com", ROW)
+    cache.put("email", "b@example.com", ROW)
+    cache.get("email", "a@example.com")
+    cache.put("email", "c@example.com", ROW)
+
+    assert cache.get("email", "b@example.com") is MISS
+    assert cache.get("email", "a@example.com") == ROW
+    assert cache.get("email", "c@example.com") == ROW
+    assert cache.stats()["size"] == 2
+
+
+@pytest.mark.parametrize("row", [None, {}, [], 0])
+def test_missing_rows_are_not_cached(row):
+    cache = ProfileCache(ttl=60, max_size=10)
+    cache.put("email", "a@example.com", row)
+
+    assert cache.get("email", "a@example.com") is MISS
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ProfileCache(ttl=0, max_size=10)
+    cache.put("email", "a@example.com", ROW)
+
+    assert cache.get("email", "a@example.com") is MISS
+
+
+def test_email_notification_drops_only_that_email():
+    cache = filled_cache()
+    cache.handle_notification('{"email": "a@example.com"}')
+
+    assert cache.get("email", "a@example.com") is MISS
+    assert cache.get("email", "b@example.com") == ROW
+    assert cache.get("candidate_id", "C01") == ROW
+    assert cache.get("job_id", "J01") == ROW
+
+
+@pytest.mark.parametrize("payload, kind, value", [
+    ('{"job_id": "J01"}', "job_id", "J01"),
+    ('{"candidate_id": "C01"}', "candidate_id", "C01"),
+])
+def test_job_and_candidate_notifications_also_drop_email_rows(payload, kind, value):
+    cache = filled_cache()
+    cache.handle_notification(payload)
+
+    assert cache.get(kind, value) is MISS
+    assert cache.get("email", "a@example.com") is MISS
+    assert cache.get("email", "b@example.com") is MISS
+    other = ("candidate_id", "C01") if kind == "job_id" else ("job_id", "J01")
+    assert cache.get(*other) == ROW
+
+
+@pytest.mark.parametrize("payload", ["", "not json", "[1, 2]", "{}"])
+def test_empty_or_unknown_notification_clears_everything(payload):
+    cache = filled_cache()
+    cache.handle_notification(payload)
+
+    assert cache.stats()["size"] == 0
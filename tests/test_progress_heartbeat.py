@@ -0,0 +1,43 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import mcp_server
+from mcp_server import ProgressHeartbeat
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeContext:
+    def __init__(self):
+        self.reports = []
+
+    async def report_progress(self, progress, total):
+        self.reports.append(progress)
+
+
+async def test_heartbeats_stop_after_max_silence():
+    context = FakeContext()
+    async with ProgressHeartbeat(context, total=2, interval=0.01, max_silence=0.05) as progress:
+        await asyncio.sleep(0.2)
+        silent = len(context.reports)
+        await progress.advance(1)
+        await asyncio.sleep(0.2)
+
+    assert silent == 5
+    # The advance itself, then at most five more heartbeats
+    assert len(context.reports) == silent + 1 + 5
+    assert context.reports == sorted(context.reports)
+    assert all(value < 2 for value in context.reports)
+
+
+async def test_hung_sampling_times_out(monkeypatch):
+    monkeypatch.setenv("SAMPLING_TIMEOUT", "0.05")
+
+    async def create_message(**kwargs):
+        await asyncio.sleep(10)
+
+    context = SimpleNamespace(session=SimpleNamespace(create_message=create_message))
+    with pytest.raises(asyncio.TimeoutError):
+        await mcp_server.sample_questions(context, "prompt")
@@ -0,0 +1,49 @@
+import sqlite3
+
+import pytest
+
+from questionCache import QuestionCache, SQLiteQuestionStore
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_sqlite_store_creates_its_directory(tmp_path):
+    cache = QuestionCache(SQLiteQuestionStore(str(tmp_path / "missing" / "questions.sqlite3")), ttl=60)
+
+    assert await cache.get("key") is None
+    await cache.put("key", "1. Why Python?")
+    assert await cache.get("key") == "1. Why Python?"
+    assert cache.stats() == {"hits": 1, "misses": 1, "errors": 0, "hit_rate": 0.5}
+
+
+async def test_expired_questions_are_a_miss(tmp_path):
+    cache = QuestionCache(SQLiteQuestionStore(str(tmp_path / "questions.sqlite3")), ttl=0)
+    await cache.put("key", "1. Why Python?")
+
+    assert await cache.get("key") is None
+
+
+async def test_sqlite_connections_are_closed(tmp_path, monkeypatch):
+    opened = []
+
+    class TrackedConnection(sqlite3.Connection):
+        closed = False
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    connect = sqlite3.connect
+
+    def tracked_connect(*args, **kwargs):
+        conn = connect(*args, factory=TrackedConnection, **kwargs)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(sqlite3, "connect", tracked_connect)
+    cache = QuestionCache(SQLiteQuestionStore(str(tmp_path / "questions.sqlite3")), ttl=60)
+    await cache.put("key", "1. Why Python?")
+    assert await cache.get("key") == "1. Why Python?"
+
+    assert len(opened) == 2
+    assert all(conn.closed for conn in opened)
@@ -0,0 +1,66 @@
+import pytest
+from mcp import types
+
+from mcp_client import MCPClient
+
+pytestmark = pytest.mark.anyio
+
+URI = "data://candidates/C01"
+
+
+class FakeSession:
+    """Serves a resource whose value changes on every read"""
+
+    def __init__(self, client, update_during_read=False):
+        self.client = client
+        self.update_during_read = update_during_read
+        self.reads = 0
+
+    async def subscribe_resource(self, uri):
+        pass
+
+    async def read_resource(self, uri):
+        self.reads += 1
+        if self.update_during_read:
+            self.update_during_read = False
+            # The server changes the resource and reports it before this read returns
+            await self.client._message_handler(types.ServerNotification(
+                types.ResourceUpdatedNotification(
+                    method="notifications/resources/updated",
+                    params=types.ResourceUpdatedNotificationParams(uri=uri),
+                )
+            ))
+        return types.ReadResourceResult(contents=[
+            types.TextResourceContents(uri=uri, mimeType="application/json", text=f'{{"read": {self.reads}}}')
+        ])
+
+
+def make_client(update_during_read=False):
+    client = MCPClient(command="unused")
+    client.server_capabilities = types.ServerCapabilities(
+        resources=types.ResourcesCapability(subscribe=True)
+    )
+    client._session = FakeSession(client, update_during_read)
+    return client
+
+
+async def test_resource_is_cached_until_updated():
+    client = make_client()
+
+    assert await client.read_resource(URI) == {"read": 1}
+    assert await client.read_resource(URI) == {"read": 1}
+    await client._message_handler(types.ServerNotification(
+        types.ResourceUpdatedNotification(
+            method="notifications/resources/updated",
+            params=types.ResourceUpdatedNotificationParams(uri=URI),
+        )
+    ))
+    assert await client.read_resource(URI) == {"read": 2}
+
+
+async def test_read_overlapping_an_update_is_not_cached():
+    client = make_client(update_during_read=True)
+
+    assert await client.read_resource(URI) == {"read": 1}
+    assert await client.read_resource(URI) == {"read": 2}
+    assert await client.read_resource(URI) == {"read": 2}
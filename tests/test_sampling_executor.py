@@ -0,0 +1,107 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mcp_client import MCPClient
+from mcp_sampling import SamplingExecutor
+
+pytestmark = pytest.mark.anyio
+
+
+def test_inprocess_servers_get_their_own_executor():
+    first = MCPClient(transport="inprocess", module="mcp_server:server")
+    second = MCPClient(transport="inprocess", module="mcp_server.example:server")
+
+    assert first.server_key == "inprocess:mcp_server:server"
+    assert first._sampling is not second._sampling
+
+
+def test_clients_of_one_server_share_the_executor():
+    first = MCPClient(command="python", args=["mcp_server.py"])
+    second = MCPClient(command="python", args=["mcp_server.py"])
+    other = MCPClient(transport="streamable-http", url="http://localhost:8001/mcp")
+
+    assert first._sampling is second._sampling
+    assert first._sampling is not other._sampling
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+def sampler(calls, name, release=None, delay=0.05):
+    async def sample():
+        calls.append(name)
+        if release is not None:
+            await release.wait()
+        await asyncio.sleep(delay)
+        return f"text of {name}"
+    return sample
+
+
+async def test_waiters_are_served_in_arrival_order(calls):
+    executor = SamplingExecutor("test", max_concurrency=1)
+    release = asyncio.Event()
+    first = asyncio.create_task(executor.run("a", sampler(calls, "a", release)))
+    await asyncio.sleep(0)
+    waiting = []
+    for name in "bcd":
+        waiting.append(asyncio.create_task(executor.run(name, sampler(calls, name, delay=0))))
+        await asyncio.sleep(0)
+
+    release.set()
+    released_at = time.perf_counter()
+    await asyncio.gather(first, *waiting)
+
+    assert calls == ["a", "b", "c", "d"]
+    # No polling delay between the release and the next sampling
+    assert time.perf_counter() - released_at < 0.15
+
+
+async def test_identical_requests_in_flight_share_one_call(calls):
+    executor = SamplingExecutor("test", max_concurrency=4)
+    results = await asyncio.gather(*(executor.run("same", sampler(calls, "same")) for _ in range(5)))
+
+    assert calls == ["same"]
+    assert results == ["text of same"] * 5
+    assert executor.shared == 4
+
+
+async def test_waiters_run_the_request_again_when_its_owner_is_cancelled(calls):
+    executor = SamplingExecutor("test", max_concurrency=4)
+    owner = asyncio.create_task(executor.run("same", sampler(calls, "owner", delay=10)))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(executor.run("same", sampler(calls, "waiter")))
+    await asyncio.sleep(0.01)
+
+    owner.cancel()
+    assert await waiter == "text of waiter"
+    assert calls == ["owner", "waiter"]
+
+
+def test_limit_and_sharing_hold_across_event_loops():
+    executor = SamplingExecutor("test", max_concurrency=1)
+    running = []
+    peak = []
+    calls = []
+
+    async def sample():
+        calls.append(1)
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.05)
+        running.pop()
+        return "text"
+
+    def client(key):
+        return asyncio.run(executor.run(key, sample))
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(client, ["a", "b", "shared", "shared"]))
+
+    assert results == ["text"] * 4
+    assert max(peak) == 1
+    assert len(calls) in (3, 4)
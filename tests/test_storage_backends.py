@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+import pytest
+
+import dbBackends
+from dbBackends import MemoryBackend, SQLiteBackend, StorageBackend, synthetic_candidates
+
+pytestmark = pytest.mark.anyio
+
+ROWS = list(synthetic_candidates(200, candidates_per_job=20))
+
+
+def test_incomplete_backend_cannot_be_created():
+    class LookupOnly(StorageBackend):
+        async def get_user_by_email(self, email):
+            return None
+
+    with pytest.raises(TypeError, match="get_candidate"):
+        LookupOnly()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+async def backend(request, tmp_path):
+    if request.param == "memory":
+        backend = MemoryBackend()
+    else:
+        backend = SQLiteBackend(str(tmp_path / "candidates.sqlite3"))
+    await backend.load(ROWS)
+    yield backend
+    await backend.close()
+
+
+async def test_backends_answer_the_same_queries(backend):
+    row = ROWS[0]
+    user = await backend.get_user_by_email(row["email"])
+    job_id = row["job_id"]
+
+    assert user == {key: row[key] for key in ("name", "surname", "semantic_profile", "jobdescription")}
+    assert await backend.get_user_by_email("nobody@example.com") is None
+
+    page = await backend.get_candidates_page(job_id, None, 5)
+    emails = [candidate["email"] for candidate in page]
+    assert emails == sorted(emails) and len(emails) == 5
+    following = await backend.get_candidates_page(job_id, emails[-1], 5)
+    assert following[0]["email"] > emails[-1]
+
+
+async def test_synthetic_rows_are_built_once_off_the_event_loop(monkeypatch):
+    builds = []
+
+    def synthetic(count, **kwargs):
+        builds.append(threading.current_thread() is threading.main_thread())
+        return synthetic_candidates(count, **kwargs)
+
+    monkeypatch.setattr(dbBackends, "synthetic_candidates", synthetic)
+    backend = MemoryBackend(synthetic_count=100)
+    row = next(synthetic_candidates(100))
+    users = await asyncio.gather(*(backend.get_user_by_email(row["email"]) for _ in range(3)))
+
+    assert builds == [False]
+    assert all(user["name"] == row["name"] for user in users)
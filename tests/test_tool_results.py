@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+from mcp import types
+
+from core.tools import FETCH_TOOL_NAME, RESULT_PREVIEW_CHARS, ToolManager, ToolResultStore
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeClient:
+    """Serves one tool returning a fixed text"""
+
+    def __init__(self, text):
+        self.text = text
+        self.cached_tools = [types.Tool(name="dump", inputSchema={"type": "object"})]
+        self.tools_fingerprint = "v1"
+
+    async def list_tools(self):
+        return self.cached_tools
+
+    async def call_tool(self, name, arguments, progress_callback=None):
+        return SimpleNamespace(content=[SimpleNamespace(text=self.text)], isError=False)
+
+
+async def test_only_a_preview_of_the_result_is_printed(capsys):
+    content = "x" * 5000 + "END"
+    result = await ToolManager.execute_single_tool(FakeClient(content), "dump", {})
+
+    printed = capsys.readouterr().out
+    assert result["content"] == content
+    assert "END" not in printed
+    assert f"... ({len(content)} chars)" in printed
+    assert "x" * RESULT_PREVIEW_CHARS in printed
+
+
+async def test_fetch_tool_is_offered_only_when_asked():
+    clients = {"server": FakeClient("short")}
+
+    plain = await ToolManager.get_tool_payload(clients)
+    with_fetch = await ToolManager.get_tool_payload(clients, include_fetch=True)
+
+    assert plain.names == ("dump",)
+    assert with_fetch.names == ("dump", FETCH_TOOL_NAME)
+
+
+def test_store_recognises_its_own_handles():
+    store = ToolResultStore(max_entries=1)
+    handle = store.put("payload")
+
+    assert store.holds_any(f"... stored as handle '{handle}' ...")
+    assert not store.holds_any("no handle here")
+    store.put("another")
+    assert not store.holds_any(f"handle '{handle}'")
+
+
+async def test_truncated_results_enable_the_fetch_tool():
+    budget = ToolManager.get_result_budget_for_tool("dump")
+    clients = {"server": FakeClient("y" * (budget * 2))}
+    result = await ToolManager.execute_tool_call(clients, {"id": "a", "name": "dump", "input": {}})
+
+    assert ToolManager.result_store.holds_any(result["content"])